@@ -0,0 +1,46 @@
+# اجرای دسته‌ای برنامه‌ها روی همه هسته‌ها و نوشتن نتایج به صورت JSON Lines
+#
+# استفاده:  python console_tests/main_batch_run.py tests/ [--engine pipeline]
+#                [--workers N] [--max-cycles N] [--out results.jsonl]
+#           python console_tests/main_batch_run.py manifest.json ...
+
+import sys
+import os
+import json
+import time
+import argparse
+
+# مسیر پوشه پدر فایل فعلی
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pipeline.batch_runner import ENGINES, load_manifest, run_batch
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run many programs in parallel")
+    parser.add_argument("source", help="directory of .s/.elf files or a JSON/JSONL manifest")
+    parser.add_argument("--engine", choices=ENGINES, default=None,
+                        help="engine for jobs that do not name one (default: pipeline)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes")
+    parser.add_argument("--max-cycles", type=int, default=None, help="per-program limit")
+    parser.add_argument("--out", default=None, help="output .jsonl (default: stdout)")
+    args = parser.parse_args()
+
+    jobs = load_manifest(args.source)
+    for job in jobs:
+        if args.engine is not None:
+            job.setdefault("engine", args.engine)
+        if args.max_cycles is not None:
+            job.setdefault("max_cycles", args.max_cycles)
+
+    out = open(args.out, "w") if args.out else sys.stdout
+    start = time.perf_counter()
+    failed = 0
+    for result in run_batch(jobs, workers=args.workers):
+        failed += "error" in result
+        out.write(json.dumps(result) + "\n")
+        out.flush()
+    if out is not sys.stdout:
+        out.close()
+
+    print(f"{len(jobs)} programs, {failed} failed, {time.perf_counter() - start:.2f}s",
+          file=sys.stderr)
@@ -0,0 +1,78 @@
+# اجرای مجموعه بنچمارک روی موتورهای شبیه‌ساز و مقایسه با baseline ذخیره شده
+#
+# استفاده:  python console_tests/main_benchmark.py [examples/benchmarks]
+#                [--engines pipeline functional translated] [--repeat 3]
+#                [--out results.json] [--baseline local.json]
+#                [--save-baseline] [--tolerance 0.15]
+#
+# بدون --baseline فقط سیکل‌ها و دستورها با baseline ذخیره شده در مخزن مقایسه
+# می‌شوند (نرخ‌های آن مال ماشین دیگری است)؛ با --baseline (گزارشی که روی همین
+# ماشین ذخیره شده) افت سرعت هم بررسی می‌شود.
+#
+# کد خروج 1 یعنی تغییر سیکل/دستور نسبت به baseline، افت کارایی (فقط با
+# --baseline) یا اختلاف حالت نهایی بین موتورها.
+
+import sys
+import os
+import argparse
+
+# مسیر پوشه پدر فایل فعلی
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pipeline.batch_runner import ENGINES
+from pipeline.benchmark import (BENCHMARK_DIR, DEFAULT_TOLERANCE, run_suite, compare,
+                                load_report, save_report)
+
+
+def print_result(result):
+    cycles = result["cycles"] if result["cycles"] is not None else "-"
+    cycle_rate = (f"{result['cycles_per_sec']:>12,.0f}"
+                  if result["cycles_per_sec"] is not None else f"{'-':>12}")
+    print(f"{result['name']:<16} {result['engine']:<11} {result['wall']:>8.3f}s "
+          f"{cycles:>9} {result['instructions']:>9} {cycle_rate} "
+          f"{result['instructions_per_sec']:>12,.0f}", flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure simulator speed on benchmark kernels")
+    parser.add_argument("source", nargs="?", default=BENCHMARK_DIR,
+                        help="directory of kernels or a JSON/JSONL manifest")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    parser.add_argument("--repeat", type=int, default=3, help="runs per kernel (best is kept)")
+    parser.add_argument("--out", default=None, help="write the JSON report here")
+    parser.add_argument("--baseline", default=None,
+                        help="report saved on this machine; also checks instructions/sec "
+                             "(default: cycles/instructions only, against the stored baseline)")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="overwrite the baseline with this run instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed instructions/sec drop (fraction)")
+    args = parser.parse_args()
+    # سرعت فقط با baseline گرفته شده روی همین ماشین مقایسه می‌شود
+    tolerance = args.tolerance if args.baseline else None
+    baseline = args.baseline or os.path.join(BENCHMARK_DIR, "baseline.json")
+
+    print(f"{'kernel':<16} {'engine':<11} {'wall':>9} {'cycles':>9} {'instrs':>9} "
+          f"{'cycles/s':>12} {'instrs/s':>12}")
+    report = run_suite(args.source, args.engines, args.repeat, progress=print_result)
+    if args.out:
+        save_report(report, args.out)
+
+    failed = bool(report["mismatches"])
+    for name in report["mismatches"]:
+        print(f"MISMATCH: engines disagree on the final state of {name}")
+
+    if args.save_baseline:
+        save_report(report, baseline)
+        print(f"Baseline written to {baseline}")
+    elif os.path.exists(baseline):
+        checked = "cycles, instructions and speed" if tolerance is not None else \
+            "cycles and instructions"
+        print(f"\nCompared {checked} with {baseline}:")
+        for row in compare(report, load_report(baseline), tolerance):
+            speedup = (f"{row['speedup']:.2f}x"
+                       if tolerance is not None and row["speedup"] is not None else "-")
+            status = "; ".join(row["problems"]) if row["problems"] else "ok"
+            print(f"{row['name']:<16} {row['engine']:<11} {speedup:>7}  {status}")
+            failed = failed or bool(row["problems"])
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,45 @@
+# مقایسه پیش‌بینی‌کننده‌های شاخه روی یک برنامه: سیکل، CPI و دقت پیش‌بینی
+#
+# استفاده:  python console_tests/main_branch_predictors.py [program.s]
+
+import sys
+import os
+
+# مسیر پوشه پدر فایل فعلی
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cpu.registers import RegisterFile
+from cpu.memory import Memory
+from cpu.branch_predictor import make_predictor
+from pipeline.pipeline_runner import run_pipeline
+from isa.parser import load_assembly_file
+
+# (نام، پارامترهای make_predictor)؛ None یعنی pipeline بدون پیش‌بینی (flush در هر taken)
+CONFIGS = [
+    ("none", None),
+    ("not_taken", {}),
+    ("btfn", {}),
+    ("bimodal", {}),
+    ("gshare", {}),
+    ("btb", {}),
+    ("bimodal+btb", {"btb_entries": 256}),
+]
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else "examples/program2.s"
+    program, labels = load_assembly_file(path)
+
+    print(f"=== {path} ===")
+    print(f"{'predictor':<14}{'cycles':>8}{'instret':>9}{'CPI':>7}{'branches':>10}{'accuracy':>10}")
+    for name, params in CONFIGS:
+        rf, mem = RegisterFile(), Memory()
+        predictor = None if params is None else make_predictor(name.split("+")[0], **params)
+        state = run_pipeline(program, rf, mem, max_cycles=10 ** 7, debug=False,
+                             predictor=predictor)
+        stats = state['stats']
+        if predictor is None:
+            print(f"{name:<14}{stats.cycle:>8}{stats.instret:>9}{stats.cpi:>7.2f}{'-':>10}{'-':>10}")
+        else:
+            s = stats.predictor
+            print(f"{name:<14}{stats.cycle:>8}{stats.instret:>9}{stats.cpi:>7.2f}"
+                  f"{s['branches']:>10}{s['accuracy']:>10.1%}")
@@ -0,0 +1,35 @@
+# اجرای pipeline با کش‌های L1 دستور و داده و نمایش شمارنده‌های آن‌ها
+#
+# استفاده:  python console_tests/main_cache_stats.py [program.s] [miss_penalty]
+
+import sys
+import os
+
+# مسیر پوشه پدر فایل فعلی
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cpu.registers import RegisterFile
+from cpu.memory import Memory
+from cpu.cache import Cache
+from pipeline.pipeline_runner import run_pipeline
+from isa.parser import load_assembly_file
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else "examples/program2.s"
+    penalty = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    program, labels = load_assembly_file(path)
+
+    for policy in ("lru", "plru", "random"):
+        rf, mem = RegisterFile(), Memory()
+        icache = Cache(1024, 2, 16, policy=policy, miss_penalty=penalty, name="L1I")
+        dcache = Cache(1024, 2, 16, policy=policy, miss_penalty=penalty, name="L1D")
+        state = run_pipeline(program, rf, mem, max_cycles=10 ** 7, debug=False,
+                             icache=icache, dcache=dcache)
+
+        print(f"=== {path} ({policy}, miss penalty {penalty}) ===")
+        print(f"cycles: {state['cycle']}")
+        for cache in (icache, dcache):
+            s = cache.stats()
+            print(f"{s['name']}: accesses={s['accesses']} hits={s['hits']} misses={s['misses']} "
+                  f"evictions={s['evictions']} writebacks={s['writebacks']} "
+                  f"hit_rate={s['hit_rate']:.2%}")
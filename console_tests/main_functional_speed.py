@@ -0,0 +1,66 @@
+# مقایسه سرعت اجرای تابعی و ترجمه بلوکی با اجرای pipeline (دستور بر ثانیه)
+
+import sys
+import os
+import time
+
+# مسیر پوشه پدر فایل فعلی
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cpu.registers import RegisterFile
+from cpu.memory import Memory
+from pipeline.pipeline_runner import run_pipeline
+from pipeline.functional_runner import run_functional
+from pipeline.block_translator import run_translated
+from isa.parser import parse_program_with_labels, parse_final_program
+
+
+def counted_loop(iterations):
+    # حلقه شمارشی با یک store در هر تکرار
+    return f"""
+ADDI x1, x0, 0
+ADDI x2, x0, {iterations}
+ADDI x10, x0, 1000
+loop:
+  ADD  x3, x3, x1
+  STORE x3, 0(x10)
+  ADDI x1, x1, 1
+  BNE  x1, x2, loop
+"""
+
+
+def measure_pipeline(program):
+    rf, mem = RegisterFile(), Memory()
+    start = time.perf_counter()
+    # با debug=False ردیابی خاموش است و هزینه‌ای در زمان‌سنجی ندارد
+    state = run_pipeline(program, rf, mem, max_cycles=10 ** 9, debug=False)
+    elapsed = time.perf_counter() - start
+    return rf, state['cycle'], elapsed
+
+
+def measure_functional(program, engine=run_functional):
+    rf, mem = RegisterFile(), Memory()
+    start = time.perf_counter()
+    state = engine(program, rf, mem, max_instructions=10 ** 9)
+    elapsed = time.perf_counter() - start
+    return rf, state['instret'], elapsed
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    raw_lines, labels = parse_program_with_labels(counted_loop(iterations))
+    program = parse_final_program(raw_lines, labels)
+    instructions = 3 + 4 * iterations
+
+    rf_p, cycles, t_p = measure_pipeline(program)
+    rf_f, instret, t_f = measure_functional(program)
+    rf_t, instret_t, t_t = measure_functional(program, run_translated)
+
+    assert rf_p.registers == rf_f.registers == rf_t.registers, "final register state differs"
+    assert instret == instret_t == instructions
+
+    print(f"instructions: {instructions}")
+    print(f"pipeline  : {cycles} cycles, {t_p:.4f}s, {instructions / t_p:,.0f} instr/s")
+    print(f"functional: {instret} instrs, {t_f:.4f}s, {instructions / t_f:,.0f} instr/s")
+    print(f"translated: {instret_t} instrs, {t_t:.4f}s, {instructions / t_t:,.0f} instr/s")
+    print(f"speedup   : functional {t_p / t_f:.1f}x, translated {t_p / t_t:.1f}x")
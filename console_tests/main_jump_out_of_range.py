@@ -0,0 +1,55 @@
+# بررسی پرش به بیرون بخش کد: هر سه موتور باید همان‌جا متوقف شوند
+#
+# برنامه با text_base=0x10000 اجرا می‌شود و JALR به آدرس ra=0 (پایین‌تر از
+# text_base، یعنی شماره دستور منفی) یا به بعد از انتهای برنامه می‌پرد.
+#
+# استفاده:  python console_tests/main_jump_out_of_range.py
+
+import sys
+import os
+
+# مسیر پوشه پدر فایل فعلی
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cpu.registers import RegisterFile
+from cpu.memory import Memory
+from isa.decoder import predecode_program
+from isa.elf_loader import ElfProgram
+from pipeline.pipeline_runner import run_pipeline
+from pipeline.functional_runner import run_functional
+from pipeline.block_translator import run_translated
+
+TEXT_BASE = 0x10000
+
+CASES = {
+    "below text_base": 0,                 # ra=0 → شماره دستور -16384
+    "past the end": TEXT_BASE + 4 * 100,  # بعد از آخرین دستور
+}
+
+
+def run(engine, ra):
+    program = ElfProgram(predecode_program([
+        {"op": "ADDI", "rd": 10, "rs1": 0, "imm": 5},   # a0 = 5
+        {"op": "JALR", "rd": 0, "rs1": 1, "imm": 0},    # jalr x0, 0(ra)
+        {"op": "ADDI", "rd": 10, "rs1": 0, "imm": 7},   # نباید اجرا شود
+    ]), TEXT_BASE, 0)
+    rf = RegisterFile()
+    rf.write(1, ra)
+    if engine == "pipeline":
+        state = run_pipeline(program, rf, Memory(), max_cycles=1000, debug=False)
+    else:
+        run_engine = run_functional if engine == "functional" else run_translated
+        state = run_engine(program, rf, Memory(), max_instructions=1000)
+    return state["halted"], state["instret"], rf.read(10)
+
+
+if __name__ == "__main__":
+    failed = False
+    for name, ra in CASES.items():
+        for engine in ("pipeline", "functional", "translated"):
+            halted, instret, a0 = run(engine, ra)
+            ok = halted and instret == 2 and a0 == 5
+            failed = failed or not ok
+            print(f"{name:<16} {engine:<11} halted={halted} instret={instret} a0={a0}"
+                  f"  {'ok' if ok else 'FAIL'}")
+    sys.exit(1 if failed else 0)
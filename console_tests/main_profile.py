@@ -0,0 +1,40 @@
+# پروفایل برنامه مهمان روی pipeline: دستورها و حلقه‌های پرهزینه
+#
+# استفاده:  python console_tests/main_profile.py program.s|program.elf
+#                [--top N] [--max-cycles N] [--json PATH]
+
+import sys
+import os
+import json
+import argparse
+
+# مسیر پوشه پدر فایل فعلی
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cpu.registers import RegisterFile
+from cpu.memory import Memory
+from cpu.profiler import format_profile
+from pipeline.batch_runner import load_program
+from pipeline.pipeline_runner import PipelineSimulator
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank the hottest instructions and loops")
+    parser.add_argument("program", help=".s or .elf file")
+    parser.add_argument("--top", type=int, default=10, help="rows per table")
+    parser.add_argument("--max-cycles", type=int, default=10 ** 7)
+    parser.add_argument("--json", default=None, help="also write the report as JSON")
+    args = parser.parse_args()
+
+    rf, mem = RegisterFile(), Memory()
+    program, labels = load_program(args.program, mem, rf)
+    simulator = PipelineSimulator(program, rf, mem, debug=False)
+    simulator.run_until(max_cycles=args.max_cycles)
+
+    # پروفایل همیشه روشن است؛ فقط سیکل‌ها و تعداد اجرا از CPI stack جمع می‌شوند
+    report = simulator.profile.collect(simulator.cpi_stack).to_dict(program, labels, args.top)
+    print(f"{args.program}: {simulator.cycle} cycles, {simulator.instret} instructions"
+          f"{'' if simulator.halted else ' (not finished)'}")
+    print(format_profile(report))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,39 @@
+# اجرای فایل اجرایی ELF (RV64I، لینک ایستا) با موتور تابعی یا pipeline
+#
+# استفاده:  python console_tests/main_run_elf.py program.elf [functional|translated|pipeline]
+
+import sys
+import os
+
+# مسیر پوشه پدر فایل فعلی
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cpu.registers import RegisterFile
+from cpu.memory import Memory
+from isa.elf_loader import load_elf
+from pipeline.pipeline_runner import run_pipeline
+from pipeline.functional_runner import run_functional
+from pipeline.block_translator import run_translated
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: main_run_elf.py program.elf [functional|translated|pipeline]")
+        sys.exit(1)
+    engine = sys.argv[2] if len(sys.argv) > 2 else "translated"
+
+    rf = RegisterFile()
+    mem = Memory()
+    program, labels = load_elf(sys.argv[1], mem, rf)
+    print(f"Loaded {len(program)} instructions at 0x{program.text_base:X}, "
+          f"entry=0x{program.address_of(program.entry):X}, {len(labels)} symbols")
+
+    if engine == "pipeline":
+        state = run_pipeline(program, rf, mem, max_cycles=10 ** 9, debug=False)
+        print(f"cycles: {state['cycle']}")
+    else:
+        run = run_functional if engine == "functional" else run_translated
+        state = run(program, rf, mem, max_instructions=10 ** 9)
+        print(f"instructions: {state['instret']} in {state['elapsed']:.3f}s")
+
+    # قرارداد خروج: a7=93 و کد خروج در a0
+    print(f"halted: {state['halted']}, a0 = {rf.read(10)}")
@@ -1,20 +1,37 @@
 import sys
 import os
+import json
 
 # مسیر پوشه پدر فایل فعلی
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from cpu.registers import RegisterFile
 from cpu.memory import Memory
+from cpu.cpi_stack import format_cpi_table
 from pipeline.pipeline_runner import run_pipeline
 from isa.parser import load_assembly_file
 
+# گزارش CPI stack همه برنامه‌ها (نام فایل → to_dict)؛ با --json PATH در فایل نوشته می‌شود
+cpi_reports = {}
+
+
+def report_cpi(path, state, labels):
+    """چاپ جدول CPI stack برنامه و نواحی برچسب‌ها"""
+    report = state['cpi_stack'].to_dict(labels)
+    cpi_reports[path] = report
+    print(f"--- CPI stack: {path} ---")
+    print(format_cpi_table(report))
+
+
 if __name__ == "__main__":
-    
+    json_path = None
+    if "--json" in sys.argv:
+        json_path = sys.argv[sys.argv.index("--json") + 1]
+
     rf = RegisterFile()
     mem = Memory()
-    
-    # program 1 
+
+    # program 1
 
     rf.__init__()
     mem.__init__()
@@ -22,10 +39,11 @@ if __name__ == "__main__":
     program ,lables = load_assembly_file("examples/program.s")
 
     print("=== ALU/Immediate Test from .s file ===")
-    run_pipeline(program, rf, mem, debug=True)
+    state = run_pipeline(program, rf, mem, debug=True)
     rf.dump()
+    report_cpi("examples/program.s", state, lables)
 
-    # program 2 
+    # program 2
 
     rf.__init__()
     mem.__init__()
@@ -33,19 +51,21 @@ if __name__ == "__main__":
     program ,lables = load_assembly_file("examples/program2.s")
 
     print("=== ALU/Immediate Test from .s file ===")
-    run_pipeline(program, rf, mem, debug=True)
+    state = run_pipeline(program, rf, mem, debug=True)
     rf.dump()
+    report_cpi("examples/program2.s", state, lables)
+
+    # program 3
 
-    # program 3 
-    
     rf.__init__()
     mem.__init__()
 
     program ,lables = load_assembly_file("examples/program3.s")
 
     print("=== ALU/Immediate Test from .s file ===")
-    run_pipeline(program, rf, mem, debug=True)
+    state = run_pipeline(program, rf, mem, debug=True)
     rf.dump()
+    report_cpi("examples/program3.s", state, lables)
 
 
     # program 4
@@ -57,5 +77,14 @@ if __name__ == "__main__":
     program, lables = load_assembly_file("examples/program4.s")
 
     print("=== Load/Store Test from .s file ===")
-    run_pipeline(program, rf, mem, debug=True)
+    state = run_pipeline(program, rf, mem, debug=True)
     rf.dump()
+    report_cpi("examples/program4.s", state, lables)
+
+    # خروجی JSON همه گزارش‌ها
+    if json_path is not None:
+        with open(json_path, "w") as f:
+            json.dump(cpi_reports, f, indent=2)
+        print(f"CPI stacks written to {json_path}")
+    else:
+        print(json.dumps(cpi_reports, indent=2))
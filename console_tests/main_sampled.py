@@ -0,0 +1,43 @@
+# شبیه‌سازی نمونه‌برداری شده: پیشروی تابعی و پنجره‌های دقیق pipeline با تخمین CPI
+#
+# استفاده:  python console_tests/main_sampled.py program.s|program.elf
+#                [fast_forward] [warmup] [window]
+
+import sys
+import os
+
+# مسیر پوشه پدر فایل فعلی
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cpu.registers import RegisterFile
+from cpu.memory import Memory
+from cpu.cache import Cache
+from cpu.branch_predictor import make_predictor
+from pipeline.batch_runner import load_program
+from pipeline.sampling import run_sampled
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: main_sampled.py program.s|program.elf [fast_forward] [warmup] [window]")
+        sys.exit(1)
+    fast_forward = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    warmup = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+    window = int(sys.argv[4]) if len(sys.argv) > 4 else 1000
+
+    rf, mem = RegisterFile(), Memory()
+    program, labels = load_program(sys.argv[1], mem, rf)
+    result = run_sampled(program, rf, mem, fast_forward, warmup, window,
+                         icache=Cache(4096, 2, 32, name="L1I"),
+                         dcache=Cache(4096, 2, 32, name="L1D"),
+                         predictor=make_predictor("gshare"))
+
+    print(f"instructions: {result['instructions']} "
+          f"({result['detailed_instructions']} detailed, {result['windows']} windows)")
+    if result['cpi'] is None:
+        print("no complete detailed window; use a smaller fast_forward")
+    else:
+        low, high = result['ci']
+        print(f"CPI: {result['cpi']:.4f}  {result['confidence']:.0%} CI [{low:.4f}, {high:.4f}] "
+              f"(±{result['relative_error']:.2%})")
+        print(f"estimated cycles: {result['estimated_cycles']}")
+    print(f"elapsed: {result['elapsed']:.2f}s, halted: {result['halted']}")
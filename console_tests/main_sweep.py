@@ -0,0 +1,56 @@
+# جست‌وجوی فضای طراحی روی مجموعه‌ای از برنامه‌ها و نمایش جبهه Pareto
+#
+# استفاده:  python console_tests/main_sweep.py [examples/ | manifest.json]
+#                --out results/sweep.csv [--space space.json] [--workers N]
+#
+# space.json نام پارامتر → لیست مقادیر است، مثلاً:
+#   {"forwarding": [true, false], "predictor": ["none", "gshare"],
+#    "cache_size": [1024, 4096], "mem_latency": [10, 100]}
+# اجرای دوباره با همان --out فقط جفت‌های باقی‌مانده را اجرا می‌کند.
+
+import sys
+import os
+import json
+import argparse
+
+# مسیر پوشه پدر فایل فعلی
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pipeline.batch_runner import load_manifest
+from pipeline.sweep import (expand_grid, run_sweep, load_results, summarize,
+                            pareto_front, format_pareto)
+
+DEFAULT_SPACE = {
+    "forwarding": [True, False],
+    "predictor": ["none", "btfn", "bimodal", "gshare"],
+    "cache_size": [256, 1024, 4096],
+    "mem_latency": [10, 50],
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep microarchitecture parameters")
+    parser.add_argument("source", nargs="?", default="examples",
+                        help="directory of programs or a JSON/JSONL manifest")
+    parser.add_argument("--space", default=None, help="JSON file: parameter -> values")
+    # اجباری: فایل نتایج (قابل ادامه) نباید بی‌صدا در پوشه جاری ساخته شود
+    parser.add_argument("--out", required=True, help="results CSV (resumable)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes")
+    args = parser.parse_args()
+
+    space = DEFAULT_SPACE
+    if args.space is not None:
+        with open(args.space) as f:
+            space = json.load(f)
+    configs = expand_grid(space)
+    jobs = load_manifest(args.source)
+
+    def progress(done, total):
+        if done % 50 == 0 or done == total:
+            print(f"\r{done}/{total}", end="", file=sys.stderr, flush=True)
+
+    ran = run_sweep(configs, jobs, args.out, workers=args.workers, progress=progress)
+    print(f"\n{len(configs)} configs x {len(jobs)} programs, {ran} runs this time "
+          f"-> {args.out}", file=sys.stderr)
+
+    summary = summarize(load_results(args.out))
+    print(format_pareto(pareto_front(summary)))
@@ -1,9 +1,13 @@
 # ========== کلاس ALU با استفاده از توابع خارجی ==========
 
+from isa.decoder import Opcode
+
+
 class ALU:
-    def __init__(self, rf, memory=None):
+    def __init__(self, rf, memory=None, text_base=0):
         self.rf = rf
         self.memory = memory  # فقط اگر لازم باشه برای load/store
+        self.text_base = text_base  # آدرس بایتی دستور با PC=0 (برای JAL/JALR/AUIPC)
 
         self.operations = {
             'ADD': execute_add,       # دستور جمع
@@ -20,35 +24,27 @@ class ALU:
             'AUIPC': execute_auipc,   # افزودن مقدار به PC
         }
 
+        # جدول dispatch بر اساس Opcode: همه با امضای یکسان (rs1, rs2, imm, pc, base)
+        self.dispatch = [None] * len(Opcode)
+        for op, func in _UNIFORM_OPERATIONS.items():
+            self.dispatch[op] = func
+
+    def execute_op(self, op, rs1, rs2, imm, pc):
+        """اجرای دستور با کد عددی (بدون مقایسه رشته‌ای)"""
+        func = self.dispatch[op]
+        if func is None:
+            # اگر دستور پشتیبانی نشود، خطا می‌دهد
+            raise ValueError(f"Unsupported operation: {Opcode(op).name}")
+        return func(rs1, rs2, imm, pc, self.text_base)
+
     def execute(self, op, **kwargs):
         if op not in self.operations:
             # اگر دستور پشتیبانی نشود، خطا می‌دهد
             raise ValueError(f"Unsupported operation: {op}")
 
-        func = self.operations[op]
-
-        # بسته به دستور، پارامترهای لازم رو به تابع پاس میدیم
-        if op in ['ADD', 'SUB', 'AND', 'OR', 'XOR']:
-            # اعمال محاسباتی پایه با دو ثبات
-            return func(kwargs['rs1'], kwargs['rs2'])
-        elif op == 'ADDI':
-            return func(kwargs['rs1'], kwargs['imm'])  # جمع با مقدار ثابت
-        elif op in ['BEQ', 'BNE']:
-            # پرش شرطی
-            return func(kwargs['rs1'], kwargs['rs2'], kwargs['imm'], kwargs['pc'])
-        elif op == 'JAL':
-            return func(kwargs['pc'], kwargs['imm'])  # پرش و لینک
-        elif op == 'JALR':
-            # پرش غیر مستقیم
-            return func(kwargs['rs1'], kwargs['imm'], kwargs['pc'])
-        elif op == 'LUI':
-            return func(kwargs['imm'])  # بارگذاری immediate در بخش بالا
-        elif op == 'AUIPC':
-            return func(kwargs['pc'], kwargs['imm'])  # افزودن مقدار به PC
-        else:
-            raise ValueError(
-                # خطا برای عملیات‌های پیاده‌سازی نشده
-                f"Execute method not implemented for operation: {op}")
+        # نام دستور به Opcode تبدیل و از همان جدول dispatch استفاده می‌شود
+        return self.execute_op(Opcode[op], kwargs.get('rs1', 0), kwargs.get('rs2', 0),
+                               kwargs.get('imm'), kwargs.get('pc', 0))
 
 # ========== توابع اجرایی ALU ==========
 
@@ -117,25 +113,146 @@ def execute_bne(rs1, rs2, imm, pc):
         return result, next_pc, branch_taken
 
 
-def execute_jal(pc, imm):
-    result = pc + 4          # آدرس دستور بعدی (برای ذخیره در rd)
+def execute_jal(pc, imm, base=0):
+    # PC شماره دستور است؛ آدرس بایتی آن base + pc * 4 (مثل AUIPC)
+    result = base + (pc + 1) * 4  # آدرس دستور بعدی (برای ذخیره در rd)
     next_pc = pc + imm     # مقصد jump
     branch_taken = True       # JAL یک branch است
     return result, next_pc, branch_taken
 
 
-def execute_jalr(pc, rs1_val, imm):
-    result = pc + 4                 # آدرس دستور بعدی (برای ذخیره در rd)
-    next_pc = (rs1_val + imm) & ~1  # محاسبه مقصد پرش، بیت صفر باید صفر باشد
+def execute_jalr(pc, rs1_val, imm, base=0):
+    result = base + (pc + 1) * 4    # آدرس دستور بعدی (برای ذخیره در rd)
+    target = (rs1_val + imm) & ~1   # محاسبه مقصد پرش، بیت صفر باید صفر باشد
+    next_pc = (target - base) >> 2  # تبدیل آدرس بایتی به شماره دستور
     branch_taken = True
     return result, next_pc, branch_taken
 
 
 def execute_lui(imm):
-    result = imm << 12  # بارگذاری immediate در بیت‌های بالا
+    result = sext32(imm << 12)  # بارگذاری immediate در بیت‌های بالا (با گسترش علامت RV64)
     return result  # WBStage این مقدار را در rd می‌نویسد
 
 
-def execute_auipc(pc, imm):
-    val = (pc * 4) + (imm << 12)  # افزودن مقدار به PC (در واحد آدرس)
+def execute_auipc(pc, imm, base=0):
+    val = (base + pc * 4 + sext32(imm << 12)) & 0xFFFFFFFFFFFFFFFF  # افزودن مقدار به PC (در واحد آدرس)
     return val
+
+
+# ========== بقیه دستورات RV64I ==========
+
+MASK64 = 0xFFFFFFFFFFFFFFFF
+
+# PC خارج از برنامه: IF دیگر دستوری واکشی نمی‌کند و pipeline تخلیه می‌شود
+HALT_PC = 1 << 62
+
+
+def to_signed(value):
+    # تفسیر مقدار ۶۴ بیتی به صورت عدد علامت‌دار
+    return value - (1 << 64) if value >> 63 else value
+
+
+def sext32(value):
+    # گسترش علامت ۳۲ بیت پایین به ۶۴ بیت (نتیجه دستورات W)
+    return (((value & 0xFFFFFFFF) ^ 0x80000000) - 0x80000000) & MASK64
+
+
+def execute_sll(rs1, rs2):
+    return (rs1 << (rs2 & 63)) & MASK64
+
+
+def execute_srl(rs1, rs2):
+    return rs1 >> (rs2 & 63)
+
+
+def execute_sra(rs1, rs2):
+    return (to_signed(rs1) >> (rs2 & 63)) & MASK64
+
+
+def execute_slt(rs1, rs2):
+    return int(to_signed(rs1) < to_signed(rs2))
+
+
+def execute_sltu(rs1, rs2):
+    return int(rs1 < rs2)
+
+
+def execute_addw(rs1, rs2):
+    return sext32(rs1 + rs2)
+
+
+def execute_subw(rs1, rs2):
+    return sext32(rs1 - rs2)
+
+
+def execute_sllw(rs1, rs2):
+    return sext32(rs1 << (rs2 & 31))
+
+
+def execute_srlw(rs1, rs2):
+    return sext32((rs1 & 0xFFFFFFFF) >> (rs2 & 31))
+
+
+def execute_sraw(rs1, rs2):
+    return sext32(to_signed(sext32(rs1)) >> (rs2 & 31))
+
+
+def execute_branch(condition, pc, imm):
+    # شاخه‌های شرطی: (result, next_pc, branch_taken) مثل BEQ/BNE
+    next_pc = pc + imm if condition else pc + 1
+    return next_pc, next_pc, condition
+
+
+def execute_halt():
+    # ECALL/EBREAK: فراخوانی سیستمی شبیه‌سازی نمی‌شود و اجرا متوقف می‌شود
+    return 0, HALT_PC, True
+
+
+# تطبیق توابع بالا با امضای یکسان (rs1, rs2, imm, pc, base) برای dispatch عددی
+_UNIFORM_OPERATIONS = {
+    Opcode.ADD: lambda rs1, rs2, imm, pc, base: execute_add(rs1, rs2),
+    Opcode.SUB: lambda rs1, rs2, imm, pc, base: execute_sub(rs1, rs2),
+    Opcode.AND: lambda rs1, rs2, imm, pc, base: execute_and(rs1, rs2),
+    Opcode.OR: lambda rs1, rs2, imm, pc, base: execute_or(rs1, rs2),
+    Opcode.XOR: lambda rs1, rs2, imm, pc, base: execute_xor(rs1, rs2),
+    Opcode.ADDI: lambda rs1, rs2, imm, pc, base: execute_addi(rs1, imm),
+    Opcode.BEQ: lambda rs1, rs2, imm, pc, base: execute_beq(rs1, rs2, imm, pc),
+    Opcode.BNE: lambda rs1, rs2, imm, pc, base: execute_bne(rs1, rs2, imm, pc),
+    Opcode.JAL: lambda rs1, rs2, imm, pc, base: execute_jal(pc, imm, base),
+    Opcode.JALR: lambda rs1, rs2, imm, pc, base: execute_jalr(pc, rs1, imm, base),
+    Opcode.LUI: lambda rs1, rs2, imm, pc, base: execute_lui(imm),
+    Opcode.AUIPC: lambda rs1, rs2, imm, pc, base: execute_auipc(pc, imm, base),
+    # عملیات ثبات-ثبات
+    Opcode.SLL: lambda rs1, rs2, imm, pc, base: execute_sll(rs1, rs2),
+    Opcode.SLT: lambda rs1, rs2, imm, pc, base: execute_slt(rs1, rs2),
+    Opcode.SLTU: lambda rs1, rs2, imm, pc, base: execute_sltu(rs1, rs2),
+    Opcode.SRL: lambda rs1, rs2, imm, pc, base: execute_srl(rs1, rs2),
+    Opcode.SRA: lambda rs1, rs2, imm, pc, base: execute_sra(rs1, rs2),
+    Opcode.ADDW: lambda rs1, rs2, imm, pc, base: execute_addw(rs1, rs2),
+    Opcode.SUBW: lambda rs1, rs2, imm, pc, base: execute_subw(rs1, rs2),
+    Opcode.SLLW: lambda rs1, rs2, imm, pc, base: execute_sllw(rs1, rs2),
+    Opcode.SRLW: lambda rs1, rs2, imm, pc, base: execute_srlw(rs1, rs2),
+    Opcode.SRAW: lambda rs1, rs2, imm, pc, base: execute_sraw(rs1, rs2),
+    # عملیات با immediate (همان توابع با imm به جای rs2)
+    Opcode.SLTI: lambda rs1, rs2, imm, pc, base: execute_slt(rs1, imm & MASK64),
+    Opcode.SLTIU: lambda rs1, rs2, imm, pc, base: execute_sltu(rs1, imm & MASK64),
+    Opcode.XORI: lambda rs1, rs2, imm, pc, base: execute_xor(rs1, imm & MASK64),
+    Opcode.ORI: lambda rs1, rs2, imm, pc, base: execute_or(rs1, imm & MASK64),
+    Opcode.ANDI: lambda rs1, rs2, imm, pc, base: execute_and(rs1, imm & MASK64),
+    Opcode.SLLI: lambda rs1, rs2, imm, pc, base: execute_sll(rs1, imm),
+    Opcode.SRLI: lambda rs1, rs2, imm, pc, base: execute_srl(rs1, imm),
+    Opcode.SRAI: lambda rs1, rs2, imm, pc, base: execute_sra(rs1, imm),
+    Opcode.ADDIW: lambda rs1, rs2, imm, pc, base: execute_addw(rs1, imm),
+    Opcode.SLLIW: lambda rs1, rs2, imm, pc, base: execute_sllw(rs1, imm),
+    Opcode.SRLIW: lambda rs1, rs2, imm, pc, base: execute_srlw(rs1, imm),
+    Opcode.SRAIW: lambda rs1, rs2, imm, pc, base: execute_sraw(rs1, imm),
+    # شاخه‌های علامت‌دار و بدون علامت
+    Opcode.BLT: lambda rs1, rs2, imm, pc, base: execute_branch(to_signed(rs1) < to_signed(rs2), pc, imm),
+    Opcode.BGE: lambda rs1, rs2, imm, pc, base: execute_branch(to_signed(rs1) >= to_signed(rs2), pc, imm),
+    Opcode.BLTU: lambda rs1, rs2, imm, pc, base: execute_branch(rs1 < rs2, pc, imm),
+    Opcode.BGEU: lambda rs1, rs2, imm, pc, base: execute_branch(rs1 >= rs2, pc, imm),
+    # FENCE در این مدل ترتیبی کاری انجام نمی‌دهد
+    Opcode.FENCE: lambda rs1, rs2, imm, pc, base: 0,
+    Opcode.ECALL: lambda rs1, rs2, imm, pc, base: execute_halt(),
+    Opcode.EBREAK: lambda rs1, rs2, imm, pc, base: execute_halt(),
+}
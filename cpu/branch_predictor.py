@@ -0,0 +1,193 @@
+# cpu/branch_predictor.py
+# پیش‌بینی‌کننده‌های شاخه که در مرحله IF استفاده می‌شوند
+#
+# همه جدول‌ها آرایه‌ای (array) هستند و با PC (شماره دستور) اندیس‌گذاری می‌شوند.
+# پیش‌بینی در IF انجام می‌شود و به‌روزرسانی وقتی شاخه در EX حل می‌شود
+# (تاریخچه سراسری gshare هم غیرحدسی و در زمان حل شاخه به‌روز می‌شود).
+from array import array
+
+from isa.decoder import Opcode
+
+
+class BTB:
+    """بافر مقصد شاخه (Branch Target Buffer) با نگاشت مستقیم"""
+
+    def __init__(self, entries=512):
+        if entries <= 0 or entries & (entries - 1):
+            raise ValueError(f"BTB entries must be a power of two, got {entries}")
+        self.mask = entries - 1
+        self.tags = array('q', [-1]) * entries
+        self.targets = array('q', [0]) * entries
+
+    def lookup(self, pc):
+        """مقصد ذخیره شده برای pc یا None"""
+        index = pc & self.mask
+        if self.tags[index] == pc:
+            return self.targets[index]
+        return None
+
+    def insert(self, pc, target):
+        index = pc & self.mask
+        self.tags[index] = pc
+        self.targets[index] = target
+
+
+class BranchPredictor:
+    """
+    پیش‌بینی‌کننده پایه: همیشه not-taken (همان رفتار pipeline بدون پیش‌بینی)
+
+    زیرکلاس‌ها فقط predict_taken و train را بازنویسی می‌کنند. مقصد
+    پیش‌بینی از BTB (اگر داده شده باشد) یا از آفست دستور از پیش دیکد شده
+    گرفته می‌شود؛ مقصد JALR فقط با BTB قابل پیش‌بینی است.
+    """
+    name = "not_taken"
+
+    def __init__(self, btb=None):
+        self.btb = btb
+        self.lookups = 0       # شاخه‌ها/پرش‌های حل شده
+        self.correct = 0
+        self.mispredicts = 0
+
+    def predict(self, pc, instr):
+        """PC بعدی پیش‌بینی شده برای دستور کنترلی یا None (یعنی pc + 1)"""
+        if not self.predict_taken(pc, instr):
+            return None
+        if self.btb is not None:
+            return self.btb.lookup(pc)
+        if instr.is_branch or instr.op == Opcode.JAL:
+            return pc + instr.imm
+        return None
+
+    def predict_taken(self, pc, instr):
+        return False
+
+    def update(self, pc, instr, taken, target, correct):
+        """به‌روزرسانی بعد از حل شاخه در EX"""
+        self.lookups += 1
+        if correct:
+            self.correct += 1
+        else:
+            self.mispredicts += 1
+        if taken and self.btb is not None:
+            self.btb.insert(pc, target)
+        self.train(pc, instr, taken)
+
+    def train(self, pc, instr, taken):
+        pass
+
+    def stats(self):
+        return {
+            'predictor': self.name,
+            'branches': self.lookups,
+            'correct': self.correct,
+            'mispredicts': self.mispredicts,
+            'accuracy': self.correct / self.lookups if self.lookups else 0.0,
+        }
+
+
+class BTFNPredictor(BranchPredictor):
+    """شاخه‌های رو به عقب taken، رو به جلو not-taken؛ پرش‌ها همیشه taken"""
+    name = "btfn"
+
+    def predict_taken(self, pc, instr):
+        if instr.is_branch:
+            return instr.imm < 0
+        return True
+
+
+class BimodalPredictor(BranchPredictor):
+    """شمارنده‌های اشباع‌شونده ۲ بیتی که با PC اندیس می‌شوند"""
+    name = "bimodal"
+
+    def __init__(self, entries=1024, btb=None):
+        super().__init__(btb)
+        if entries <= 0 or entries & (entries - 1):
+            raise ValueError(f"Predictor entries must be a power of two, got {entries}")
+        self.mask = entries - 1
+        self.counters = array('B', [1]) * entries  # ۱ = weakly not-taken
+
+    def index(self, pc):
+        return pc & self.mask
+
+    def predict_taken(self, pc, instr):
+        if instr.is_branch:
+            return self.counters[self.index(pc)] >= 2
+        return True
+
+    def train(self, pc, instr, taken):
+        if not instr.is_branch:
+            return
+        i = self.index(pc)
+        counter = self.counters[i]
+        if taken:
+            if counter < 3:
+                self.counters[i] = counter + 1
+        elif counter > 0:
+            self.counters[i] = counter - 1
+
+
+class GSharePredictor(BimodalPredictor):
+    """شمارنده‌های ۲ بیتی که با PC XOR تاریخچه سراسری اندیس می‌شوند"""
+    name = "gshare"
+
+    def __init__(self, entries=4096, history_bits=12, btb=None):
+        super().__init__(entries, btb)
+        self.history = 0
+        self.history_mask = (1 << history_bits) - 1
+
+    def index(self, pc):
+        return (pc ^ self.history) & self.mask
+
+    def train(self, pc, instr, taken):
+        if not instr.is_branch:
+            return
+        super().train(pc, instr, taken)
+        self.history = ((self.history << 1) | taken) & self.history_mask
+
+
+class BTBPredictor(BranchPredictor):
+    """فقط BTB: هر دستور کنترلی که در BTB باشد به مقصد آخرش پیش‌بینی می‌شود"""
+    name = "btb"
+
+    def __init__(self, entries=512):
+        super().__init__(BTB(entries))
+
+    def predict_taken(self, pc, instr):
+        return True  # اگر BTB مقصدی نداشته باشد predict مقدار None برمی‌گرداند
+
+    def update(self, pc, instr, taken, target, correct):
+        super().update(pc, instr, taken, target, correct)
+        if not taken:
+            # شاخه not-taken از BTB حذف می‌شود تا دفعه بعد not-taken پیش‌بینی شود
+            index = pc & self.btb.mask
+            if self.btb.tags[index] == pc:
+                self.btb.tags[index] = -1
+
+
+PREDICTORS = {
+    "not_taken": BranchPredictor,
+    "btfn": BTFNPredictor,
+    "bimodal": BimodalPredictor,
+    "gshare": GSharePredictor,
+    "btb": BTBPredictor,
+}
+
+
+def make_predictor(name, btb_entries=0, **kwargs):
+    """
+    ساخت پیش‌بینی‌کننده با نام
+
+    Args:
+        name: "not_taken"، "btfn"، "bimodal"، "gshare" یا "btb"
+        btb_entries: اگر بزرگ‌تر از صفر باشد، مقصدها از یک BTB با این اندازه خوانده می‌شوند
+        kwargs: پارامترهای سازنده (entries، history_bits)
+    """
+    try:
+        cls = PREDICTORS[name]
+    except KeyError:
+        raise ValueError(f"Unknown branch predictor: {name}") from None
+    if cls is BTBPredictor:
+        return cls(**kwargs)
+    if btb_entries:
+        kwargs['btb'] = BTB(btb_entries)
+    return cls(**kwargs)
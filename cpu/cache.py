@@ -0,0 +1,188 @@
+# cpu/cache.py
+# مدل زمانی کش L1 مجموعه‌ای-انجمنی (set-associative) برای دستورات و داده
+#
+# کش فقط زمان‌بندی را مدل می‌کند: داده‌ها همیشه از cpu.memory.Memory خوانده و
+# در آن نوشته می‌شوند و کش فقط برچسب‌ها، بیت dirty و ترتیب جایگزینی را نگه
+# می‌دارد. همه این‌ها در آرایه‌های تخت (array/bytearray) به اندازه
+# sets * assoc ذخیره می‌شوند تا هر دسترسی فقط چند عمل روی عدد صحیح باشد.
+import random
+from array import array
+
+LRU, PLRU, RANDOM = "lru", "plru", "random"
+WRITE_BACK, WRITE_THROUGH = "wb", "wt"
+
+
+def _log2(value, what):
+    if value <= 0 or value & (value - 1):
+        raise ValueError(f"{what} must be a power of two, got {value}")
+    return value.bit_length() - 1
+
+
+class Cache:
+    """
+    کش مجموعه‌ای-انجمنی با سیاست جایگزینی LRU/PLRU/random و نوشتن WB/WT
+
+    access() تعداد سیکل‌های توقف ناشی از دسترسی را برمی‌گرداند (۰ برای hit).
+    در حالت write-back نوشتن‌ها خط را dirty می‌کنند و بیرون انداختن خط dirty
+    یک جریمه اضافه دارد؛ در حالت write-through نوشتن‌ها از بافر نوشتن عبور
+    می‌کنند (بدون توقف) و در miss خط جدید تخصیص داده نمی‌شود.
+    """
+
+    def __init__(self, size=4096, assoc=2, line_size=32, policy=LRU,
+                 write_policy=WRITE_BACK, miss_penalty=10, name="cache", seed=0):
+        """
+        Args:
+            size: اندازه کل کش بر حسب بایت
+            assoc: تعداد راه‌ها (way) در هر مجموعه
+            line_size: اندازه هر خط بر حسب بایت
+            policy: سیاست جایگزینی: "lru"، "plru" یا "random"
+            write_policy: "wb" (write-back) یا "wt" (write-through)
+            miss_penalty: سیکل‌های توقف برای هر miss (و هر write-back)
+            name: نام برای گزارش‌ها
+            seed: seed مولد تصادفی سیاست random (برای تکرارپذیری)
+        """
+        if policy not in (LRU, PLRU, RANDOM):
+            raise ValueError(f"Unknown replacement policy: {policy}")
+        if write_policy not in (WRITE_BACK, WRITE_THROUGH):
+            raise ValueError(f"Unknown write policy: {write_policy}")
+        if size % (assoc * line_size):
+            raise ValueError("Cache size must be a multiple of assoc * line_size")
+        self.size = size
+        self.assoc = assoc
+        self.line_size = line_size
+        self.policy = policy
+        self.write_policy = write_policy
+        self.miss_penalty = miss_penalty
+        self.name = name
+
+        self.sets = size // (assoc * line_size)
+        self.offset_bits = _log2(line_size, "line_size")
+        self.index_bits = _log2(self.sets, "number of sets")
+        if policy == PLRU:
+            self.tree_levels = _log2(assoc, "PLRU associativity")
+        self.set_mask = self.sets - 1
+
+        lines = self.sets * assoc
+        self.tags = array('q', [-1]) * lines       # برچسب هر خط (-1 یعنی نامعتبر)
+        self.ages = array('Q', [0]) * lines        # زمان آخرین استفاده (LRU)
+        self.tree = array('Q', [0]) * self.sets    # بیت‌های درخت PLRU هر مجموعه
+        self.dirty = bytearray(lines)
+        self.rng = random.Random(seed)
+        self.tick = 0
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.reads = 0
+        self.writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.writebacks = 0
+
+    def flush(self):
+        """نامعتبر کردن همه خطوط (بدون تغییر شمارنده‌ها)"""
+        for i in range(len(self.tags)):
+            self.tags[i] = -1
+            self.ages[i] = 0
+            self.dirty[i] = 0
+        for i in range(self.sets):
+            self.tree[i] = 0
+
+    def access(self, address, write=False):
+        """
+        ثبت یک دسترسی به آدرس
+
+        Returns:
+            int: تعداد سیکل‌های توقف (۰ در hit)
+        """
+        line = address >> self.offset_bits
+        index = line & self.set_mask
+        tag = line >> self.index_bits
+        base = index * self.assoc
+        end = base + self.assoc
+        if write:
+            self.writes += 1
+        else:
+            self.reads += 1
+
+        try:
+            way = self.tags.index(tag, base, end)
+        except ValueError:
+            way = -1
+
+        if way >= 0:
+            self.hits += 1
+            self._touch(index, way)
+            if write and self.write_policy == WRITE_BACK:
+                self.dirty[way] = 1
+            return 0
+
+        self.misses += 1
+        if write and self.write_policy == WRITE_THROUGH:
+            return 0  # no-write-allocate: نوشتن از بافر نوشتن عبور می‌کند
+
+        penalty = self.miss_penalty
+        way = self._victim(index, base, end)
+        if self.tags[way] != -1:
+            self.evictions += 1
+            if self.dirty[way]:
+                self.writebacks += 1
+                penalty += self.miss_penalty
+        self.tags[way] = tag
+        self.dirty[way] = 1 if write else 0
+        self._touch(index, way)
+        return penalty
+
+    def _touch(self, index, way):
+        """به‌روزرسانی اطلاعات جایگزینی بعد از استفاده از خط"""
+        if self.policy == LRU:
+            self.tick += 1
+            self.ages[way] = self.tick
+        elif self.policy == PLRU:
+            # بیت‌های گره‌های مسیر ریشه تا برگ طوری تنظیم می‌شوند که از این راه دور شوند
+            w = way - index * self.assoc
+            bits = self.tree[index]
+            node = 1
+            for level in range(self.tree_levels - 1, -1, -1):
+                direction = (w >> level) & 1
+                if direction:
+                    bits &= ~(1 << node)
+                else:
+                    bits |= 1 << node
+                node = node * 2 + direction
+            self.tree[index] = bits
+
+    def _victim(self, index, base, end):
+        """انتخاب خط برای جایگزینی (اول خطوط نامعتبر)"""
+        try:
+            return self.tags.index(-1, base, end)
+        except ValueError:
+            pass
+        if self.policy == LRU:
+            return min(range(base, end), key=self.ages.__getitem__)
+        if self.policy == PLRU:
+            bits = self.tree[index]
+            node = 1
+            for _ in range(self.tree_levels):
+                node = node * 2 + ((bits >> node) & 1)
+            return base + node - self.assoc
+        return base + self.rng.randrange(self.assoc)
+
+    def stats(self):
+        """شمارنده‌های کش به صورت دیکشنری"""
+        accesses = self.reads + self.writes
+        return {
+            'name': self.name,
+            'accesses': accesses,
+            'reads': self.reads,
+            'writes': self.writes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'writebacks': self.writebacks,
+            'hit_rate': self.hits / accesses if accesses else 0.0,
+        }
+
+    def __repr__(self):
+        return (f"<Cache {self.name} {self.size}B {self.assoc}-way {self.line_size}B-line "
+                f"{self.policy}/{self.write_policy}>")
@@ -1,41 +1,49 @@
 # cpu/control_unit.py
 from typing import Dict, Tuple, Optional
 
-try:
-    from isa.decoder import decode as decode_instr
-except Exception:
-    decode_instr = None  # اگر دیکودر موجود نبود، فقط روی ID_EX/EX_MEM/MEM_WB حساب می‌کنیم
+from cpu.trace import Tracer, CTRL, INFO, DEBUG, EV_FORWARD, EV_HAZARD, EV_BRANCH_FLUSH
+
 
 def _wb_value(mem_wb: Dict) -> Optional[int]:
     if not mem_wb:
         return None
-    op = mem_wb.get("op")
-    if op == "LOAD":
+    if mem_wb["instr"].is_load:
         return mem_wb.get("mem_data")  # مقدار بارگذاری شده از حافظه
     return mem_wb.get("alu_result")   # نتیجه ALU
 
 class ControlUnit:
     """
     واحد کنترل با لاگ مفصل و چک‌های امن برای جلوگیری از خطاهای اجرای دستور
+
+    با forwarding=False هیچ مسیر forwarding فعال نمی‌شود و hazard_detection_unit
+    هر دستوری را که از rd یکی از دو دستور جلوتر (در EX یا MEM) می‌خواند تا
+    نوشته شدن آن در WB نگه می‌دارد (حباب‌ها مثل load-use شمرده می‌شوند).
     """
 
+    def __init__(self, tracer: Optional[Tracer] = None, forwarding: bool = True):
+        # ردیاب رویدادها؛ وقتی خاموش است هیچ چاپ یا رشته‌ای ساخته نمی‌شود
+        self.tracer = tracer if tracer is not None else Tracer()
+        self.forwarding = forwarding  # آیا مسیرهای forwarding وجود دارند؟
+
     def forwarding_unit(self, id_ex: Dict, ex_mem: Dict, mem_wb: Dict) -> Tuple[int, int]:
         fwdA, fwdB = 0, 0
-        if not id_ex:
+        instr = id_ex.get("instr") if id_ex else None
+        if instr is None or not self.forwarding:
           #  print("Forwarding: ID/EX خالی، forwarding=0")
             return fwdA, fwdB  # اگر اطلاعات ID/EX موجود نباشد، forwarding انجام نمی‌شود
 
-        rs1, rs2 = id_ex.get("rs1"), id_ex.get("rs2")
-        use_rs2 = id_ex.get("imm") is None  # اگر immediate نباشد، rs2 استفاده می‌شود
+        rs1 = id_ex["rs1"] if instr.reads_rs1 else None
+        rs2 = id_ex["rs2"] if instr.reads_rs2 else None
+        use_rs2 = instr.reads_rs2  # پرچم از پیش محاسبه شده در دیکد
 
-        # مشخصات رجیستر مقصد در EX/MEM
+        # مشخصات رجیستر مقصد در EX/MEM (فقط برای دستوراتی که rd می‌نویسند مقدار دارد)
         exmem_rd = ex_mem.get("rd") if ex_mem else None
         # بررسی اینکه آیا EX/MEM باید داده را بنویسد (غیر از STORE و branch ها)
-        exmem_we = bool(ex_mem and exmem_rd not in (None, 0) and ex_mem.get("op") not in ("STORE", "BEQ", "BNE", "JAL", "JALR"))
+        exmem_we = exmem_rd is not None
         # مشخصات رجیستر مقصد در MEM/WB
         memwb_rd = mem_wb.get("rd") if mem_wb else None
         # بررسی اینکه آیا MEM/WB باید داده را بنویسد
-        memwb_we = bool(mem_wb and memwb_rd not in (None, 0) and mem_wb.get("op") not in ("STORE", "BEQ", "BNE", "JAL", "JALR"))
+        memwb_we = memwb_rd is not None
         # آیا مقدار برای نوشتن آماده است؟
         memwb_val_ready = _wb_value(mem_wb) is not None
 
@@ -52,40 +60,61 @@ class ControlUnit:
             elif memwb_we and rs2 == memwb_rd and memwb_val_ready:
                 fwdB = 2  # استفاده از داده MEM/WB
 
-        print(f"Forwarding: rs1={rs1}, rs2={rs2}, fwdA={fwdA}, fwdB={fwdB}")
+        if self.tracer.levels[CTRL] >= DEBUG:
+            self.tracer.emit(CTRL, EV_FORWARD, rs1, rs2, fwdA, fwdB)
         return fwdA, fwdB
 
     def hazard_detection_unit(self, if_id: Dict, id_ex: Dict, ex_mem: Dict) -> Tuple[bool, bool, bool]:
         stall_if = stall_id = bubble_ex = False
+        if not self.forwarding:
+            return self._raw_hazard(if_id, id_ex, ex_mem)
         # اگر دستور EXLOAD موجود نباشد یا رجیستر مقصد نامعتبر باشد، استال لازم نیست
-        if not id_ex or id_ex.get("op") != "LOAD" or id_ex.get("rd") in (None, 0):
+        instr = id_ex.get("instr") if id_ex else None
+        if instr is None or not instr.is_load or id_ex.get("rd") is None:
           #  print("Hazard: هیچ LOAD در EX یا rd=0، stall=False")
             return stall_if, stall_id, bubble_ex
 
         ex_rd = id_ex.get("rd")
         rs1_if = rs2_if = None
 
-        # اگر اطلاعات دستور IF/ID موجود باشد و دیکودر قابل دسترس باشد، rs1 و rs2 را استخراج کن
-        if if_id and "instr" in if_id and decode_instr:
-            try:
-                decoded = decode_instr(if_id["instr"])
-                rs1_if = decoded.get("rs1")
-                rs2_if = decoded.get("rs2")
-            except Exception:
-                print("Hazard: decode_instr خطا داد، fallback rs1/rs2=None")
+        # rs1 و rs2 دستور IF/ID مستقیماً از فرم از پیش دیکد شده خوانده می‌شوند
+        if if_id and "instr" in if_id:
+            fetched = if_id["instr"]
+            rs1_if = fetched.rs1 if fetched.reads_rs1 else None
+            rs2_if = fetched.rs2 if fetched.reads_rs2 else None
 
         # بررسی وجود hazard (تداخل داده) واقعی با رجیستر LOAD در EX
         if (rs1_if == ex_rd) or (rs2_if == ex_rd):
             stall_if = stall_id = bubble_ex = True  # نیاز به استال و حباب در EX
 
-        print(f"Hazard: EX_LOAD rd={ex_rd}, IF_ID rs1={rs1_if}, rs2={rs2_if}, stall_if={stall_if}")
+        if self.tracer.levels[CTRL] >= DEBUG:
+            self.tracer.emit(CTRL, EV_HAZARD, ex_rd, rs1_if, rs2_if, stall_if)
         return stall_if, stall_id, bubble_ex
 
+    def _raw_hazard(self, if_id: Dict, id_ex: Dict, ex_mem: Dict) -> Tuple[bool, bool, bool]:
+        # بدون forwarding: دستور ID منتظر هر نوشتن معوق در EX و MEM می‌ماند
+        # (WB قبل از خواندن رجیسترها در همان سیکل انجام می‌شود)
+        fetched = if_id.get("instr") if if_id else None
+        if fetched is None:
+            return False, False, False
+        rs1_if = fetched.rs1 if fetched.reads_rs1 else None
+        rs2_if = fetched.rs2 if fetched.reads_rs2 else None
+        hazard = False
+        for stage in (id_ex, ex_mem):
+            rd = stage.get("rd") if stage else None
+            if rd and (rd == rs1_if or rd == rs2_if):
+                hazard = True
+                break
+
+        if self.tracer.levels[CTRL] >= DEBUG:
+            self.tracer.emit(CTRL, EV_HAZARD, rd if hazard else None, rs1_if, rs2_if, hazard)
+        return hazard, hazard, hazard
+
     def branch_flush_unit(self, branch_taken: bool) -> Tuple[bool, bool]:
         # اگر شاخه گرفته شود، باید pipeline را flush کنیم
         flush_if_id = flush_id_ex = branch_taken
-        if branch_taken:
-            print("Branch Flush: branch_taken=True → flush IF/ID و ID/EX")
+        if branch_taken and self.tracer.levels[CTRL] >= INFO:
+            self.tracer.emit(CTRL, EV_BRANCH_FLUSH)
         return flush_if_id, flush_id_ex
 
     def compute_signals(self, IF_ID: Dict, ID_EX: Dict, EX_MEM: Dict, MEM_WB: Dict, branch_taken: bool=False) -> Dict:
@@ -0,0 +1,143 @@
+# cpu/cpi_stack.py
+# تقسیم همه سیکل‌های اجرای pipeline بین دسته‌های CPI (CPI stack)
+#
+# هر سیکل دقیقاً به یک دسته و یک دستور (PC) نسبت داده می‌شود:
+#   - سیکلی که دستوری در WB بازنشسته می‌شود: commit همان دستور
+#   - سیکلی که WB خالی است: علت حباب (bubble) موجود در WB؛ علت هر حباب هنگام
+#     ساخته شدن آن (load-use، flush شاخه، پر/خالی شدن pipeline) ثبت می‌شود و
+#     همراه حباب در pipeline جلو می‌رود
+#   - سیکل‌هایی که کل pipeline به خاطر miss کش ثابت است: memory stall
+# شمارنده‌ها در یک array('Q') تخت با اندیس pc * CATEGORIES + دسته نگهداری
+# می‌شوند؛ ردیف آخر (pc = len(program)) مال سیکل‌های پر و خالی شدن pipeline است
+# که به هیچ دستوری تعلق ندارند.
+import bisect
+from array import array
+
+# ---------------- دسته‌ها ----------------
+COMMIT, LOAD_USE, BRANCH_FLUSH, FILL_DRAIN, MEM_STALL = range(5)
+CATEGORIES = 5
+CATEGORY_NAMES = ('commit', 'load_use', 'branch_flush', 'fill_drain', 'mem_stall')
+
+# نام ناحیه سیکل‌هایی که به هیچ دستوری تعلق ندارند
+PIPELINE_REGION = "<pipeline>"
+# نام ناحیه دستورات قبل از اولین برچسب
+ENTRY_REGION = "<entry>"
+
+
+class CPIStack:
+    """
+    شمارنده سیکل‌ها به تفکیک دسته و PC برای یک برنامه
+
+    PipelineSimulator اندیس‌ها را مستقیماً با slot() می‌سازد و در cycles
+    جمع می‌کند؛ bubbles اندیس علت حباب‌های ID/EX، EX/MEM و MEM/WB است.
+    """
+
+    def __init__(self, program_size):
+        self.program_size = program_size
+        self.none_pc = program_size  # ردیف سیکل‌های بدون دستور
+        self.cycles = array('Q', [0]) * ((program_size + 1) * CATEGORIES)
+        fill = self.slot(FILL_DRAIN)
+        self.bubbles = [fill, fill, fill]  # pipeline خالی شروع می‌شود
+        self.stall_slot = self.slot(MEM_STALL)  # صاحب سیکل‌های توقف کش جاری
+
+    def slot(self, category, pc=None):
+        """اندیس شمارنده دسته برای pc (None یا خارج از برنامه یعنی ردیف pipeline)"""
+        if pc is None or not 0 <= pc < self.program_size:
+            pc = self.none_pc
+        return pc * CATEGORIES + category
+
+    def reset(self):
+        for i in range(len(self.cycles)):
+            self.cycles[i] = 0
+        fill = self.slot(FILL_DRAIN)
+        self.bubbles = [fill, fill, fill]
+        self.stall_slot = self.slot(MEM_STALL)
+
+    def total(self):
+        """مجموع سیکل‌ها (برابر simulator.cycle)"""
+        return sum(self.cycles)
+
+    def _row(self, pcs):
+        row = [0] * CATEGORIES
+        cycles = self.cycles
+        for pc in pcs:
+            base = pc * CATEGORIES
+            for category in range(CATEGORIES):
+                row[category] += cycles[base + category]
+        return row
+
+    def _stack(self, row):
+        commits = row[COMMIT]
+        cycles = sum(row)
+        return {
+            'cycles': cycles,
+            'instructions': commits,
+            'cpi': cycles / commits if commits else 0.0,
+            'breakdown': dict(zip(CATEGORY_NAMES, row)),
+            'stack': {name: value / commits if commits else 0.0
+                      for name, value in zip(CATEGORY_NAMES, row)},
+        }
+
+    def program_stack(self):
+        """CPI stack کل برنامه"""
+        return self._stack(self._row(range(self.program_size + 1)))
+
+    def region_stacks(self, labels):
+        """
+        CPI stack هر ناحیه کد: از هر برچسب تا برچسب بعدی
+
+        Args:
+            labels: نام برچسب → شماره دستور (خروجی parser یا load_elf)
+
+        Returns:
+            dict: نام ناحیه → CPI stack (فقط نواحی که سیکلی داشته‌اند)
+        """
+        starts = sorted((pc, name) for name, pc in labels.items()
+                        if 0 <= pc < self.program_size)
+        bounds = [pc for pc, _ in starts]
+        names = [name for _, name in starts]
+        rows = {}
+        for pc in range(self.program_size):
+            index = bisect.bisect_right(bounds, pc) - 1
+            name = names[index] if index >= 0 else ENTRY_REGION
+            rows.setdefault(name, []).append(pc)
+        rows[PIPELINE_REGION] = [self.none_pc]
+
+        stacks = {}
+        for name, pcs in rows.items():
+            row = self._row(pcs)
+            if any(row):
+                stacks[name] = self._stack(row)
+        return stacks
+
+    def to_dict(self, labels=None):
+        """خروجی قابل تبدیل به JSON: CPI stack برنامه و (اگر برچسب داده شود) نواحی"""
+        result = {'program': self.program_stack()}
+        if labels is not None:
+            result['regions'] = self.region_stacks(labels)
+        return result
+
+
+def format_cpi_table(report):
+    """
+    جدول متنی از خروجی CPIStack.to_dict
+
+    هر سطر یک ناحیه است و ستون‌ها سهم هر دسته از CPI (برای ناحیه‌ای که
+    دستوری در آن بازنشسته نشده، تعداد سیکل هر دسته).
+    """
+    rows = [('program', report['program'])] + list(report.get('regions', {}).items())
+    width = max(12, max(len(name) for name, _ in rows) + 2)
+    header = f"{'region':<{width}}{'cycles':>8}{'instrs':>8}{'CPI':>7}"
+    header += ''.join(f"{name:>14}" for name in CATEGORY_NAMES)
+    lines = [header, '-' * len(header)]
+    for name, stack in rows:
+        line = f"{name:<{width}}{stack['cycles']:>8}{stack['instructions']:>8}"
+        if stack['instructions']:
+            line += f"{stack['cpi']:>7.2f}"
+            line += ''.join(f"{stack['stack'][category]:>14.3f}" for category in CATEGORY_NAMES)
+        else:
+            # ناحیه بدون دستور بازنشسته (مثل <pipeline>): تعداد سیکل هر دسته
+            line += f"{'-':>7}"
+            line += ''.join(f"{stack['breakdown'][category]:>14}" for category in CATEGORY_NAMES)
+        lines.append(line)
+    return '\n'.join(lines)
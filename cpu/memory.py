@@ -1,20 +1,292 @@
+import bisect
+import hashlib
+import mmap
+import os
+
+PAGE_BITS = 12
+PAGE_SIZE = 1 << PAGE_BITS        # اندازه هر صفحه: ۴ کیلوبایت
+PAGE_MASK = PAGE_SIZE - 1
+ADDRESS_MASK = 0xFFFFFFFFFFFFFFFF  # فضای آدرس ۶۴ بیتی
+
+
+class MappedRegion:
+    """
+    ناحیه‌ای از فضای آدرس که مستقیماً از یک mmap (فایل یا بی‌نام) خوانده می‌شود
+
+    داده‌ها به اشیای پایتونی کپی نمی‌شوند؛ هر صفحه فقط یک memoryview روی
+    همان نگاشت است که در اولین دسترسی ساخته می‌شود.
+    """
+
+    def __init__(self, base, buffer, name, readonly=True, owned=False, cow=False):
+        """
+        Args:
+            base: آدرس شروع در فضای آدرس مهمان (هم‌تراز با صفحه)
+            buffer: شیء mmap یا هر buffer دیگر
+            name: نام برای نمایش (مسیر فایل یا "anonymous")
+            readonly: آیا نوشتن در ناحیه ممنوع است
+            owned: آیا buffer توسط Memory ساخته شده و باید بسته شود
+            cow: نوشتن‌ها خصوصی هستند و به فایل پشتیبان نمی‌رسند (فقط برای نمایش)
+        """
+        self.base = base
+        self.buffer = buffer
+        self.view = memoryview(buffer)
+        if readonly:
+            self.view = self.view.toreadonly()
+        self.size = len(self.view)
+        self.name = name
+        self.readonly = readonly
+        self.owned = owned
+        self.mode = "ro" if readonly else ("cow" if cow else "rw")
+
+    @property
+    def end(self):
+        """آدرس بعد از آخرین بایت ناحیه"""
+        return self.base + self.size
+
+    def page(self, number):
+        """نمای صفحه شماره number از این ناحیه (بدون کپی، به جز صفحه ناقص آخر)"""
+        offset = (number << PAGE_BITS) - self.base
+        if offset + PAGE_SIZE <= self.size:
+            return self.view[offset:offset + PAGE_SIZE]
+        # صفحه آخر ناقص: بقیه صفحه با صفر پر می‌شود
+        data = bytes(self.view[offset:self.size]).ljust(PAGE_SIZE, b'\0')
+        return data if self.readonly else bytearray(data)
+
+    def close(self):
+        self.view.release()
+        if self.owned:
+            self.buffer.close()
+
+    def __repr__(self):
+        return (f"<MappedRegion 0x{self.base:X}-0x{self.end:X} {self.name} "
+                f"({self.mode}, {self.size} bytes)>")
+
+
 class Memory:
+    """
+    حافظه بایت‌آدرس‌پذیر و تنک (sparse) به صورت صفحه‌بندی شده
+
+    هر صفحه یک bytearray چهار کیلوبایتی است که در اولین نوشتن ساخته می‌شود؛
+    خواندن از صفحه‌ای که هنوز ساخته نشده صفر برمی‌گرداند. داده‌ها
+    little-endian ذخیره می‌شوند (مثل RISC-V).
+    """
+
     def __init__(self):
-        # حافظه به صورت دیکشنری: کلید = آدرس، مقدار = داده ۶۴ بیتی
-        self.memory = {}
+        # حافظه به صورت دیکشنری صفحه‌ها: کلید = شماره صفحه، مقدار = bytearray
+        # (یا memoryview روی ناحیه نگاشت شده)
+        self.pages = {}
+        # نواحی نگاشت شده مرتب بر اساس آدرس شروع
+        self.regions = []
+        self._region_bases = []
 
-    def load(self, address):
-        """خواندن مقدار ۶۴ بیتی از حافظه با آدرس هم‌تراز (alignment)"""
+    # ---------------- نواحی نگاشت شده (mmap) ----------------
 
-        return self.memory.get(address, 0)  # اگر آدرس موجود نبود، مقدار ۰ بازگردانده می‌شود
+    def map_region(self, base, buffer, name="buffer", readonly=True, owned=False, cow=False):
+        """
+        نگاشت یک buffer (مثلاً mmap) در آدرس base از فضای آدرس مهمان
 
-    def store(self, address, value):
-        """نوشتن مقدار ۶۴ بیتی در حافظه با آدرس هم‌تراز"""
+        Returns:
+            MappedRegion: ناحیه ساخته شده
+        """
+        if base & PAGE_MASK:
+            raise ValueError(f"Mapped region base 0x{base:X} is not page aligned")
+        region = MappedRegion(base, buffer, name, readonly, owned, cow)
+        if region.size == 0:
+            raise ValueError(f"Cannot map an empty region at 0x{base:X}")
+        first = base >> PAGE_BITS
+        last = (region.end - 1) >> PAGE_BITS
+        for other in self.regions:
+            if base < other.end and other.base < region.end:
+                raise ValueError(f"Region {name} overlaps {other!r}")
+        if any(first <= number <= last for number in self.pages):
+            raise ValueError(f"Region {name} overlaps memory that is already written")
+        index = bisect.bisect(self._region_bases, base)
+        self.regions.insert(index, region)
+        self._region_bases.insert(index, base)
+        return region
 
-        self.memory[address] = value #& 0xFFFFFFFFFFFFFFFF
+    def map_file(self, base, path, offset=0, size=None, writable=False):
+        """
+        نگاشت فایل میزبان در آدرس base (فقط خواندنی یا copy-on-write)
 
-    def dump(self):
-        """نمایش محتوای کامل حافظه مرتب بر اساس آدرس"""
-        for address in sorted(self.memory.keys()):
-            print(f"0x{address:016X} : {self.memory[address]}")
+        Args:
+            base: آدرس شروع در حافظه مهمان (هم‌تراز با ۴ کیلوبایت)
+            path: مسیر فایل
+            offset: شروع داخل فایل (مضرب mmap.ALLOCATIONGRANULARITY)
+            size: تعداد بایت‌ها (None یعنی تا انتهای فایل)
+            writable: اگر True باشد نوشتن‌ها خصوصی هستند و به فایل نمی‌رسند
+        """
+        with open(path, 'rb') as f:
+            if size is None:
+                size = os.fstat(f.fileno()).st_size - offset
+            if size <= 0:
+                raise ValueError(f"Nothing to map from {path} at offset {offset}")
+            access = mmap.ACCESS_COPY if writable else mmap.ACCESS_READ
+            buffer = mmap.mmap(f.fileno(), size, access=access, offset=offset)
+        return self.map_region(base, buffer, os.path.basename(path),
+                               readonly=not writable, owned=True, cow=writable)
+
+    def map_anonymous(self, base, size):
+        """نگاشت یک mmap بی‌نام (صفر شده) به اندازه size در آدرس base"""
+        size = (size + PAGE_MASK) & ~PAGE_MASK
+        return self.map_region(base, mmap.mmap(-1, size), "anonymous",
+                               readonly=False, owned=True)
+
+    def unmap(self, base):
+        """حذف ناحیه‌ای که از آدرس base شروع می‌شود"""
+        index = bisect.bisect_left(self._region_bases, base)
+        if index == len(self.regions) or self._region_bases[index] != base:
+            raise ValueError(f"No mapped region at 0x{base:X}")
+        region = self.regions.pop(index)
+        del self._region_bases[index]
+        first = region.base >> PAGE_BITS
+        last = (region.end - 1) >> PAGE_BITS
+        for number in [n for n in self.pages if first <= n <= last]:
+            del self.pages[number]
+        region.close()
 
+    def region_at(self, address):
+        """ناحیه نگاشت شده شامل آدرس (یا None)"""
+        index = bisect.bisect(self._region_bases, address) - 1
+        if index >= 0:
+            region = self.regions[index]
+            # صفحه آخر ناقص هم متعلق به ناحیه است
+            if address < ((region.end + PAGE_MASK) & ~PAGE_MASK):
+                return region
+        return None
+
+    def _fault(self, number):
+        """صفحه‌ای که هنوز در pages نیست: نصب نمای ناحیه نگاشت شده یا None"""
+        region = self.region_at(number << PAGE_BITS)
+        if region is None:
+            return None
+        page = self.pages[number] = region.page(number)
+        return page
+
+    def _page(self, number):
+        """گرفتن صفحه با شماره داده شده (ساخت صفحه صفر در اولین دسترسی)"""
+        page = self.pages.get(number)
+        if page is None:
+            if self.regions:
+                page = self._fault(number)
+            if page is None:
+                page = self.pages[number] = bytearray(PAGE_SIZE)
+        return page
+
+    def _read_only(self, address):
+        return ValueError(f"Store to read-only mapped memory at 0x{address:X}")
+
+    def read_bytes(self, address, size):
+        """خواندن size بایت از آدرس (ممکن است از مرز صفحه عبور کند)"""
+        address &= ADDRESS_MASK
+        out = bytearray()
+        while size > 0:
+            offset = address & PAGE_MASK
+            chunk = min(size, PAGE_SIZE - offset)
+            page = self.pages.get(address >> PAGE_BITS)
+            if page is None and self.regions:
+                page = self._fault(address >> PAGE_BITS)
+            if page is None:
+                out += bytes(chunk)
+            else:
+                out += page[offset:offset + chunk]
+            address = (address + chunk) & ADDRESS_MASK
+            size -= chunk
+        return bytes(out)
+
+    def write_bytes(self, address, data):
+        """نوشتن بایت‌های data از آدرس (ممکن است از مرز صفحه عبور کند)"""
+        address &= ADDRESS_MASK
+        data = memoryview(data)
+        while data:
+            offset = address & PAGE_MASK
+            chunk = min(len(data), PAGE_SIZE - offset)
+            try:
+                self._page(address >> PAGE_BITS)[offset:offset + chunk] = data[:chunk]
+            except TypeError:
+                raise self._read_only(address) from None
+            address = (address + chunk) & ADDRESS_MASK
+            data = data[chunk:]
+
+    def load(self, address, size=8, signed=False):
+        """
+        خواندن مقدار size بایتی (۱، ۲، ۴ یا ۸) از حافظه
+
+        Args:
+            address: آدرس بایت اول
+            size: تعداد بایت‌ها
+            signed: گسترش علامت (sign extension) به جای گسترش صفر
+
+        Returns:
+            int: مقدار خوانده شده (منفی فقط وقتی signed باشد)
+        """
+        address &= ADDRESS_MASK
+        offset = address & PAGE_MASK
+        if offset + size <= PAGE_SIZE:
+            page = self.pages.get(address >> PAGE_BITS)
+            if page is None:
+                if self.regions:
+                    page = self._fault(address >> PAGE_BITS)
+                if page is None:
+                    return 0  # صفحه‌ای که هنوز نوشته نشده صفر است
+            return int.from_bytes(page[offset:offset + size], 'little', signed=signed)
+        # دسترسی که از مرز صفحه عبور می‌کند
+        return int.from_bytes(self.read_bytes(address, size), 'little', signed=signed)
+
+    def store(self, address, value, size=8):
+        """نوشتن size بایت پایینی value (۱، ۲، ۴ یا ۸ بایت) در حافظه"""
+        address &= ADDRESS_MASK
+        data = (value & ((1 << (size * 8)) - 1)).to_bytes(size, 'little')
+        offset = address & PAGE_MASK
+        if offset + size <= PAGE_SIZE:
+            try:
+                self._page(address >> PAGE_BITS)[offset:offset + size] = data
+            except TypeError:
+                # صفحه فقط خواندنی از ناحیه نگاشت شده
+                raise self._read_only(address) from None
+        else:
+            self.write_bytes(address, data)
+
+    def words(self):
+        """
+        آدرس و مقدار کلمه‌های ۶۴ بیتی غیر صفر (هم‌تراز با ۸) به ترتیب آدرس
+
+        صفحه‌های نواحی نگاشت شده شمرده نمی‌شوند (آن‌ها را regions نشان می‌دهد).
+        """
+        for number in sorted(self.pages):
+            page = self.pages[number]
+            base = number << PAGE_BITS
+            if self.regions and self.region_at(base) is not None:
+                continue
+            if not any(page):
+                continue
+            for offset in range(0, PAGE_SIZE, 8):
+                value = int.from_bytes(page[offset:offset + 8], 'little')
+                if value:
+                    yield base + offset, value
+
+    def digest(self):
+        """
+        خلاصه (hash) محتوای حافظه برای مقایسه سریع دو اجرا
+
+        فقط صفحه‌های غیر صفر شمرده می‌شوند، پس صفحه‌ای که فقط صفر در آن
+        نوشته شده با صفحه ساخته نشده یکسان است؛ نواحی نگاشت شده مثل words()
+        شمرده نمی‌شوند.
+        """
+        h = hashlib.blake2b(digest_size=16)
+        for number in sorted(self.pages):
+            if self.regions and self.region_at(number << PAGE_BITS) is not None:
+                continue
+            page = self.pages[number]
+            if any(page):
+                h.update(number.to_bytes(8, 'little'))
+                h.update(page)
+        return h.hexdigest()
+
+    def dump(self):
+        """نمایش نواحی نگاشت شده و کلمه‌های غیر صفر حافظه مرتب بر اساس آدرس"""
+        for region in self.regions:
+            print(f"0x{region.base:016X} - 0x{region.end:016X} : "
+                  f"[{region.name}, {region.mode}, {region.size} bytes]")
+        for address, value in self.words():
+            print(f"0x{address:016X} : {value}")
@@ -0,0 +1,93 @@
+# cpu/perf_counters.py
+# شمارنده‌های کارایی سخت‌افزاری pipeline و شیء آمار اجرا
+#
+# شمارنده‌ها در یک array('Q') با اندیس ثابت نگهداری می‌شوند تا به‌روزرسانی
+# در حلقه سیکل فقط یک `values[i] += 1` باشد؛ هر مقدار مشتق شده (CPI، تعداد
+# load/store، ...) فقط هنگام ساخت RunStats محاسبه می‌شود.
+from array import array
+
+from isa.decoder import Opcode, OPERAND_CLASS, OperandClass
+
+# ---------------- اندیس شمارنده‌ها ----------------
+(INSTRET,            # دستورات بازنشسته شده در WB
+ STALL_LOAD_USE,     # سیکل‌های توقف load-use (hazard_detection_unit)
+ STALL_ICACHE,       # سیکل‌های توقف به خاطر miss کش دستورات
+ STALL_DCACHE,       # سیکل‌های توقف به خاطر miss کش داده
+ BRANCH_FLUSHES,     # تعداد flush به خاطر شاخه/پرش (یا پیش‌بینی اشتباه)
+ FWD_EX_MEM,         # forwarding از EX/MEM
+ FWD_MEM_WB,         # forwarding از MEM/WB
+ ) = range(7)
+COUNTER_NAMES = ('instret', 'stall_load_use', 'stall_icache', 'stall_dcache',
+                 'branch_flushes', 'fwd_ex_mem', 'fwd_mem_wb')
+
+# ---------------- آدرس CSR های شمارنده (مثل RISC-V) ----------------
+CSR_CYCLE = 0xC00
+CSR_TIME = 0xC01
+CSR_INSTRET = 0xC02
+CSR_MCYCLE = 0xB00
+CSR_MINSTRET = 0xB02
+
+
+class PerfCounters:
+    """شمارنده‌های سخت‌افزاری یک شبیه‌ساز pipeline"""
+
+    def __init__(self):
+        self.values = array('Q', [0]) * len(COUNTER_NAMES)
+
+    def reset(self):
+        for i in range(len(self.values)):
+            self.values[i] = 0
+
+    def __getitem__(self, index):
+        return self.values[index]
+
+
+class RunStats:
+    """
+    آمار ساخت‌یافته یک اجرا (خروجی PipelineSimulator.stats)
+
+    همه فیلدها عدد یا دیکشنری ساده هستند؛ to_dict برای JSON استفاده می‌شود.
+    by_opcode (دستورات بازنشسته به تفکیک opcode) از شمارنده‌های COMMIT هر PC در
+    CPI stack ساخته می‌شود (PipelineSimulator.opcode_counts).
+    """
+
+    def __init__(self, cycle, counters, caches=(), predictor=None, by_opcode=None):
+        if by_opcode is None:
+            by_opcode = array('Q', [0]) * len(Opcode)
+        values = counters.values
+        self.cycle = cycle
+        self.instret = values[INSTRET]
+        self.cpi = cycle / self.instret if self.instret else 0.0
+        self.ipc = self.instret / cycle if cycle else 0.0
+        self.stalls = {
+            'load_use': values[STALL_LOAD_USE],
+            'icache': values[STALL_ICACHE],
+            'dcache': values[STALL_DCACHE],
+        }
+        self.branch_flushes = values[BRANCH_FLUSHES]
+        self.forwards = {
+            'ex_mem': values[FWD_EX_MEM],
+            'mem_wb': values[FWD_MEM_WB],
+        }
+        self.opcodes = {Opcode(op).name: count
+                        for op, count in enumerate(by_opcode) if count}
+
+        # شمارش دسته‌ها از شمارنده‌های opcode (بدون هزینه در حلقه سیکل)
+        kinds = {kind: 0 for kind in OperandClass}
+        for op, count in enumerate(by_opcode):
+            if count:
+                kinds[OPERAND_CLASS[Opcode(op)]] += count
+        self.loads = kinds[OperandClass.LOAD]
+        self.stores = kinds[OperandClass.STORE]
+        self.branches = kinds[OperandClass.BRANCH]
+        self.jumps = by_opcode[Opcode.JAL] + by_opcode[Opcode.JALR]
+
+        self.caches = {cache.name: cache.stats() for cache in caches if cache is not None}
+        self.predictor = predictor.stats() if predictor is not None else None
+
+    def to_dict(self):
+        return dict(vars(self))
+
+    def __repr__(self):
+        return (f"<RunStats cycles={self.cycle} instret={self.instret} CPI={self.cpi:.3f} "
+                f"stalls={self.stalls} flushes={self.branch_flushes}>")
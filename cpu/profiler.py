@@ -0,0 +1,170 @@
+# cpu/profiler.py
+# پروفایل برنامه مهمان به تفکیک PC: کدام دستورها و حلقه‌ها سیکل‌ها را می‌خورند
+#
+# چهار آرایه array('Q') با اندیس PC نگهداری می‌شوند:
+#   executions: تعداد بازنشسته شدن هر دستور
+#   cycles: سیکل‌های نسبت داده شده به دستور (commit، حباب‌ها و توقف کش آن)
+#   load_use: تعداد توقف‌های load-use که این load باعث شده
+#   flushes: تعداد flush هایی که این شاخه/پرش باعث شده
+# دو آرایه اول هنگام collect از CPIStack (که همیشه روشن است) ساخته می‌شوند و
+# دو آرایه آخر را PipelineSimulator فقط در سیکل‌های توقف/flush یک واحد زیاد
+# می‌کند، پس پروفایل در حلقه سیکل تقریباً هزینه‌ای ندارد و همیشه روشن است.
+from array import array
+from bisect import bisect_right
+
+from cpu.cpi_stack import CATEGORIES, COMMIT, ENTRY_REGION
+from isa.decoder import Opcode, predecode_program
+
+
+class SymbolIndex:
+    """نگاشت PC به نزدیک‌ترین برچسب قبلی (جست‌وجوی دودویی روی شروع برچسب‌ها)"""
+
+    def __init__(self, labels):
+        """
+        Args:
+            labels: نام برچسب → شماره دستور (خروجی parser یا load_elf)
+        """
+        starts = sorted((pc, name) for name, pc in labels.items() if pc >= 0)
+        self.starts = [pc for pc, _ in starts]
+        self.names = [name for _, name in starts]
+
+    def lookup(self, pc):
+        """
+        Returns:
+            tuple: (نام برچسب، فاصله pc از آن)؛ قبل از اولین برچسب ENTRY_REGION
+        """
+        index = bisect_right(self.starts, pc) - 1
+        if index < 0:
+            return ENTRY_REGION, pc
+        return self.names[index], pc - self.starts[index]
+
+    def format(self, pc):
+        name, offset = self.lookup(pc)
+        return f"{name}+{offset}" if offset else name
+
+
+class Profile:
+    """شمارنده‌های هر PC برای یک برنامه"""
+
+    def __init__(self, program_size):
+        self.program_size = program_size
+        self.executions = array('Q', [0]) * program_size
+        self.cycles = array('Q', [0]) * program_size
+        self.load_use = array('Q', [0]) * program_size
+        self.flushes = array('Q', [0]) * program_size
+        self.total_cycles = 0
+
+    def reset(self):
+        for counts in (self.executions, self.cycles, self.load_use, self.flushes):
+            for pc in range(self.program_size):
+                counts[pc] = 0
+        self.total_cycles = 0
+
+    def collect(self, cpi_stack):
+        """ساخت executions و cycles از شمارنده‌های CPIStack (قبل از گزارش)"""
+        values = cpi_stack.cycles
+        for pc in range(self.program_size):
+            base = pc * CATEGORIES
+            self.executions[pc] = values[base + COMMIT]
+            self.cycles[pc] = sum(values[base:base + CATEGORIES])
+        self.total_cycles = sum(values)
+        return self
+
+    def hot_spots(self, limit=10):
+        """PC های پرهزینه به ترتیب نزولی سیکل (فقط دستورهایی که سیکلی داشته‌اند)"""
+        cycles = self.cycles
+        ranked = sorted((pc for pc in range(self.program_size) if cycles[pc]),
+                        key=lambda pc: cycles[pc], reverse=True)
+        return ranked[:limit]
+
+    def hot_loops(self, program, limit=10):
+        """
+        حلقه‌های پرهزینه به ترتیب نزولی سیکل
+
+        هر شاخه یا JAL با مقصد عقب‌تر یک حلقه [مقصد، شاخه] می‌سازد؛ حلقه‌های
+        هم‌سر (چند شاخه برگشتی به یک مقصد) با بزرگ‌ترین انتها یکی می‌شوند.
+        حلقه‌های تو در تو جدا گزارش می‌شوند و سیکل هر حلقه شامل حلقه‌های
+        داخلی آن است.
+
+        Returns:
+            list: (شروع، انتها، تعداد تکرار، سیکل‌ها)
+        """
+        decoded = predecode_program(program)
+        ends = {}
+        for pc, instr in enumerate(decoded[:self.program_size]):
+            if (instr.is_branch or instr.op == Opcode.JAL) and instr.imm is not None \
+                    and instr.imm <= 0:
+                head = pc + instr.imm
+                if head >= 0:
+                    ends[head] = max(ends.get(head, pc), pc)
+        loops = []
+        for head, end in ends.items():
+            cycles = sum(self.cycles[head:end + 1])
+            if cycles:
+                loops.append((head, end, self.executions[head], cycles))
+        loops.sort(key=lambda loop: loop[3], reverse=True)
+        return loops[:limit]
+
+    def to_dict(self, program, labels=None, limit=10):
+        """
+        گزارش قابل تبدیل به JSON (پس از collect)
+
+        Args:
+            program: همان برنامه شبیه‌سازی شده (برای متن دستورها و حلقه‌ها)
+            labels: نام برچسب → شماره دستور (اختیاری)
+            limit: تعداد سطرهای هر جدول
+        """
+        symbols = SymbolIndex(labels or {})
+        decoded = predecode_program(program)
+        total = self.total_cycles
+        spots = []
+        for pc in self.hot_spots(limit):
+            executions = self.executions[pc]
+            spots.append({
+                'pc': pc,
+                'symbol': symbols.format(pc),
+                'instr': repr(decoded[pc]),
+                'executions': executions,
+                'cycles': self.cycles[pc],
+                'share': self.cycles[pc] / total if total else 0.0,
+                'cpi': self.cycles[pc] / executions if executions else 0.0,
+                'load_use': self.load_use[pc],
+                'flushes': self.flushes[pc],
+            })
+        loops = []
+        for head, end, iterations, cycles in self.hot_loops(program, limit):
+            loops.append({
+                'start': head,
+                'end': end,
+                'symbol': symbols.format(head),
+                'iterations': iterations,
+                'cycles': cycles,
+                'share': cycles / total if total else 0.0,
+                'cycles_per_iteration': cycles / iterations if iterations else 0.0,
+                'load_use': sum(self.load_use[head:end + 1]),
+                'flushes': sum(self.flushes[head:end + 1]),
+            })
+        return {'total_cycles': total, 'hot_spots': spots, 'hot_loops': loops}
+
+
+def format_profile(report):
+    """جدول متنی از خروجی Profile.to_dict"""
+    lines = [f"Total cycles: {report['total_cycles']}", "", "Hot spots:"]
+    header = (f"{'#':>3} {'pc':>5}  {'symbol':<16}{'execs':>9}{'cycles':>9}{'share':>8}"
+              f"{'CPI':>6}{'ld-use':>8}{'flush':>7}  instr")
+    lines += [header, '-' * len(header)]
+    for rank, spot in enumerate(report['hot_spots'], 1):
+        lines.append(f"{rank:>3} {spot['pc']:>5}  {spot['symbol']:<16}{spot['executions']:>9}"
+                     f"{spot['cycles']:>9}{spot['share']:>8.1%}{spot['cpi']:>6.2f}"
+                     f"{spot['load_use']:>8}{spot['flushes']:>7}  {spot['instr']}")
+    lines += ["", "Hot loops:"]
+    header = (f"{'#':>3} {'range':>11}  {'symbol':<16}{'iters':>9}{'cycles':>9}{'share':>8}"
+              f"{'cyc/it':>8}{'ld-use':>8}{'flush':>7}")
+    lines += [header, '-' * len(header)]
+    for rank, loop in enumerate(report['hot_loops'], 1):
+        span = f"{loop['start']}-{loop['end']}"
+        lines.append(f"{rank:>3} {span:>11}  {loop['symbol']:<16}{loop['iterations']:>9}"
+                     f"{loop['cycles']:>9}{loop['share']:>8.1%}"
+                     f"{loop['cycles_per_iteration']:>8.2f}{loop['load_use']:>8}"
+                     f"{loop['flushes']:>7}")
+    return '\n'.join(lines)
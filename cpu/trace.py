@@ -0,0 +1,135 @@
+# cpu/trace.py
+# سیستم ردیابی (tracing) ساخت‌یافته برای pipeline
+#
+# رویدادها به صورت تاپل فشرده (شماره، سیکل، دسته، کد، آرگومان‌ها) در یک
+# بافر حلقوی با اندازه ثابت ذخیره می‌شوند و فقط هنگام نیاز به متن تبدیل
+# می‌شوند. وقتی ردیابی خاموش است هر نقطه ردیابی فقط یک مقایسه عدد صحیح است.
+from collections import deque
+from itertools import islice
+
+# ---------------- دسته‌ها (category) ----------------
+IF, ID, EX, MEM, WB, CTRL, PIPE = range(7)
+CATEGORY_NAMES = ('IF', 'ID', 'EX', 'MEM', 'WB', 'CTRL', 'PIPE')
+
+# ---------------- سطح‌ها (level) ----------------
+OFF = 0     # خاموش
+INFO = 1    # رویدادهای اصلی (واکشی، اجرا، نوشتن، flush)
+DEBUG = 2   # جزئیات (سیگنال‌های کنترل، مراحل خالی)
+
+# ---------------- کد رویدادها ----------------
+(EV_CYCLE, EV_IF_FETCH, EV_IF_END, EV_ID_NONE, EV_ID_DECODE,
+ EV_EX_NONE, EV_EX_RESULT, EV_MEM_NONE, EV_MEM_LOAD, EV_MEM_STORE,
+ EV_MEM_PASS, EV_WB_NONE, EV_WB_WRITE, EV_WB_LOAD, EV_WB_NOWRITE,
+ EV_FORWARD, EV_HAZARD, EV_BRANCH_FLUSH, EV_SIGNALS, EV_FLUSH_IF_ID,
+ EV_FLUSH_ID_EX, EV_BRANCH_TAKEN, EV_DRAINED, EV_CACHE_MISS,
+ EV_MEM_STALL, EV_PREDICT, EV_MISPREDICT) = range(27)
+
+# قالب متنی هر رویداد (فقط هنگام نمایش استفاده می‌شود)
+_FORMATS = {
+    EV_CYCLE: "\n=== Cycle {0} ===",
+    EV_IF_FETCH: "IF: Fetched instruction {0} at PC={1}",
+    EV_IF_END: "IF: End of program",
+    EV_ID_NONE: "ID: No instruction",
+    EV_ID_DECODE: "ID: Decoded {0.name} | rs1={1}({2}), rs2={3}({4}), imm={0.imm}",
+    EV_EX_NONE: "EX: No instruction",
+    EV_EX_RESULT: "EX: op={0.name}, rs1_val={1}, rs2_val={2}, imm={0.imm} "
+                  "→ result={3}, branch_taken={4}, next_pc={5}",
+    EV_MEM_NONE: "MEM: No instruction",
+    EV_MEM_LOAD: "MEM: Loaded {0} from address {1}",
+    EV_MEM_STORE: "MEM: Stored {0} to address {1}",
+    EV_MEM_PASS: "MEM: No memory access for op={0.name}",
+    EV_WB_NONE: "WB: No instruction",
+    EV_WB_WRITE: "WB: Wrote {0} to x{1}",
+    EV_WB_LOAD: "WB: Loaded {0} to x{1}",
+    EV_WB_NOWRITE: "WB: No write for op={0.name}",
+    EV_FORWARD: "Forwarding: rs1={0}, rs2={1}, fwdA={2}, fwdB={3}",
+    EV_HAZARD: "Hazard: EX_LOAD rd={0}, IF_ID rs1={1}, rs2={2}, stall_if={3}",
+    EV_BRANCH_FLUSH: "Branch Flush: branch_taken=True → flush IF/ID و ID/EX",
+    EV_SIGNALS: "Control signals: forwardA={0}, forwardB={1}, stall_if={2}, stall_id={3}, "
+                "bubble_ex={4}, flush_if_id={5}, flush_id_ex={6}",
+    EV_FLUSH_IF_ID: "⚠️ Flush: Clearing IF/ID register (invalid instruction removed)",
+    EV_FLUSH_ID_EX: "⚠️ Flush: Inserting bubble (NOP) into ID/EX stage",
+    EV_BRANCH_TAKEN: "🚀 Branch taken! Flushing pipeline and jumping to PC={0}",
+    EV_DRAINED: "✅ Pipeline drained, stopping.",
+    EV_CACHE_MISS: "{0}: miss at address 0x{1:X} → stall {2} cycles",
+    EV_MEM_STALL: "⏳ Cache miss stall ({0} cycles left)",
+    EV_PREDICT: "IF: Predicted taken → next PC={0}",
+    EV_MISPREDICT: "❌ Mispredict at PC={0}: predicted {1}, actual {2} → flush",
+}
+
+
+def format_event(event):
+    """تبدیل یک رویداد فشرده به متن قابل خواندن"""
+    _, _, _, code, args = event
+    return _FORMATS[code].format(*args)
+
+
+class Tracer:
+    """
+    ردیاب رویدادهای pipeline با سطح جداگانه برای هر دسته
+
+    نقاط ردیابی در کد به شکل `if tracer.levels[EX] >= INFO:` نوشته می‌شوند
+    تا وقتی ردیابی خاموش است هیچ رشته‌ای ساخته نشود.
+    """
+
+    def __init__(self, level=OFF, capacity=4096, echo=False):
+        """
+        Args:
+            level: سطح اولیه برای همه دسته‌ها
+            capacity: حداکثر تعداد رویدادهای نگهداری شده در بافر حلقوی
+            echo: چاپ فوری هر رویداد (برای اجرای کنسولی در حالت دیباگ)
+        """
+        self.levels = [level] * len(CATEGORY_NAMES)
+        self.events = deque(maxlen=capacity)
+        self.echo = echo
+        self.seq = 0      # شماره آخرین رویداد ثبت شده (برای خواندن افزایشی)
+        self.cycle = 0    # سیکل جاری که روی رویدادها ثبت می‌شود
+
+    def set_level(self, level, categories=None):
+        """تنظیم سطح برای همه دسته‌ها یا فقط دسته‌های داده شده"""
+        if categories is None:
+            categories = range(len(CATEGORY_NAMES))
+        for category in categories:
+            self.levels[category] = level
+
+    @property
+    def enabled(self):
+        return any(self.levels)
+
+    def emit(self, category, code, *args):
+        """ثبت یک رویداد به صورت تاپل فشرده (بدون ساخت متن)"""
+        self.seq += 1
+        event = (self.seq, self.cycle, category, code, args)
+        self.events.append(event)
+        if self.echo:
+            print(format_event(event))
+
+    def clear(self):
+        self.events.clear()
+
+    def since(self, seq=0, categories=None, end=None):
+        """
+        رویدادهای جدیدتر از شماره seq (در صورت نیاز فقط از دسته‌های داده شده)
+
+        end آخرین شماره‌ای است که برگردانده می‌شود (None یعنی تا آخرین رویداد)؛
+        خواننده‌ای که همزمان با اجرای شبیه‌ساز در thread دیگری می‌خواند seq را
+        یک بار می‌خواند و همان را به عنوان end می‌دهد.
+        """
+        if end is None:
+            end = self.seq
+        if end <= seq:
+            return []
+        # شماره‌ها پیوسته‌اند؛ فقط رویدادهای آخر از انتهای بافر پیمایش می‌شوند.
+        # اگر بین خواندن seq و پیمایش رویداد تازه‌ای ثبت شود دوباره خوانده می‌شود
+        while True:
+            new = self.seq - seq
+            events = list(islice(reversed(self.events), new))
+            if len(events) < new or not events or events[-1][0] <= seq + 1:
+                break
+        events.reverse()
+        return [event for event in events if event[0] <= end and
+                (categories is None or event[2] in categories)]
+
+    def lines(self, seq=0, categories=None):
+        """متن رویدادهای موجود در بافر (تبدیل به متن فقط در این لحظه)"""
+        return [format_event(event) for event in self.since(seq, categories)]
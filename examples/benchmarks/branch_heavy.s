@@ -0,0 +1,35 @@
+# شاخه‌های وابسته به داده: دسته‌بندی 3000 عدد شبه‌تصادفی در چهار شمارنده
+ADDI x5, x0, 1         # seed
+LUI  x7, 16
+ADDI x7, x7, -1        # x7 = 0xFFFF
+LUI  x11, 1
+ADDI x11, x11, -1096   # x11 = 3000
+ADDI x12, x0, 0x200    # آستانه زوج‌های کوچک
+LUI  x13, 4            # 0x4000
+ADDI x20, x0, 0
+ADDI x21, x0, 0
+ADDI x22, x0, 0
+ADDI x23, x0, 0
+loop:
+SLLI x6, x5, 2
+ADD  x5, x5, x6
+ADDI x5, x5, 3
+AND  x5, x5, x7        # x = (5x + 3) mod 2^16
+ANDI x6, x5, 1
+BEQ  x6, x0, even
+BLT  x5, x13, small_odd
+ADDI x20, x20, 1
+JAL  x0, next
+small_odd:
+ADDI x21, x21, 1
+JAL  x0, next
+even:
+ANDI x6, x5, 0x3FF
+BLTU x6, x12, low_even
+ADDI x23, x23, 1
+JAL  x0, next
+low_even:
+ADDI x22, x22, 1
+next:
+ADDI x11, x11, -1
+BNE  x11, x0, loop
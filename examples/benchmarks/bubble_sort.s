@@ -0,0 +1,34 @@
+# مرتب‌سازی حبابی 80 عدد شبه‌تصادفی (LCG بدون ضرب: x = 5x + 1 mod 2^16)
+LUI  x10, 1            # آرایه در 0x1000
+ADDI x11, x0, 80       # n
+ADDI x5, x0, 7         # seed
+ADDI x12, x10, 0
+ADDI x13, x11, 0
+fill:
+SLLI x6, x5, 2
+ADD  x5, x5, x6
+ADDI x5, x5, 1
+LUI  x7, 16
+ADDI x7, x7, -1        # x7 = 0xFFFF
+AND  x5, x5, x7
+SD   x5, 0(x12)
+ADDI x12, x12, 8
+ADDI x13, x13, -1
+BNE  x13, x0, fill
+# for i = n-1 .. 1: for j = 0 .. i-1: if a[j] > a[j+1] swap
+ADDI x14, x11, -1      # i
+outer:
+ADDI x12, x10, 0       # &a[j]
+ADDI x15, x0, 0        # j
+inner:
+LD   x6, 0(x12)
+LD   x7, 8(x12)
+BGE  x7, x6, noswap
+SD   x7, 0(x12)
+SD   x6, 8(x12)
+noswap:
+ADDI x12, x12, 8
+ADDI x15, x15, 1
+BLT  x15, x14, inner
+ADDI x14, x14, -1
+BNE  x14, x0, outer
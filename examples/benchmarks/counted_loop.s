@@ -0,0 +1,11 @@
+# حلقه شمارشی: جمع 0..N-1 با یک store در هر تکرار (N = 6000)
+ADDI x1, x0, 0
+LUI  x2, 1
+ADDI x2, x2, 1904      # x2 = 4096 + 1904 = 6000
+ADDI x3, x0, 0
+LUI  x10, 1            # x10 = 0x1000
+loop:
+ADD   x3, x3, x1
+SD    x3, 0(x10)
+ADDI  x1, x1, 1
+BNE   x1, x2, loop
@@ -0,0 +1,37 @@
+# فیبوناچی بازگشتی fib(15) با پشته و JAL/JALR، سپس fib(90) تکراری
+LUI  x2, 8             # sp = 0x8000
+ADDI x10, x0, 15
+JAL  x1, fib
+ADDI x20, x10, 0       # x20 = fib(15) = 610
+# نسخه تکراری
+ADDI x5, x0, 0
+ADDI x6, x0, 1
+ADDI x7, x0, 90
+iter:
+ADD  x8, x5, x6
+ADDI x5, x6, 0
+ADDI x6, x8, 0
+ADDI x7, x7, -1
+BNE  x7, x0, iter
+ADDI x21, x5, 0        # x21 = fib(90)
+JAL  x0, done
+# fib(n): a0 = n → a0 = fib(n)
+fib:
+ADDI x5, x0, 2
+BLT  x10, x5, base
+ADDI x2, x2, -24
+SD   x1, 0(x2)
+SD   x10, 8(x2)
+ADDI x10, x10, -1
+JAL  x1, fib
+SD   x10, 16(x2)
+LD   x10, 8(x2)
+ADDI x10, x10, -2
+JAL  x1, fib
+LD   x5, 16(x2)
+ADD  x10, x10, x5
+LD   x1, 0(x2)
+ADDI x2, x2, 24
+base:
+JALR x0, 0(x1)
+done:
@@ -0,0 +1,35 @@
+# مرتب‌سازی درجی 120 عدد شبه‌تصادفی (LCG: x = 9x + 7 mod 2^16)
+LUI  x10, 1            # آرایه در 0x1000
+ADDI x11, x0, 120      # n
+ADDI x5, x0, 3         # seed
+LUI  x7, 16
+ADDI x7, x7, -1        # x7 = 0xFFFF
+ADDI x12, x10, 0
+ADDI x13, x11, 0
+fill:
+SLLI x6, x5, 3
+ADD  x5, x5, x6
+ADDI x5, x5, 7
+AND  x5, x5, x7
+SD   x5, 0(x12)
+ADDI x12, x12, 8
+ADDI x13, x13, -1
+BNE  x13, x0, fill
+# for i = 1 .. n-1: key = a[i]; j = i-1; while j >= 0 and a[j] > key: a[j+1] = a[j]
+ADDI x14, x0, 1        # i
+outer:
+SLLI x15, x14, 3
+ADD  x15, x15, x10     # &a[i]
+LD   x16, 0(x15)       # key
+ADDI x17, x15, -8      # &a[j]
+shift:
+BLT  x17, x10, place
+LD   x6, 0(x17)
+BGE  x16, x6, place
+SD   x6, 8(x17)
+ADDI x17, x17, -8
+JAL  x0, shift
+place:
+SD   x16, 8(x17)
+ADDI x14, x14, 1
+BNE  x14, x11, outer
@@ -0,0 +1,61 @@
+# ضرب ماتریس 8×8 (C = A × B) با ضرب به صورت حلقه جمع (RV64I ضرب ندارد)
+# A[i][k] = (i + k) & 7 ، B[k][j] = (k ^ j) & 7
+LUI  x10, 1            # A در 0x1000
+ADDI x11, x10, 512     # B در 0x1200
+ADDI x12, x11, 512     # C در 0x1400
+ADDI x9, x0, 8         # n
+# پر کردن A و B
+ADDI x13, x0, 0        # i
+init_i:
+ADDI x14, x0, 0        # j
+init_j:
+SLLI x15, x13, 3
+ADD  x15, x15, x14
+SLLI x15, x15, 3       # آفست (i*8 + j)*8
+ADD  x6, x13, x14
+ANDI x6, x6, 7
+ADD  x16, x10, x15
+SD   x6, 0(x16)
+XOR  x6, x13, x14
+ANDI x6, x6, 7
+ADD  x16, x11, x15
+SD   x6, 0(x16)
+ADDI x14, x14, 1
+BNE  x14, x9, init_j
+ADDI x13, x13, 1
+BNE  x13, x9, init_i
+# C[i][j] = sum_k A[i][k] * B[k][j]
+ADDI x13, x0, 0        # i
+loop_i:
+ADDI x14, x0, 0        # j
+loop_j:
+ADDI x20, x0, 0        # مجموع
+ADDI x15, x0, 0        # k
+loop_k:
+SLLI x16, x13, 3
+ADD  x16, x16, x15
+SLLI x16, x16, 3
+ADD  x16, x16, x10
+LD   x6, 0(x16)        # A[i][k]
+SLLI x17, x15, 3
+ADD  x17, x17, x14
+SLLI x17, x17, 3
+ADD  x17, x17, x11
+LD   x7, 0(x17)        # B[k][j]
+mul:
+BEQ  x7, x0, mul_done  # جمع A[i][k] به تعداد B[k][j] بار
+ADD  x20, x20, x6
+ADDI x7, x7, -1
+JAL  x0, mul
+mul_done:
+ADDI x15, x15, 1
+BNE  x15, x9, loop_k
+SLLI x16, x13, 3
+ADD  x16, x16, x14
+SLLI x16, x16, 3
+ADD  x16, x16, x12
+SD   x20, 0(x16)
+ADDI x14, x14, 1
+BNE  x14, x9, loop_j
+ADDI x13, x13, 1
+BNE  x13, x9, loop_i
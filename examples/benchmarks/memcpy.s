@@ -0,0 +1,27 @@
+# memset روی 1024 کلمه ۶۴ بیتی و سپس memcpy به آرایه دوم، چهار بار
+ADDI x20, x0, 4        # تعداد تکرار
+LUI  x21, 1            # src = 0x1000
+LUI  x22, 3            # dst = 0x3000
+ADDI x5, x0, 0x55      # الگوی memset
+pass:
+ADDI x10, x21, 0
+ADDI x11, x0, 1024
+memset:
+SD   x5, 0(x10)
+ADDI x10, x10, 8
+ADDI x11, x11, -1
+BNE  x11, x0, memset
+ADDI x10, x21, 0
+ADDI x12, x22, 0
+ADDI x11, x0, 1024
+memcpy:
+LD   x6, 0(x10)
+SD   x6, 0(x12)
+ADDI x10, x10, 8
+ADDI x12, x12, 8
+ADDI x11, x11, -1
+BNE  x11, x0, memcpy
+ADDI x5, x5, 1         # الگوی بعدی
+ADDI x20, x20, -1
+BNE  x20, x0, pass
+LD   x7, -8(x12)       # آخرین کلمه کپی شده
@@ -0,0 +1,33 @@
+# دنبال کردن لیست پیوندی 256 گره‌ای با ترتیب جهشی (next = (i*37 + 11) & 255)، 24 دور
+LUI  x10, 2            # گره‌ها در 0x2000، هر گره 16 بایت: [next, value]
+ADDI x11, x0, 256
+ADDI x13, x0, 0        # i
+build:
+SLLI x6, x13, 5
+ADD  x6, x6, x13       # i*33
+SLLI x7, x13, 2
+ADD  x6, x6, x7        # i*37
+ADDI x6, x6, 11
+ANDI x6, x6, 255
+SLLI x6, x6, 4
+ADD  x6, x6, x10       # آدرس گره بعدی
+SLLI x7, x13, 4
+ADD  x7, x7, x10       # آدرس گره i
+SD   x6, 0(x7)
+SD   x13, 8(x7)
+ADDI x13, x13, 1
+BNE  x13, x11, build
+# پیمایش: هر load به نتیجه load قبلی وابسته است
+ADDI x20, x0, 0        # مجموع value ها
+ADDI x21, x0, 24       # تعداد دور
+ADDI x5, x10, 0
+lap:
+ADDI x12, x0, 256
+chase:
+LD   x6, 8(x5)
+ADD  x20, x20, x6
+LD   x5, 0(x5)
+ADDI x12, x12, -1
+BNE  x12, x0, chase
+ADDI x21, x21, -1
+BNE  x21, x0, lap
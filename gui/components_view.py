@@ -1,118 +1,322 @@
 # gui/components_view.py
+#
+# نمای رجیسترها و حافظه با QAbstractTableModel: جدول فقط ردیف‌های قابل مشاهده
+# را از مدل می‌خواند و مدل مقدارها را در لحظه نمایش از RegisterFile/Memory
+# می‌گیرد. update فقط برای ردیف‌های تغییر کرده (مجموعه dirty) سیگنال
+# dataChanged می‌فرستد؛ ردیف‌های تغییر کرده در آخرین update رنگی می‌شوند.
 
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QTableWidget, QTableWidgetItem, QLabel
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont
+from bisect import bisect_left
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableView, QLabel,
+                             QLineEdit, QHeaderView, QAbstractItemView)
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtGui import QFont, QColor, QBrush
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))  # اضافه کردن مسیر والد برای دسترسی به ماژول‌های cpu
 from cpu.registers import RegisterFile  # وارد کردن کلاس RegisterFile برای مدیریت رجیسترها
-from cpu.memory import Memory  # وارد کردن کلاس Memory برای مدیریت حافظه
+from cpu.memory import Memory, PAGE_BITS, PAGE_SIZE  # وارد کردن کلاس Memory برای مدیریت حافظه
+
+ROW_HEIGHT = 12                      # ارتفاع ثابت ردیف‌ها (لازم برای مجازی‌سازی سریع)
+WORD_SIZE = 8
+WORDS_PER_PAGE = PAGE_SIZE // WORD_SIZE
+CHANGED_BRUSH = QBrush(QColor("#FFF3B0"))   # رنگ ردیف‌هایی که در آخرین گام تغییر کرده‌اند
+
+
+def _ranges(rows):
+    """تبدیل مجموعه ردیف‌ها به بازه‌های پیوسته (first, last) برای dataChanged"""
+    ranges = []
+    for row in sorted(rows):
+        if ranges and row == ranges[-1][1] + 1:
+            ranges[-1][1] = row
+        else:
+            ranges.append([row, row])
+    return ranges
+
+
+def _make_table(model):
+    """QTableView فشرده با ارتفاع ردیف ثابت و بدون ویرایش"""
+    table = QTableView()
+    table.setModel(model)
+    table.setFont(QFont("Arial", 6))  # فونت کوچک برای فشردگی
+    table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+    table.setSelectionBehavior(QAbstractItemView.SelectRows)
+    header = table.verticalHeader()
+    header.setVisible(False)
+    header.setSectionResizeMode(QHeaderView.Fixed)
+    header.setDefaultSectionSize(ROW_HEIGHT)
+    return table
+
+
+class RegisterTableModel(QAbstractTableModel):
+    """مدل ۳۲ رجیستر: نام، مقدار هگز و دسیمال"""
+    HEADERS = ("Reg", "Hex", "Decimal")
+
+    def __init__(self, register_file: RegisterFile, parent=None):
+        super().__init__(parent)
+        self.register_file = register_file
+        self._shown = list(register_file.registers)  # مقادیر آخرین update
+        self._changed = set()                         # رجیسترهای تغییر کرده در آخرین update
+
+    def set_register_file(self, register_file):
+        self.beginResetModel()
+        self.register_file = register_file
+        self._shown = list(register_file.registers)
+        self._changed = set()
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 32
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        row, column = index.row(), index.column()
+        if role == Qt.BackgroundRole:
+            return CHANGED_BRUSH if row in self._changed else None
+        if role != Qt.DisplayRole:
+            return None
+        if column == 0:
+            return f"x{row}"
+        value = self.register_file.registers[row]
+        return hex(value) if column == 1 else str(value)
+
+    def refresh(self, dirty=None):
+        """
+        اعلام تغییر رجیسترها به جدول
+
+        Args:
+            dirty: مجموعه شماره رجیسترهای تغییر کرده؛ None یعنی مقایسه با
+                   مقادیر آخرین update
+        """
+        values = self.register_file.registers
+        if dirty is None:
+            dirty = {i for i, (value, shown) in enumerate(zip(values, self._shown))
+                     if value != shown}
+        # ردیف‌های قبلی هم دوباره رسم شوند تا رنگشان برداشته شود
+        rows = dirty | self._changed
+        self._changed = set(dirty)
+        self._shown = list(values)
+        for first, last in _ranges(rows):
+            self.dataChanged.emit(self.index(first, 0), self.index(last, len(self.HEADERS) - 1))
+
+
+class MemoryTableModel(QAbstractTableModel):
+    """
+    مدل حافظه تنک: ابتدا یک ردیف خلاصه برای هر ناحیه نگاشت شده و سپس
+    WORDS_PER_PAGE ردیف (کلمه‌های ۶۴ بیتی) برای هر صفحه ساخته شده
+
+    تعداد ردیف‌ها فقط به تعداد صفحه‌ها بستگی دارد نه به بزرگی آدرس‌ها، پس
+    آدرس‌های چند گیگابایتی هزینه اضافه ندارند. مقدار هر ردیف در لحظه نمایش
+    از صفحه خوانده می‌شود.
+    """
+    HEADERS = ("Address (Hex)", "Value (Hex)")
+
+    def __init__(self, memory: Memory, parent=None):
+        super().__init__(parent)
+        self.memory = memory
+        self._scan()
+
+    def set_memory(self, memory):
+        self.beginResetModel()
+        self.memory = memory
+        self._scan()
+        self.endResetModel()
+
+    def _scan(self):
+        """فهرست مرتب صفحه‌ها (بدون صفحه‌های نواحی نگاشت شده)"""
+        memory = self.memory
+        self._regions = list(memory.regions)
+        self._page_keys = set(memory.pages)
+        self._numbers = sorted(number for number in self._page_keys
+                               if not (memory.regions and
+                                       memory.region_at(number << PAGE_BITS) is not None))
+        self._shown = {}      # شماره صفحه → کپی محتوای صفحه در آخرین update (فقط صفحه‌های دیده شده)
+        self._changed = set()  # ردیف‌های تغییر کرده در آخرین update
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._regions) + len(self._numbers) * WORDS_PER_PAGE
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        row, column = index.row(), index.column()
+        if role == Qt.BackgroundRole:
+            return CHANGED_BRUSH if row in self._changed else None
+        if role != Qt.DisplayRole:
+            return None
+        if row < len(self._regions):
+            # نواحی نگاشت شده (mmap) فقط با یک ردیف خلاصه نمایش داده می‌شوند
+            region = self._regions[row]
+            if column == 0:
+                return f"{hex(region.base)}-{hex(region.end)}"
+            return f"[{region.name} {region.mode} {region.size}B]"
+        number, offset = divmod(row - len(self._regions), WORDS_PER_PAGE)
+        number = self._numbers[number]
+        offset *= WORD_SIZE
+        if column == 0:
+            return hex((number << PAGE_BITS) + offset)
+        page = self.memory.pages.get(number)
+        if page is None:
+            return "0x0"
+        return hex(int.from_bytes(page[offset:offset + WORD_SIZE], 'little'))
+
+    def row_of(self, address):
+        """ردیف کلمه شامل address یا اولین صفحه موجود بعد از آن (None اگر نباشد)"""
+        number = address >> PAGE_BITS
+        index = bisect_left(self._numbers, number)
+        if index == len(self._numbers):
+            return None
+        offset = (address & (PAGE_SIZE - 1)) // WORD_SIZE if self._numbers[index] == number else 0
+        return len(self._regions) + index * WORDS_PER_PAGE + offset
+
+    def refresh(self, first_row=0, last_row=None, dirty_pages=None):
+        """
+        اعلام تغییر حافظه به جدول
+
+        اگر صفحه یا ناحیه‌ای اضافه/حذف شده باشد مدل از نو ساخته می‌شود (فقط
+        فهرست شماره صفحه‌ها). در غیر این صورت فقط صفحه‌های ردیف‌های first_row
+        تا last_row (قسمت قابل مشاهده) با کپی قبلی مقایسه می‌شوند.
+
+        Args:
+            first_row, last_row: بازه ردیف‌های قابل مشاهده
+            dirty_pages: شماره صفحه‌های تغییر کرده؛ None یعنی همه صفحه‌های دیده شده
+        """
+        memory = self.memory
+        if memory.pages.keys() != self._page_keys or memory.regions != self._regions:
+            self.set_memory(memory)
+            return
+        base = len(self._regions)
+        if last_row is None:
+            last_row = self.rowCount() - 1
+        first = max(first_row - base, 0) // WORDS_PER_PAGE
+        last = max(last_row - base, -1) // WORDS_PER_PAGE
+        visible = self._numbers[first:last + 1]
+
+        changed = set()
+        for index, number in enumerate(visible, first):
+            if dirty_pages is not None and number not in dirty_pages and number in self._shown:
+                continue
+            current = bytes(memory.pages[number])
+            old = self._shown.get(number)
+            self._shown[number] = current
+            if old is None or old == current:
+                continue
+            row = base + index * WORDS_PER_PAGE
+            for offset in range(0, PAGE_SIZE, WORD_SIZE):
+                if old[offset:offset + WORD_SIZE] != current[offset:offset + WORD_SIZE]:
+                    changed.add(row + offset // WORD_SIZE)
+
+        rows = changed | self._changed
+        self._changed = changed
+        for first_changed, last_changed in _ranges(rows):
+            self.dataChanged.emit(self.index(first_changed, 0),
+                                  self.index(last_changed, len(self.HEADERS) - 1))
+
 
 class RegistersView(QWidget):
     def __init__(self, register_file: RegisterFile):
         super().__init__()  # فراخوانی سازنده کلاس والد QWidget
-        self.register_file = register_file  # اتصال به رجیسترهای پردازنده
-        
+        self.model = RegisterTableModel(register_file)
+
         # تنظیم چیدمان و برچسب
         layout = QVBoxLayout(self)  # ایجاد چیدمان عمودی برای ویجت
         label = QLabel("Registers")  # ایجاد برچسب برای جدول رجیسترها
         label.setAlignment(Qt.AlignCenter)  # وسط‌چین کردن برچسب
         layout.addWidget(label)  # افزودن برچسب به چیدمان
-        
-        # ساخت جدول برای نمایش رجیسترها
-        self.table = QTableWidget()  # ایجاد جدول
-        self.table.setRowCount(32)  # تنظیم 32 ردیف برای رجیسترهای x0 تا x31
-        self.table.setColumnCount(3)  # تنظیم 3 ستون: نام رجیستر، مقدار هگز، مقدار دسیمال
-        self.table.setHorizontalHeaderLabels(["Reg", "Hex", "Decimal"])  # تنظیم عنوان ستون‌ها
-        
-        # تنظیم فونت کوچک‌تر برای جدول
-        self.table.setFont(QFont("Arial", 6))  # تنظیم فونت Arial با اندازه 6 برای فشردگی
-        
-        # تنظیم اندازه ستون‌ها برای فشرده‌تر شدن
-        header = self.table.horizontalHeader()  # گرفتن هدر جدول
+
+        # جدول رجیسترها روی مدل (۳ ستون: نام رجیستر، مقدار هگز، مقدار دسیمال)
+        self.table = _make_table(self.model)
         self.table.setColumnWidth(0, 50)  # عرض ستون Reg (باریک‌تر)
         self.table.setColumnWidth(1, 80)  # عرض ستون Hex
         self.table.setColumnWidth(2, 80)  # عرض ستون Decimal
-        
-        # تنظیم ارتفاع ردیف‌ها
-        for i in range(32):
-            self.table.setRowHeight(i, 12)  # ارتفاع هر ردیف 12 پیکسل برای فشردگی بیشتر
-            reg_item = QTableWidgetItem(f"x{i}")  # ایجاد آیتم برای نام رجیستر
-            reg_item.setFlags(Qt.ItemIsEnabled)  # غیرفعال کردن ویرایش
-            self.table.setItem(i, 0, reg_item)  # قرار دادن آیتم در جدول
-        
-        # غیرفعال کردن اسکرول عمودی
-        self.table.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)  # خاموش کردن اسکرول عمودی
-        
-        # تنظیم ارتفاع جدول برای نمایش همه ردیف‌ها
-        self.table.setFixedHeight(32 * 12 + self.table.horizontalHeader().height() + 2+350)  # 32 ردیف * 12 پیکسل + هدر + حاشیه
-        
+
+        # غیرفعال کردن اسکرول عمودی و نمایش همه ۳۲ ردیف
+        self.table.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.table.setFixedHeight(32 * ROW_HEIGHT + self.table.horizontalHeader().height() + 2 + 350)
+
         layout.addWidget(self.table)  # افزودن جدول به چیدمان
-        self.update()  # آپدیت اولیه جدول
-        
-    def update(self):
-        # آپدیت مقادیر جدول رجیسترها
-        print(f"Updating RegistersView... x1={self.register_file.read(1)}, x2={self.register_file.read(2)}, x3={self.register_file.read(3)}")  # لاگ دیباگ
-        try:
-            for i in range(32):
-                value = self.register_file.read(i)  # خواندن مقدار رجیستر
-                hex_item = QTableWidgetItem(hex(value))  # مقدار به صورت هگز
-                dec_item = QTableWidgetItem(str(value))  # مقدار به صورت دسیمال
-                hex_item.setFlags(Qt.ItemIsEnabled)  # غیرفعال کردن ویرایش
-                dec_item.setFlags(Qt.ItemIsEnabled)  # غیرفعال کردن ویرایش
-                self.table.setItem(i, 1, hex_item)  # قرار دادن مقدار هگز
-                self.table.setItem(i, 2, dec_item)  # قرار دادن مقدار دسیمال
-            self.table.repaint()  # رفرش گرافیکی جدول
-        except Exception as e:
-            print(f"Error in RegistersView.update: {e}")  # لاگ خطا
+
+    @property
+    def register_file(self):
+        return self.model.register_file
+
+    @register_file.setter
+    def register_file(self, register_file):
+        self.model.set_register_file(register_file)
+
+    def update(self, dirty=None):
+        # رسم دوباره فقط رجیسترهای تغییر کرده
+        self.model.refresh(dirty)
+
 
 class MemoryView(QWidget):
     def __init__(self, memory: Memory):
         super().__init__()  # فراخوانی سازنده کلاس والد QWidget
-        self.memory = memory  # اتصال به حافظه پردازنده
-        
+        self.model = MemoryTableModel(memory)
+
         # تنظیم چیدمان و برچسب
         layout = QVBoxLayout(self)  # ایجاد چیدمان عمودی برای ویجت
         label = QLabel("Memory")  # ایجاد برچسب برای جدول حافظه
         label.setAlignment(Qt.AlignCenter)  # وسط‌چین کردن برچسب
         layout.addWidget(label)  # افزودن برچسب به چیدمان
-        
-        # ساخت جدول برای نمایش حافظه
-        self.table = QTableWidget()  # ایجاد جدول
-        self.table.setColumnCount(2)  # تنظیم 2 ستون: آدرس و مقدار
-        self.table.setHorizontalHeaderLabels(["Address (Hex)", "Value (Hex)"])  # تنظیم عنوان ستون‌ها
-        
-        # تنظیم فونت کوچک‌تر برای جدول
-        self.table.setFont(QFont("Arial", 6))  # تنظیم فونت Arial با اندازه 6 برای فشردگی
-        
-        # تنظیم اندازه ستون‌ها
-        header = self.table.horizontalHeader()  # گرفتن هدر جدول
+
+        # پرش به آدرس (مثلاً 0x80000000): اولین صفحه موجود از آن آدرس به بعد
+        goto_layout = QHBoxLayout()
+        goto_layout.addWidget(QLabel("Go to:"))
+        self.goto_edit = QLineEdit()
+        self.goto_edit.setPlaceholderText("0x...")
+        self.goto_edit.returnPressed.connect(self.goto_address)
+        goto_layout.addWidget(self.goto_edit)
+        layout.addLayout(goto_layout)
+
+        # جدول حافظه روی مدل (۲ ستون: آدرس و مقدار)
+        self.table = _make_table(self.model)
         self.table.setColumnWidth(0, 60)  # عرض ستون Address (باریک‌تر)
         self.table.setColumnWidth(1, 60)  # عرض ستون Value (باریک‌تر)
-        
-        # تنظیم ارتفاع ردیف‌ها
-        self.table.setRowHeight(0, 12)  # ارتفاع ردیف‌ها 12 پیکسل برای فشردگی
-        
+
         layout.addWidget(self.table)  # افزودن جدول به چیدمان
-        self.update()  # آپدیت اولیه جدول
-        
-    def update(self):
-        # آپدیت مقادیر جدول حافظه
-        print(f"Updating MemoryView... memory={self.memory.memory}")  # لاگ دیباگ
+
+    @property
+    def memory(self):
+        return self.model.memory
+
+    @memory.setter
+    def memory(self, memory):
+        self.model.set_memory(memory)
+
+    def visible_rows(self):
+        """بازه ردیف‌های قابل مشاهده جدول"""
+        first = self.table.rowAt(0)
+        last = self.table.rowAt(self.table.viewport().height() - 1)
+        if first < 0:
+            return 0, -1
+        return first, last if last >= 0 else self.model.rowCount() - 1
+
+    def update(self, dirty_pages=None):
+        # رسم دوباره فقط کلمه‌های تغییر کرده در ردیف‌های قابل مشاهده
+        first, last = self.visible_rows()
+        self.model.refresh(first, last, dirty_pages)
+
+    def goto_address(self):
         try:
-            self.table.setRowCount(0)  # پاک کردن ردیف‌های قبلی
-            for address in sorted(self.memory.memory.keys()):  # حلقه روی آدرس‌های حافظه
-                row = self.table.rowCount()  # گرفتن شماره ردیف جدید
-                self.table.insertRow(row)  # افزودن ردیف جدید
-                self.table.setRowHeight(row, 12)  # ارتفاع ردیف 12 پیکسل
-                addr_item = QTableWidgetItem(hex(address))  # آدرس به صورت هگز
-                value = self.memory.memory.get(address, 0)  # گرفتن مقدار یا 0
-                value_item = QTableWidgetItem(hex(value) if isinstance(value, int) else "Invalid")  # مقدار به صورت هگز
-                addr_item.setFlags(Qt.ItemIsEnabled)  # غیرفعال کردن ویرایش
-                value_item.setFlags(Qt.ItemIsEnabled)  # غیرفعال کردن ویرایش
-                self.table.setItem(row, 0, addr_item)  # قرار دادن آدرس
-                self.table.setItem(row, 1, value_item)  # قرار دادن مقدار
-            self.table.repaint()  # رفرش گرافیکی جدول
-        except Exception as e:
-            print(f"Error in MemoryView.update: {e}")  # لاگ خطا
\ No newline at end of file
+            address = int(self.goto_edit.text(), 0)
+        except ValueError:
+            return
+        row = self.model.row_of(address)
+        if row is not None:
+            self.table.scrollTo(self.model.index(row, 0), QAbstractItemView.PositionAtTop)
+            self.table.selectRow(row)
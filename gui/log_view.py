@@ -0,0 +1,109 @@
+# gui/log_view.py
+#
+# پنل لاگ افزایشی: فقط رویدادهای جدیدتر از آخرین شماره نمایش داده شده
+# (tracer.seq) به انتهای QPlainTextEdit اضافه می‌شوند و تعداد خطوط با
+# maximumBlockCount محدود است، پس هزینه هر گام به تعداد رویدادهای همان گام
+# بستگی دارد و حافظه در اجراهای میلیون سیکلی ثابت می‌ماند.
+
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPlainTextEdit, QCheckBox, QLabel
+
+from cpu.trace import CATEGORY_NAMES, CTRL, PIPE, format_event
+
+MAX_LINES = 5000   # حداکثر تعداد خطوط نگهداری شده در پنل
+
+# برچسب چک‌باکس هر دسته رویداد
+_FILTER_LABELS = {CTRL: "Control", PIPE: "Cycle"}
+
+
+class LogView(QWidget):
+    """نمایش رویدادهای Tracer با فیلتر بر اساس مرحله"""
+
+    def __init__(self, max_lines=MAX_LINES):
+        super().__init__()
+        self.tracer = None
+        self.seq = 0   # شماره آخرین رویداد خوانده شده از tracer
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        # فیلتر دسته‌ها (IF/ID/EX/MEM/WB/Control/Cycle)
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("Show:"))
+        self.filters = []
+        for category, name in enumerate(CATEGORY_NAMES):
+            box = QCheckBox(_FILTER_LABELS.get(category, name))
+            box.setChecked(True)
+            box.toggled.connect(self.rebuild)
+            filter_layout.addWidget(box)
+            self.filters.append(box)
+        layout.addLayout(filter_layout)
+
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setMaximumBlockCount(max_lines)   # خطوط قدیمی خودکار حذف می‌شوند
+        self.max_lines = max_lines
+        layout.addWidget(self.text)
+
+    def categories(self):
+        """مجموعه دسته‌های انتخاب شده (None یعنی همه)"""
+        selected = {category for category, box in enumerate(self.filters) if box.isChecked()}
+        return None if len(selected) == len(self.filters) else selected
+
+    def attach(self, tracer):
+        """اتصال به ردیاب شبیه‌ساز جدید (رویدادهای قبلی آن هم نمایش داده می‌شوند)"""
+        self.tracer = tracer
+        self.seq = 0
+
+    def refresh(self, limit=None):
+        """
+        افزودن رویدادهای جدید از آخرین refresh به انتهای پنل
+
+        Args:
+            limit: حداکثر تعداد رویدادی که متن آن ساخته می‌شود (آخرین‌ها)؛
+                   None یعنی به اندازه ظرفیت پنل
+        """
+        tracer = self.tracer
+        if tracer is None:
+            return
+        # seq یک بار خوانده می‌شود: اجرای پس‌زمینه ممکن است همزمان رویداد ثبت
+        # کند و آن رویدادها باید برای refresh بعدی بمانند
+        end = tracer.seq
+        if end == self.seq:
+            return
+        new = end - self.seq
+        events = tracer.since(self.seq, self.categories(), end)
+        self.seq = end
+        limit = self.max_lines if limit is None else limit
+        lines = []
+        # رویدادهایی که از بافر حلقوی ردیاب یا سقف نمایش بیرون افتاده‌اند
+        skipped = new - len(tracer.events) if new > len(tracer.events) else 0
+        if len(events) > limit:
+            skipped += len(events) - limit
+            events = events[-limit:]
+        if skipped:
+            lines.append(f"… {skipped} earlier events not shown")
+        lines.extend(format_event(event) for event in events)
+        if lines:
+            # یک بار افزودن کل متن به جای یک فراخوانی برای هر خط
+            self.text.appendPlainText("\n".join(lines))
+            self.scroll_to_end()
+
+    def rebuild(self):
+        """نمایش دوباره رویدادهای موجود در بافر ردیاب با فیلتر جدید"""
+        self.text.clear()
+        self.seq = max(0, self.tracer.seq - len(self.tracer.events)) if self.tracer else 0
+        self.refresh()
+
+    def append(self, message):
+        """افزودن پیام GUI (مثلاً بارگذاری یا ریست) به انتهای پنل"""
+        self.text.appendPlainText(message)
+        self.scroll_to_end()
+
+    def clear(self):
+        self.text.clear()
+        if self.tracer is not None:
+            self.seq = self.tracer.seq
+
+    def scroll_to_end(self):
+        bar = self.text.verticalScrollBar()
+        bar.setValue(bar.maximum())
@@ -1,11 +1,20 @@
 # gui/main_window.py
 
-from pipeline.pipeline_runner import run_pipeline
+from pipeline.pipeline_runner import PipelineSimulator
+from cpu.trace import Tracer, DEBUG
+from pipeline.block_translator import invalidate_translation_cache
+from pipeline.history import ExecutionHistory
+from pipeline.occupancy import OccupancyTrace
 from gui.components_view import RegistersView, MemoryView
+from gui.sim_worker import SimulationWorker
+from gui.log_view import LogView
+from gui.pipeline_view import PipelineView
 from cpu.memory import Memory
 from cpu.registers import RegisterFile
-from isa.parser import parse_program_with_labels, parse_final_program, load_assembly_file
-from PyQt5.QtCore import Qt
+from isa.parser import load_assembly_file
+from isa.assembler import IncrementalAssembler, format_errors
+from isa.elf_loader import load_elf
+from PyQt5.QtCore import Qt, QTimer, QThread
 import sys
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
@@ -13,6 +22,9 @@ from PyQt5.QtWidgets import (
 )
 sys.path.append('..')
 
+# حداکثر خطوط لاگ در هر به‌روزرسانی حین اجرای پس‌زمینه (بقیه فقط شمرده می‌شوند)
+LIVE_LOG_LINES = 200
+
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -27,7 +39,13 @@ class MainWindow(QMainWindow):
         self.mem = Memory()
         self.cycle = 0
         self.pipeline_state = None
+        self.simulator = None  # شبیه‌ساز ماندگار pipeline (بین گام‌ها زنده می‌ماند)
+        self.history = None    # تاریخچه اجرا برای Step Back (pipeline.history)
+        self.worker = None          # اجرای پس‌زمینه Run Full (gui.sim_worker)
+        self.worker_thread = None
         self.labels = {}
+        # اسمبل افزایشی متن ویرایشگر (فقط خطوط تغییر کرده دوباره پارس می‌شوند)
+        self.assembler = IncrementalAssembler()
 
         # ویجت مرکزی و لی‌اوت اصلی
         central_widget = QWidget()
@@ -44,6 +62,15 @@ class MainWindow(QMainWindow):
         control_panel.addWidget(QLabel("Assembly Code:"))
         control_panel.addWidget(self.asm_text)
 
+        # اسمبل در حین تایپ: بعد از مکث کوتاه در تایپ (debounce) اجرا می‌شود
+        self.assemble_timer = QTimer(self)
+        self.assemble_timer.setSingleShot(True)
+        self.assemble_timer.setInterval(300)
+        self.assemble_timer.timeout.connect(self.assemble_editor)
+        self.asm_text.textChanged.connect(self.assemble_timer.start)
+        self.asm_status = QLabel("")
+        control_panel.addWidget(self.asm_status)
+
         # دکمه‌های کنترل
         button_layout = QHBoxLayout()
         self.load_file_btn = QPushButton("Load File")
@@ -58,19 +85,35 @@ class MainWindow(QMainWindow):
         self.step_btn.clicked.connect(self.step_execution)
         button_layout.addWidget(self.step_btn)
 
+        self.step_back_btn = QPushButton("Step Back")
+        self.step_back_btn.clicked.connect(self.step_back_execution)
+        button_layout.addWidget(self.step_back_btn)
+
         self.run_btn = QPushButton("Run Full")
         self.run_btn.clicked.connect(self.run_full)
         button_layout.addWidget(self.run_btn)
 
+        self.pause_btn = QPushButton("Pause")
+        self.pause_btn.clicked.connect(self.toggle_pause)
+        self.pause_btn.setEnabled(False)
+        button_layout.addWidget(self.pause_btn)
+
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.clicked.connect(self.stop_run)
+        self.cancel_btn.setEnabled(False)
+        button_layout.addWidget(self.cancel_btn)
+
         self.reset_btn = QPushButton("Reset")
         self.reset_btn.clicked.connect(self.reset)
         button_layout.addWidget(self.reset_btn)
 
         control_panel.addLayout(button_layout)
+        self.run_status = QLabel("")
+        control_panel.addWidget(self.run_status)
 
         # لاگ
-        self.log_text = QTextEdit()
-        self.log_text.setReadOnly(True)
+        # فقط رویدادهای جدید ردیاب اضافه می‌شوند (تعداد خطوط محدود، فیلتر بر اساس مرحله)
+        self.log_text = LogView()
         control_panel.addWidget(QLabel("Debug Log:"))
         control_panel.addWidget(self.log_text)
 
@@ -89,7 +132,7 @@ class MainWindow(QMainWindow):
         self.schematic_view = QLabel("Schematic View (TBD)")
         views_panel.addWidget(self.schematic_view)
 
-        self.pipeline_view = QLabel("Pipeline Stages View (TBD)")
+        self.pipeline_view = PipelineView()
         views_panel.addWidget(self.pipeline_view)
 
         views_widget = QWidget()
@@ -100,8 +143,11 @@ class MainWindow(QMainWindow):
         # لود فایل اسمبلی
         try:
             file_name, _ = QFileDialog.getOpenFileName(
-                self, "Open Assembly File", "", "Assembly Files (*.s)")
-            if file_name:
+                self, "Open Program", "", "Assembly Files (*.s);;RV64I ELF Files (*)")
+            if file_name and not file_name.endswith(".s"):
+                self.load_elf_file(file_name)
+            elif file_name:
+                invalidate_translation_cache(self.program)  # بلوک‌های ترجمه شده برنامه قبلی
                 self.program, self.labels = load_assembly_file(file_name)
                 self.asm_text.setText(open(file_name).read())
                 self.log_text.append(
@@ -111,12 +157,46 @@ class MainWindow(QMainWindow):
             QMessageBox.critical(
                 self, "Error", f"Failed to load file: {str(e)}")
 
+    def load_elf_file(self, file_name):
+        # لود فایل اجرایی ELF: سگمنت‌ها در حافظه جدید و sp/gp در رجیسترها
+        invalidate_translation_cache(self.program)
+        self.reset()
+        self.program, self.labels = load_elf(file_name, self.mem, self.regs)
+        # فهرست دستورات ELF اسمبلی قابل ویرایش نیست؛ اسمبل در حین تایپ اجرا نشود
+        self.asm_text.blockSignals(True)
+        self.asm_text.setText("\n".join(
+            f"0x{self.program.address_of(pc):08X}: {instr!r}"
+            for pc, instr in enumerate(self.program)))
+        self.asm_text.blockSignals(False)
+        self.asm_status.setText("ELF listing (read-only)")
+        self.log_text.append(
+            f"Loaded ELF: {len(self.program)} instructions, "
+            f"entry=0x{self.program.address_of(self.program.entry):X}")
+        self.update_views()
+
+    def assemble_editor(self):
+        # اسمبل افزایشی متن فعلی ویرایشگر و نمایش خطاها با شماره خط
+        self.assemble_timer.stop()
+        assembler = self.assembler
+        if not assembler.update(self.asm_text.toPlainText()):
+            return
+        if assembler.errors:
+            lineno, message = assembler.errors[0]
+            more = len(assembler.errors) - 1
+            self.asm_status.setText(
+                f"❌ line {lineno}: {message}" + (f" (+{more} more)" if more else ""))
+        else:
+            self.asm_status.setText(f"✅ {len(assembler.program)} instructions")
+
     def load_text(self):
-        # لود کد اسمبلی از متن
+        # لود کد اسمبلی از متن (نتیجه اسمبل افزایشی، بدون پارس دوباره کل متن)
         try:
-            asm_code = self.asm_text.toPlainText()
-            raw_lines, self.labels = parse_program_with_labels(asm_code)
-            self.program = parse_final_program(raw_lines, self.labels)
+            self.assemble_editor()
+            if self.assembler.errors:
+                raise ValueError(format_errors(self.assembler.errors, "editor"))
+            invalidate_translation_cache(self.program)  # بلوک‌های ترجمه شده برنامه قبلی
+            self.program = self.assembler.program
+            self.labels = self.assembler.labels
             self.log_text.append(
                 f"Loaded program: {len(self.program)} instructions")
             self.reset()
@@ -130,28 +210,12 @@ class MainWindow(QMainWindow):
             self.log_text.append("No program loaded!")
             return
         try:
-            current_cycle = self.pipeline_state.get(
-                'cycle', 0) if self.pipeline_state else 0
-            target_cycles = current_cycle + 1
-
-            self.pipeline_state = run_pipeline(
-                self.program, self.regs, self.mem,
-                max_cycles=target_cycles,
-                debug=True,
-                initial_state=self.pipeline_state
-            )
+            self.get_simulator()
+            self.history.step(1)
+            self.pipeline_state = self.simulator.state()
 
             self.cycle = self.pipeline_state.get('cycle', 0)
             self.update_views()
-            # نمایش لاگ‌های سیکل جاری و نگه داشتن لاگ‌های قبلی
-            self.log_text.clear()
-
-            logs = self.pipeline_state.get('log', [])
-            if logs:
-                for log_line in logs:
-                    self.log_text.append(log_line)
-            else:
-                self.log_text.append(f"No logs for Cycle {self.cycle}")
 
             if self.pipeline_state.get('halted', False):
                 self.log_text.append("✅ Program execution completed.")
@@ -160,45 +224,164 @@ class MainWindow(QMainWindow):
                 self, "Error", f"Step execution failed: {str(e)}")
 
     def run_full(self):
-        # اجرای کامل
+        # اجرای کامل در thread جدا؛ نماها حداکثر ۳۰ بار در ثانیه به‌روز می‌شوند
         if not self.program:
             self.log_text.append("No program loaded!")
             return
+        if self.worker is not None:
+            return
         try:
-            self.pipeline_state = run_pipeline(
-                self.program, self.regs, self.mem, max_cycles=1000,
-                debug=True, initial_state=self.pipeline_state
-            )
+            self.get_simulator()
+        except Exception as e:
+            QMessageBox.critical(
+                self, "Error", f"Full execution failed: {str(e)}")
+            return
+        self.worker = SimulationWorker(self.history)
+        self.worker_thread = QThread(self)
+        self.worker.moveToThread(self.worker_thread)
+        self.worker_thread.started.connect(self.worker.run)
+        self.worker.progress.connect(self.on_run_progress)
+        self.worker.finished.connect(self.on_run_finished)
+        self.worker.failed.connect(self.on_run_failed)
+        self.set_running(True)
+        self.log_text.append("▶ Running...")
+        self.worker_thread.start()
+
+    def set_running(self, running):
+        # در حین اجرای پس‌زمینه فقط Pause/Cancel فعال هستند
+        for button in (self.load_file_btn, self.load_text_btn, self.step_btn,
+                       self.step_back_btn, self.run_btn, self.reset_btn):
+            button.setEnabled(not running)
+        self.pause_btn.setEnabled(running)
+        self.cancel_btn.setEnabled(running)
+        self.pause_btn.setText("Pause")
+
+    def toggle_pause(self):
+        if self.worker is None:
+            return
+        if self.worker.paused:
+            self.worker.resume()
+            self.pause_btn.setText("Pause")
+        else:
+            self.worker.pause()
+            self.pause_btn.setText("Resume")
+
+    def stop_run(self):
+        # لغو اجرای پس‌زمینه و انتظار برای پایان thread (حداکثر یک تکه سیکل)
+        if self.worker is None:
+            return
+        self.worker.cancel()
+        self.worker_thread.quit()
+        self.worker_thread.wait()
+        self.worker = None
+        self.worker_thread = None
+        self.set_running(False)
+        self.simulator = self.history.simulator
+        self.pipeline_state = self.simulator.state()
+        self.cycle = self.pipeline_state.get('cycle', 0)
+        self.update_views()
+        self.log_text.append(f"⏹ Canceled at cycle {self.cycle}")
+
+    def show_progress(self, snapshot):
+        # فقط رجیسترها و صفحه‌هایی که از snapshot قبلی نوشته شده‌اند دوباره رسم می‌شوند
+        self.cycle = snapshot['cycle']
+        self.registers_view.update(snapshot['registers'])
+        self.memory_view.update(snapshot['pages'])
+        self.log_text.refresh(LIVE_LOG_LINES)
+        self.pipeline_view.refresh()
+        state = " (paused)" if snapshot['paused'] else ""
+        self.run_status.setText(
+            f"Cycle {snapshot['cycle']}, instret {snapshot['instret']}{state}")
+
+    def on_run_progress(self, snapshot):
+        if self.sender() is self.worker:   # سیگنال‌های صف شده اجرای لغو شده نادیده گرفته می‌شوند
+            self.show_progress(snapshot)
+
+    def on_run_finished(self, snapshot):
+        if self.sender() is not self.worker:
+            return
+        self.worker_thread.quit()
+        self.worker_thread.wait()
+        self.worker = None
+        self.worker_thread = None
+        self.set_running(False)
+        self.show_progress(snapshot)
+        self.pipeline_state = self.simulator.state()
+        self.update_views()
+        if snapshot['halted']:
+            self.log_text.append("✅ Program execution completed.")
+
+    def on_run_failed(self, message):
+        if self.sender() is not self.worker:
+            return
+        self.worker_thread.quit()
+        self.worker_thread.wait()
+        self.worker = None
+        self.worker_thread = None
+        self.set_running(False)
+        QMessageBox.critical(
+            self, "Error", f"Full execution failed: {message}")
+
+    def step_back_execution(self):
+        # برگشت یک سیکل به عقب (undo یا بازیابی نزدیک‌ترین checkpoint)
+        if self.history is None or self.history.cycle == 0:
+            self.log_text.append("Nothing to step back to.")
+            return
+        try:
+            self.history.step_back(1)
+            self.simulator = self.history.simulator
+            self.pipeline_state = self.simulator.state()
             self.cycle = self.pipeline_state.get('cycle', 0)
             self.update_views()
-            # نمایش تمام لاگ‌ها
-            self.log_text.clear()  # پاک کردن لاگ قبلی
-            for log_line in self.pipeline_state.get('log', []):
-                self.log_text.append(log_line)
-            if self.pipeline_state.get('halted', False):
-                self.log_text.append("✅ Program execution completed.")
+            self.log_text.append(f"⏪ Stepped back to cycle {self.cycle}")
         except Exception as e:
             QMessageBox.critical(
-                self, "Error", f"Full execution failed: {str(e)}")
+                self, "Error", f"Step back failed: {str(e)}")
 
     def reset(self):
         # ریست سیستم
+        self.stop_run()
         self.regs = RegisterFile()
         self.mem = Memory()
         self.cycle = 0
         self.pipeline_state = None
+        self.simulator = None
+        self.history = None
         self.registers_view.register_file = self.regs
         self.memory_view.memory = self.mem
+        self.log_text.attach(None)
+        self.pipeline_view.attach(None)
         self.update_views()
         self.log_text.clear()
         self.log_text.append("System reset.")
 
+    def get_simulator(self):
+        # ساخت شبیه‌ساز فقط یک بار بعد از بارگذاری برنامه یا ریست
+        if self.simulator is None:
+            # ردیابی کامل در بافر حلقوی محدود، بدون چاپ در ترمینال
+            tracer = Tracer(level=DEBUG, capacity=20000)
+            # اشغال مراحل هر سیکل برای نمودار pipeline
+            occupancy = OccupancyTrace()
+            self.simulator = PipelineSimulator(
+                self.program, self.regs, self.mem, tracer=tracer, occupancy=occupancy)
+            self.history = ExecutionHistory(self.simulator)
+            self.log_text.attach(tracer)
+            self.pipeline_view.attach(occupancy, self.program)
+        # بعد از برگشت از checkpoint شبیه‌ساز تاریخچه عوض می‌شود
+        self.simulator = self.history.simulator
+        return self.simulator
+
+    def closeEvent(self, event):
+        # thread شبیه‌سازی قبل از بسته شدن پنجره متوقف شود
+        self.stop_run()
+        super().closeEvent(event)
+
     def update_views(self):
         # آپدیت ویجت‌ها
         self.registers_view.update()
         self.memory_view.update()
-        self.log_text.moveCursor(
-            self.log_text.textCursor().End)  # اسکرول به انتها
+        self.log_text.refresh()  # فقط رویدادهای جدید از آخرین نمایش
+        self.pipeline_view.refresh()
 
 
 
@@ -0,0 +1,160 @@
+# gui/pipeline_view.py
+#
+# نمودار اشغال pipeline: هر ردیف یک دستور دینامیکی و هر ستون یک سیکل است و
+# خانه‌ها مرحله دستور (IF/ID/EX/MEM/WB)، توقف و حذف را نشان می‌دهند. داده از
+# OccupancyTrace (آرایه پنج عدد برای هر سیکل) خوانده می‌شود و paintEvent فقط
+# ستون‌های قابل مشاهده را می‌پیماید، پس هزینه رسم به اندازه پنجره بستگی دارد
+# نه به تعداد سیکل‌ها.
+
+from PyQt5.QtWidgets import QAbstractScrollArea
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPainter, QColor, QFont, QFontMetrics
+
+from pipeline.occupancy import STAGE_NAMES, NUM_STAGES, ID, EMPTY, FLAG_STALL, FLAG_BUBBLE, FLAG_FLUSH
+
+CELL_WIDTH = 36      # عرض ستون هر سیکل
+ROW_HEIGHT = 16      # ارتفاع ردیف هر دستور
+LABEL_WIDTH = 220    # ستون PC و متن دستور
+HEADER_HEIGHT = 18   # ردیف شماره سیکل‌ها
+
+STAGE_COLORS = [QColor(c) for c in ("#BBDEFB", "#C8E6C9", "#FFF59D", "#FFCC80", "#F8BBD0")]
+STALL_COLOR = QColor("#D6D6D6")
+FLUSH_COLOR = QColor("#EF9A9A")
+GRID_COLOR = QColor("#E0E0E0")
+
+
+class PipelineView(QAbstractScrollArea):
+    """
+    نمودار دستور × سیکل با رسم مجازی
+
+    اسکرول عمودی بر حسب ردیف (دستور) و افقی بر حسب سیکل است. با اسکرول
+    عمودی، ستون‌ها روی سیکل واکشی اولین ردیف قابل مشاهده قرار می‌گیرند تا
+    قطر نمودار در دید بماند. اگر نما در انتهای نمودار باشد refresh آن را
+    همراه آخرین دستورها نگه می‌دارد.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.trace = None
+        self.program = None
+        self.setFont(QFont("Courier", 9))
+        self.setMinimumHeight(160)
+        self.verticalScrollBar().valueChanged.connect(self._align)
+
+    def attach(self, trace, program=None):
+        """نمایش ردیاب trace؛ program برای متن دستور هر ردیف (اختیاری)"""
+        self.trace = trace
+        self.program = program
+        self.verticalScrollBar().setValue(0)
+        self.horizontalScrollBar().setValue(0)
+        self.refresh()
+
+    # ---------------- اندازه‌ها و اسکرول ----------------
+
+    def _visible_rows(self):
+        return max(1, (self.viewport().height() - HEADER_HEIGHT) // ROW_HEIGHT)
+
+    def _visible_columns(self):
+        return max(1, (self.viewport().width() - LABEL_WIDTH) // CELL_WIDTH)
+
+    def _update_bars(self):
+        trace = self.trace
+        rows = trace.instructions if trace is not None else 0
+        cycles = trace.cycles if trace is not None else 0
+        vertical = self.verticalScrollBar()
+        horizontal = self.horizontalScrollBar()
+        vertical.setPageStep(self._visible_rows())
+        horizontal.setPageStep(self._visible_columns())
+        vertical.setRange(0, max(0, rows - self._visible_rows()))
+        horizontal.setRange(0, max(0, cycles - self._visible_columns()))
+
+    def refresh(self):
+        """به‌روزرسانی بعد از سیکل‌های جدید (یا کوتاه شدن ردیاب پس از برگشت)"""
+        vertical = self.verticalScrollBar()
+        follow = vertical.value() >= vertical.maximum()
+        self._update_bars()
+        if follow:
+            vertical.setValue(vertical.maximum())
+            self._align(vertical.value())
+        self.viewport().update()
+
+    def _align(self, row):
+        """بردن ستون‌ها به سیکل واکشی ردیف row"""
+        trace = self.trace
+        if trace is not None and row < trace.instructions:
+            column = trace.fetch_cycles[row] - trace.start_cycle - 1
+            self.horizontalScrollBar().setValue(max(0, column))
+        self.viewport().update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._update_bars()
+
+    # ---------------- رسم ----------------
+
+    def _label(self, row):
+        pc = self.trace.pcs[row]
+        program = self.program
+        if program is not None and 0 <= pc < len(program):
+            return f"{pc:>5}  {program[pc]}"
+        return f"{pc:>5}"
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.fillRect(self.viewport().rect(), Qt.white)
+        trace = self.trace
+        if trace is None:
+            painter.drawText(8, HEADER_HEIGHT, "No program running")
+            return
+
+        metrics = QFontMetrics(self.font())
+        top = self.verticalScrollBar().value()
+        left = self.horizontalScrollBar().value()
+        rows = min(self._visible_rows() + 1, trace.instructions - top)
+        columns = min(self._visible_columns() + 1, trace.cycles - left)
+        width = self.viewport().width()
+
+        # ستون برچسب دستورها و خطوط افقی
+        painter.setPen(GRID_COLOR)
+        for index in range(rows + 1):
+            y = HEADER_HEIGHT + index * ROW_HEIGHT
+            painter.drawLine(0, y, width, y)
+        painter.setPen(Qt.black)
+        corner = "Cycle (trace full)" if trace.truncated else "Cycle"
+        painter.drawText(4, 0, LABEL_WIDTH - 4, HEADER_HEIGHT, Qt.AlignVCenter, corner)
+        for index in range(rows):
+            painter.drawText(4, HEADER_HEIGHT + index * ROW_HEIGHT, LABEL_WIDTH - 4, ROW_HEIGHT,
+                             Qt.AlignVCenter, metrics.elidedText(self._label(top + index),
+                                                                 Qt.ElideRight, LABEL_WIDTH - 8))
+
+        # شماره سیکل‌ها؛ اگر جا نشود فقط هر پنج سیکل
+        step = 1 if metrics.width(str(trace.start_cycle + left + columns)) < CELL_WIDTH - 4 else 5
+        slots = trace.slots
+        flags = trace.flags
+        bottom = top + rows
+        for index in range(columns):
+            column = left + index
+            x = LABEL_WIDTH + index * CELL_WIDTH
+            cycle = trace.start_cycle + column + 1
+            if cycle % step == 0:
+                painter.setPen(Qt.black)
+                painter.drawText(x, 0, CELL_WIDTH, HEADER_HEIGHT, Qt.AlignCenter, str(cycle))
+            # فقط پنج خانه این سیکل خوانده می‌شود؛ ردیف هر خانه همان شماره دستور است
+            base = column * NUM_STAGES
+            cycle_flags = flags[column]
+            for stage in range(NUM_STAGES):
+                row = slots[base + stage]
+                if row == EMPTY or row < top or row >= bottom:
+                    continue
+                text = STAGE_NAMES[stage]
+                color = STAGE_COLORS[stage]
+                if cycle_flags & FLAG_STALL or stage == ID and cycle_flags & FLAG_BUBBLE:
+                    text = text.lower()
+                    color = STALL_COLOR
+                elif stage == ID and cycle_flags & FLAG_FLUSH:
+                    text = "X"
+                    color = FLUSH_COLOR
+                y = HEADER_HEIGHT + (row - top) * ROW_HEIGHT
+                painter.fillRect(x + 1, y + 1, CELL_WIDTH - 2, ROW_HEIGHT - 2, color)
+                painter.setPen(Qt.black)
+                painter.drawText(x, y, CELL_WIDTH, ROW_HEIGHT, Qt.AlignCenter, text)
@@ -0,0 +1,97 @@
+# gui/sim_worker.py
+#
+# اجرای شبیه‌سازی در یک QThread جدا تا پنجره هنگام اجراهای طولانی قفل نشود.
+# worker در تکه‌های کوچک سیکل اجرا می‌کند و حداکثر FPS بار در ثانیه یک
+# snapshot می‌فرستد: سیکل، instret و فقط شماره رجیسترها و صفحه‌های حافظه‌ای
+# که از snapshot قبلی نوشته شده‌اند (از رکوردهای undo تاریخچه). نماها مقدارها
+# را هنگام رسم از همان RegisterFile/Memory می‌خوانند.
+
+import threading
+import time
+
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+
+FPS = 30            # حداکثر تعداد به‌روزرسانی GUI در ثانیه
+CHUNK_CYCLES = 64   # تعداد سیکل بین دو بررسی زمان/توقف
+
+
+class SimulationWorker(QObject):
+    """
+    اجرای ExecutionHistory تا پایان برنامه، توقف یا لغو
+
+    سیگنال‌ها (در thread اصلی دریافت می‌شوند):
+        progress(dict): snapshot دوره‌ای
+        finished(dict): snapshot پایانی (canceled=True اگر لغو شده باشد)
+        failed(str): پیام خطای شبیه‌سازی
+    """
+    progress = pyqtSignal(object)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, history, max_cycles=None, fps=FPS):
+        super().__init__()
+        self.history = history
+        self.max_cycles = max_cycles
+        self.interval = 1.0 / fps
+        self._resume = threading.Event()   # پاک یعنی متوقف (Pause)
+        self._resume.set()
+        self._cancel = threading.Event()
+        self._reported = history.cycle      # سیکل آخرین snapshot
+
+    @property
+    def paused(self):
+        return not self._resume.is_set()
+
+    def pause(self):
+        self._resume.clear()
+
+    def resume(self):
+        self._resume.set()
+
+    def cancel(self):
+        self._cancel.set()
+        self._resume.set()   # اگر متوقف است بیدار شود تا خارج شود
+
+    def _snapshot(self, **extra):
+        """وضعیت فعلی و مجموعه رجیسترها/صفحه‌های نوشته شده از snapshot قبلی"""
+        history = self.history
+        simulator = history.simulator
+        changes = history.changes_since(self._reported)
+        # اگر رکوردهای undo کافی نباشند None یعنی نما خودش مقایسه کند
+        registers, pages = changes if changes is not None else (None, None)
+        self._reported = simulator.cycle
+        snapshot = {
+            'cycle': simulator.cycle,
+            'instret': simulator.instret,
+            'halted': simulator.halted,
+            'paused': self.paused,
+            'registers': registers,
+            'pages': pages,
+        }
+        snapshot.update(extra)
+        return snapshot
+
+    @pyqtSlot()
+    def run(self):
+        history = self.history
+        try:
+            next_frame = time.perf_counter() + self.interval
+            while not history.simulator.halted and not self._cancel.is_set():
+                if self.max_cycles is not None and history.cycle >= self.max_cycles:
+                    break
+                if not self._resume.is_set():
+                    # یک snapshot برای نمایش حالت توقف، سپس انتظار بدون مصرف CPU
+                    self.progress.emit(self._snapshot())
+                    self._resume.wait()
+                    continue
+                count = CHUNK_CYCLES
+                if self.max_cycles is not None:
+                    count = min(count, self.max_cycles - history.cycle)
+                history.step(count)
+                now = time.perf_counter()
+                if now >= next_frame:
+                    self.progress.emit(self._snapshot())
+                    next_frame = now + self.interval
+            self.finished.emit(self._snapshot(canceled=self._cancel.is_set()))
+        except Exception as e:
+            self.failed.emit(str(e))
@@ -0,0 +1,464 @@
+# isa/assembler.py
+# اسمبلر سریع دو گذره برای فایل‌های .s بزرگ با کش دیسکی
+#
+# گذر اول خطوط ورودی را یکی‌یکی (بدون ساخت لیست خطوط) می‌خواند، توضیحات و لیبل‌ها
+# را جدا و آدرس لیبل‌ها را ثبت می‌کند. گذر دوم هر دستور را فقط یک بار به توکن
+# تبدیل می‌کند و با جدول opcode → تابع عملوند (به جای زنجیره if/elif) مستقیماً
+# DecodedInstr می‌سازد، پس خروجی نیازی به predecode_program ندارد. خطاها با شماره خط جمع می‌شوند و
+# بقیه خطوط همچنان بررسی می‌شوند.
+#
+# assemble_file کل فایل را یک بار می‌خواند (برای hash) و خروجی را با hash محتوا
+# در دیسک کش می‌کند؛ اجرای دوباره یک فایل تغییر نکرده فقط آرایه عملوندها را
+# می‌خواند. برنامه‌ای که immediate خارج از بازه ۶۴ بیتی علامت‌دار دارد کش نمی‌شود.
+import bisect
+import hashlib
+import io
+import json
+import os
+import struct
+from array import array
+
+from isa.decoder import Opcode, OperandClass, OPERAND_CLASS, DecodedInstr
+
+CACHE_MAGIC = b'RVAS'
+CACHE_VERSION = 1
+_CACHE_HEADER = struct.Struct('<4sHII')   # magic، نسخه، تعداد دستورات، طول JSON لیبل‌ها
+
+# پوشه پیش‌فرض کش (با متغیر محیطی RV64I_ASM_CACHE قابل تغییر؛ رشته خالی یعنی بدون کش)
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "rv64i-sim", "asm")
+
+# حداکثر تعداد خطاهایی که در پیام ValueError آورده می‌شود
+MAX_REPORTED_ERRORS = 20
+
+_REGISTERS = {f"x{i}": i for i in range(32)}
+_OPCODES = {op.name: op for op in Opcode if op != Opcode.ILLEGAL}
+
+
+class AssembledProgram(list):
+    """
+    برنامه اسمبل شده: لیست DecodedInstr (مثل ElfProgram)
+
+    lines[pc] شماره خط منبع دستور pc است (برای نمایش خطا و پروفایل).
+    """
+
+    def __init__(self, instructions, lines=None, path=None):
+        super().__init__(instructions)
+        self.lines = lines if lines is not None else array('I')
+        self.path = path
+
+
+# ---------------- عملوندها ----------------
+
+def _reg(token):
+    try:
+        return _REGISTERS[token]
+    except KeyError:
+        raise ValueError(f"Invalid register name: {token}") from None
+
+
+def _mem(token):
+    """offset(xN) → (offset, N)؛ offset خالی یعنی صفر"""
+    offset, sep, rest = token.partition("(")
+    if not sep or not rest.endswith(")"):
+        raise ValueError(f"Invalid memory address format: {token}")
+    return (int(offset, 0) if offset else 0), _reg(rest[:-1])
+
+
+def _target(token, labels, pc):
+    """آفست لیبل مقصد نسبت به pc (بر حسب تعداد دستور)"""
+    try:
+        return labels[token] - pc
+    except KeyError:
+        raise ValueError(f"Unknown label: {token}") from None
+
+
+# هر تابع: (عملوندها، لیبل‌ها، pc) → (rd, rs1, rs2, imm)
+def _r_operands(args, labels, pc):
+    return _reg(args[0]), _reg(args[1]), _reg(args[2]), None
+
+
+def _i_operands(args, labels, pc):
+    return _reg(args[0]), _reg(args[1]), 0, int(args[2], 0)
+
+
+def _load_operands(args, labels, pc):
+    offset, rs1 = _mem(args[1])
+    return _reg(args[0]), rs1, 0, offset
+
+
+def _store_operands(args, labels, pc):
+    offset, rs1 = _mem(args[1])
+    return 0, rs1, _reg(args[0]), offset
+
+
+def _branch_operands(args, labels, pc):
+    return 0, _reg(args[0]), _reg(args[1]), _target(args[2], labels, pc)
+
+
+def _upper_operands(args, labels, pc):
+    return _reg(args[0]), 0, 0, int(args[1], 0)
+
+
+def _jump_operands(args, labels, pc):
+    return _reg(args[0]), 0, 0, _target(args[1], labels, pc)
+
+
+def _jalr_operands(args, labels, pc):
+    # rd, offset(rs1) یا rd, rs1, offset
+    if len(args) == 2:
+        offset, rs1 = _mem(args[1])
+    elif len(args) == 3:
+        rs1, offset = _reg(args[1]), int(args[2], 0)
+    else:
+        raise ValueError(f"JALR expects 2 or 3 operands, got {len(args)}")
+    return _reg(args[0]), rs1, 0, offset
+
+
+def _no_operands(args, labels, pc):
+    return 0, 0, 0, None   # مثل parser عملوندهای اضافه (مثلاً FENCE rw, rw) نادیده گرفته می‌شوند
+
+
+# دسته عملوند → (تابع، تعداد عملوند؛ None یعنی آزاد)
+_FORMATS = {
+    OperandClass.R: (_r_operands, 3),
+    OperandClass.I: (_i_operands, 3),
+    OperandClass.LOAD: (_load_operands, 2),
+    OperandClass.STORE: (_store_operands, 2),
+    OperandClass.BRANCH: (_branch_operands, 3),
+    OperandClass.UPPER: (_upper_operands, 2),
+    OperandClass.JUMP: (_jump_operands, 2),
+    OperandClass.NONE: (_no_operands, None),
+}
+
+# جدول dispatch نهایی: نام دستور → (Opcode، تابع عملوند، تعداد عملوند)
+_DISPATCH = {name: (op, *_FORMATS[OPERAND_CLASS[op]]) for name, op in _OPCODES.items()}
+_DISPATCH['JALR'] = (Opcode.JALR, _jalr_operands, None)
+
+
+# ---------------- اسمبلر ----------------
+
+def assemble_lines(lines):
+    """
+    اسمبل کردن خطوط منبع (هر iterable از رشته‌ها، مثلاً فایل باز)
+
+    Returns:
+        tuple: (AssembledProgram, labels, errors) که errors لیست
+               (شماره خط، پیام) است؛ با وجود خطا بقیه خطوط هم بررسی می‌شوند
+    """
+    labels = {}
+    errors = []
+    # متن هر دستور و شماره خطش در دو آرایه جدا (بدون میلیون‌ها شیء کوچک برای GC)
+    codes = []
+    source_lines = array('I')
+
+    # ---------------- گذر اول: لیبل‌ها ----------------
+    for lineno, line in enumerate(lines, 1):
+        code = line.split("#", 1)[0]
+        if ":" in code:
+            label, code = code.split(":", 1)
+            label = label.strip()
+            if label in labels:
+                errors.append((lineno, f"Duplicate label: {label}"))
+            labels[label] = len(codes)
+        code = code.strip()
+        if code:
+            codes.append(code)
+            source_lines.append(lineno)
+
+    # ---------------- گذر دوم: توکن‌ها و ساخت دستورات ----------------
+    instructions = []
+    interned = {}   # دستورات یکسان فقط یک بار ساخته می‌شوند
+    dispatch = _DISPATCH
+    for pc, code in enumerate(codes):
+        try:
+            name, *args = code.replace(",", " ").split() or [code]
+            entry = dispatch.get(name.upper())
+            if entry is None:
+                raise ValueError(f"Unsupported op: {name.upper()}")
+            op, operands, count = entry
+            if count is not None and len(args) != count:
+                raise ValueError(f"{op.name} expects {count} operands, got {len(args)}")
+            key = (op, *operands(args, labels, pc))
+        except ValueError as e:
+            errors.append((source_lines[pc], str(e)))
+            key = (Opcode.NOP, 0, 0, 0, None)   # جای دستور نگه داشته می‌شود تا pc ها جابه‌جا نشوند
+        instr = interned.get(key)
+        if instr is None:
+            instr = interned[key] = DecodedInstr(*key)
+        instructions.append(instr)
+
+    errors.sort()
+    return AssembledProgram(instructions, source_lines), labels, errors
+
+
+def format_errors(errors, source="<input>"):
+    """پیام خوانای لیست خطاها (حداکثر MAX_REPORTED_ERRORS مورد)"""
+    shown = [f"{source}:{lineno}: {message}" for lineno, message in errors[:MAX_REPORTED_ERRORS]]
+    if len(errors) > MAX_REPORTED_ERRORS:
+        shown.append(f"... and {len(errors) - MAX_REPORTED_ERRORS} more errors")
+    return "\n".join(shown)
+
+
+def assemble(text, source="<input>"):
+    """اسمبل کردن متن کامل؛ در صورت خطا ValueError با همه خطاها (با شماره خط)"""
+    program, labels, errors = assemble_lines(io.StringIO(text))
+    if errors:
+        raise ValueError(format_errors(errors, source))
+    return program, labels
+
+
+# ---------------- کش دیسکی ----------------
+
+def _cache_dir(cache_dir):
+    if cache_dir is None:
+        cache_dir = os.environ.get("RV64I_ASM_CACHE", DEFAULT_CACHE_DIR)
+    return cache_dir or None
+
+
+def _cache_bytes(program, labels):
+    """بایت‌های فایل کش؛ None اگر عملوندی در array('q') جا نشود"""
+    operands = array('q')
+    try:
+        for instr in program:
+            operands.extend(instr.operands)
+    except OverflowError:
+        return None
+    label_data = json.dumps(labels, separators=(',', ':')).encode()
+    return (_CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, len(program), len(label_data))
+            + operands.tobytes() + program.lines.tobytes() + label_data)
+
+
+def _from_cache_bytes(data):
+    """بایت‌های کش → (برنامه، لیبل‌ها)؛ None اگر فایل معتبر نباشد"""
+    if len(data) < _CACHE_HEADER.size:
+        return None
+    magic, version, count, label_size = _CACHE_HEADER.unpack_from(data)
+    if magic != CACHE_MAGIC or version != CACHE_VERSION:
+        return None
+    operands = array('q')
+    lines = array('I')
+    end = _CACHE_HEADER.size + count * 5 * operands.itemsize
+    operands.frombytes(data[_CACHE_HEADER.size:end])
+    lines.frombytes(data[end:end + count * lines.itemsize])
+    label_data = data[end + count * lines.itemsize:]
+    if len(lines) != count or len(label_data) != label_size:
+        return None
+
+    instructions = []
+    interned = {}
+    for i in range(0, 5 * count, 5):
+        key = tuple(operands[i:i + 5])
+        instr = interned.get(key)
+        if instr is None:
+            op = Opcode(key[0])
+            # R-type و دستورات بدون عملوند immediate ندارند
+            imm = None if OPERAND_CLASS[op] in (OperandClass.R, OperandClass.NONE) else key[4]
+            instr = interned[key] = DecodedInstr(op, key[1], key[2], key[3], imm)
+        instructions.append(instr)
+    return AssembledProgram(instructions, lines), json.loads(label_data)
+
+
+def assemble_file(filename, cache_dir=None):
+    """
+    اسمبل کردن فایل .s با کش دیسکی بر اساس hash محتوا
+
+    Args:
+        filename: مسیر فایل اسمبلی
+        cache_dir: پوشه کش (None یعنی RV64I_ASM_CACHE یا DEFAULT_CACHE_DIR،
+                   False یا رشته خالی یعنی بدون کش)
+
+    Returns:
+        tuple: (AssembledProgram, labels)
+    """
+    with open(filename, 'rb') as f:
+        data = f.read()
+    cache_dir = _cache_dir(cache_dir)
+    cache_path = None
+    if cache_dir:
+        key = hashlib.blake2b(data, digest_size=20)
+        key.update(struct.pack('<H', CACHE_VERSION))
+        cache_path = os.path.join(cache_dir, key.hexdigest() + ".rvas")
+        try:
+            with open(cache_path, 'rb') as f:
+                cached = _from_cache_bytes(f.read())
+        except OSError:
+            cached = None
+        if cached is not None:
+            program, labels = cached
+            program.path = filename
+            return program, labels
+
+    program, labels, errors = assemble_lines(io.StringIO(data.decode('utf-8')))
+    if errors:
+        raise ValueError(format_errors(errors, filename))
+    program.path = filename
+
+    cache_data = _cache_bytes(program, labels) if cache_path is not None else None
+    if cache_data is not None:
+        # نوشتن اتمیک تا اجرای هم‌زمان (مثلاً batch_runner) فایل نیمه‌کاره نخواند
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            temp = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temp, 'wb') as f:
+                f.write(cache_data)
+            os.replace(temp, cache_path)
+        except OSError:
+            pass   # کش اختیاری است؛ پوشه غیرقابل نوشتن نباید اسمبل را خراب کند
+    return program, labels
+
+
+# ---------------- اسمبل افزایشی (ویرایشگر GUI) ----------------
+
+_NOP_KEY = (Opcode.NOP, 0, 0, 0, None)
+# دستوراتی که آفست آن‌ها به لیبل و pc بستگی دارد
+_LABEL_OPERANDS = (_branch_operands, _jump_operands)
+
+
+def _common_prefix(a, b, limit):
+    """طول پیشوند مشترک دو لیست (مقایسه تکه‌ای با slice در C، سپس خط به خط)"""
+    start = 0
+    step = 1024
+    while start + step <= limit and a[start:start + step] == b[start:start + step]:
+        start += step
+    while start < limit and a[start] == b[start]:
+        start += 1
+    return start
+
+
+class IncrementalAssembler:
+    """
+    اسمبل افزایشی متن ویرایشگر
+
+    نتیجه هر خط (لیبل، دستور دیکد شده یا خطا) نگه داشته می‌شود. در update
+    فقط خطوط بین پیشوند و پسوند مشترک با متن قبلی دوباره به توکن تبدیل و
+    دیکد می‌شوند. اگر ناحیه تغییر کرده همان تعداد دستور و همان لیبل‌ها را داشته
+    باشد، pc ها و جدول لیبل عوض نمی‌شوند و فقط دستورات همان ناحیه جایگزین
+    می‌شوند؛ در غیر این صورت بدون پارس دوباره لیبل‌ها و آفست شاخه‌ها/JAL ها
+    دوباره محاسبه می‌شوند.
+
+    program هر بار یک AssembledProgram جدید است تا کش‌هایی که با id برنامه کار
+    می‌کنند (predecode، block_translator) نسخه قدیمی را برنگردانند.
+    """
+
+    def __init__(self):
+        self.lines = []                         # خطوط متن فعلی
+        self.program = AssembledProgram([])
+        self.labels = {}
+        self.errors = []                        # لیست (شماره خط، پیام)
+        self._label_errors = set()              # خطاهای لیبل تکراری از آخرین _link
+        self.reparsed = 0                       # تعداد خطوط پارس شده در آخرین update
+        self._entries = []                      # هر خط: (لیبل، دستور، دستور وابسته به لیبل، خطا)
+        self._interned = {}
+
+    def _instr(self, key):
+        instr = self._interned.get(key)
+        if instr is None:
+            instr = self._interned[key] = DecodedInstr(*key)
+        return instr
+
+    def _parse(self, line):
+        """یک خط → (لیبل، DecodedInstr، (op، تابع عملوند، عملوندها)، خطا)"""
+        code = line.split("#", 1)[0]
+        label = None
+        if ":" in code:
+            label, code = code.split(":", 1)
+            label = label.strip()
+        tokens = code.replace(",", " ").split()
+        if not tokens:
+            return label, None, None, None
+        name, *args = tokens
+        try:
+            entry = _DISPATCH.get(name.upper())
+            if entry is None:
+                raise ValueError(f"Unsupported op: {name.upper()}")
+            op, operands, count = entry
+            if count is not None and len(args) != count:
+                raise ValueError(f"{op.name} expects {count} operands, got {len(args)}")
+            if operands in _LABEL_OPERANDS:
+                return label, None, (op, operands, args), None
+            return label, self._instr((op, *operands(args, None, 0))), None, None
+        except ValueError as e:
+            return label, self._instr(_NOP_KEY), None, str(e)
+
+    def _resolve(self, entry, pc, labels, errors, lineno):
+        """دستور نهایی یک خط با pc داده شده"""
+        _, instr, deferred, error = entry
+        if deferred is not None:
+            op, operands, args = deferred
+            try:
+                instr = self._instr((op, *operands(args, labels, pc)))
+            except ValueError as e:
+                instr, error = self._instr(_NOP_KEY), str(e)
+        if error is not None:
+            errors.append((lineno, error))
+        return instr
+
+    def update(self, text):
+        """
+        هماهنگ کردن با متن جدید ویرایشگر
+
+        Returns:
+            bool: True اگر متن عوض شده باشد
+        """
+        lines = text.split("\n")
+        old = self.lines
+        if lines == old:
+            return False
+        # پیشوند و پسوند مشترک؛ فقط خطوط بین آن‌ها دوباره پارس می‌شوند
+        limit = min(len(old), len(lines))
+        start = _common_prefix(old, lines, limit)
+        end = _common_prefix(old[::-1], lines[::-1], limit - start)
+        old_region = self._entries[start:len(old) - end]
+        new_region = [self._parse(line) for line in lines[start:len(lines) - end]]
+        self._entries[start:len(old) - end] = new_region
+        self.lines = lines
+        self.reparsed = len(new_region)
+
+        def shape(region):
+            return [(label, instr is not None or deferred is not None)
+                    for label, instr, deferred, _ in region]
+
+        if len(old_region) == len(new_region) and shape(old_region) == shape(new_region):
+            self._patch(start, new_region)
+        else:
+            self._link()
+        return True
+
+    def _patch(self, start, region):
+        """جایگزینی دستورات ناحیه تغییر کرده بدون جابه‌جایی pc یا لیبل"""
+        program = list(self.program)
+        # لیبل‌های ناحیه عوض نشده‌اند، پس خطاهای لیبل تکراری آن هنوز معتبرند
+        errors = [error for error in self.errors
+                  if not start < error[0] <= start + len(region) or error in self._label_errors]
+        pc = bisect.bisect_left(self.program.lines, start + 1)
+        for lineno, entry in enumerate(region, start + 1):
+            if entry[1] is not None or entry[2] is not None:
+                program[pc] = self._resolve(entry, pc, self.labels, errors, lineno)
+                pc += 1
+        errors.sort()
+        self.errors = errors
+        self.program = AssembledProgram(program, self.program.lines)
+
+    def _link(self):
+        """ساخت دوباره جدول لیبل‌ها و برنامه از نتیجه خطوط (بدون پارس دوباره)"""
+        labels = {}
+        errors = []
+        source_lines = array('I')
+        placed = []   # (شماره خط، entry) هر دستور به ترتیب pc
+        for lineno, entry in enumerate(self._entries, 1):
+            label = entry[0]
+            if label is not None:
+                if label in labels:
+                    errors.append((lineno, f"Duplicate label: {label}"))
+                labels[label] = len(placed)
+            if entry[1] is not None or entry[2] is not None:
+                placed.append((lineno, entry))
+                source_lines.append(lineno)
+        self._label_errors = set(errors)
+        program = [entry[1] if entry[2] is None and entry[3] is None
+                   else self._resolve(entry, pc, labels, errors, lineno)
+                   for pc, (lineno, entry) in enumerate(placed)]
+        errors.sort()
+        self.labels = labels
+        self.errors = errors
+        self.program = AssembledProgram(program, source_lines)
@@ -1,14 +1,376 @@
 # isa/decoder.py
+from enum import IntEnum
+
+
+class Opcode(IntEnum):
+    """کد عددی دستورات (به جای رشته‌هایی مثل 'ADD' در هر سیکل)"""
+    NOP = 0
+    ADD = 1
+    SUB = 2
+    AND = 3
+    OR = 4
+    XOR = 5
+    ADDI = 6
+    BEQ = 7
+    BNE = 8
+    JAL = 9
+    JALR = 10
+    LUI = 11
+    AUIPC = 12
+    LOAD = 13    # بارگذاری ۶۴ بیتی (نام قدیمی LD)
+    STORE = 14   # ذخیره ۶۴ بیتی (نام قدیمی SD)
+    LB = 15
+    LH = 16
+    LW = 17
+    LD = 18
+    LBU = 19
+    LHU = 20
+    LWU = 21
+    SB = 22
+    SH = 23
+    SW = 24
+    SD = 25
+    # بقیه دستورات پایه RV64I
+    SLL = 26
+    SLT = 27
+    SLTU = 28
+    SRL = 29
+    SRA = 30
+    ADDW = 31
+    SUBW = 32
+    SLLW = 33
+    SRLW = 34
+    SRAW = 35
+    SLTI = 36
+    SLTIU = 37
+    XORI = 38
+    ORI = 39
+    ANDI = 40
+    SLLI = 41
+    SRLI = 42
+    SRAI = 43
+    ADDIW = 44
+    SLLIW = 45
+    SRLIW = 46
+    SRAIW = 47
+    BLT = 48
+    BGE = 49
+    BLTU = 50
+    BGEU = 51
+    FENCE = 52
+    ECALL = 53
+    EBREAK = 54
+    ILLEGAL = 55   # کلمه‌ای که دیکد نمی‌شود (مثلاً داده داخل بخش text)
+
+
+class OperandClass(IntEnum):
+    """دسته عملوندهای دستور (نحوه استفاده از rd, rs1, rs2, imm)"""
+    NONE = 0     # بدون عملوند (NOP)
+    R = 1        # rd, rs1, rs2
+    I = 2        # rd, rs1, imm
+    LOAD = 3     # rd, imm(rs1)
+    STORE = 4    # rs2, imm(rs1)
+    BRANCH = 5   # rs1, rs2, offset
+    UPPER = 6    # rd, imm  (LUI/AUIPC)
+    JUMP = 7     # rd, offset (JAL)
+
+
+# دسته عملوند هر دستور
+OPERAND_CLASS = {
+    Opcode.NOP: OperandClass.NONE,
+    Opcode.ADD: OperandClass.R,
+    Opcode.SUB: OperandClass.R,
+    Opcode.AND: OperandClass.R,
+    Opcode.OR: OperandClass.R,
+    Opcode.XOR: OperandClass.R,
+    Opcode.ADDI: OperandClass.I,
+    Opcode.JALR: OperandClass.I,
+    Opcode.LOAD: OperandClass.LOAD,
+    Opcode.LB: OperandClass.LOAD,
+    Opcode.LH: OperandClass.LOAD,
+    Opcode.LW: OperandClass.LOAD,
+    Opcode.LD: OperandClass.LOAD,
+    Opcode.LBU: OperandClass.LOAD,
+    Opcode.LHU: OperandClass.LOAD,
+    Opcode.LWU: OperandClass.LOAD,
+    Opcode.STORE: OperandClass.STORE,
+    Opcode.SB: OperandClass.STORE,
+    Opcode.SH: OperandClass.STORE,
+    Opcode.SW: OperandClass.STORE,
+    Opcode.SD: OperandClass.STORE,
+    Opcode.BEQ: OperandClass.BRANCH,
+    Opcode.BNE: OperandClass.BRANCH,
+    Opcode.LUI: OperandClass.UPPER,
+    Opcode.AUIPC: OperandClass.UPPER,
+    Opcode.JAL: OperandClass.JUMP,
+    Opcode.FENCE: OperandClass.NONE,
+    Opcode.ECALL: OperandClass.NONE,
+    Opcode.EBREAK: OperandClass.NONE,
+    Opcode.ILLEGAL: OperandClass.NONE,
+}
+for _op in (Opcode.SLL, Opcode.SLT, Opcode.SLTU, Opcode.SRL, Opcode.SRA,
+            Opcode.ADDW, Opcode.SUBW, Opcode.SLLW, Opcode.SRLW, Opcode.SRAW):
+    OPERAND_CLASS[_op] = OperandClass.R
+for _op in (Opcode.SLTI, Opcode.SLTIU, Opcode.XORI, Opcode.ORI, Opcode.ANDI,
+            Opcode.SLLI, Opcode.SRLI, Opcode.SRAI,
+            Opcode.ADDIW, Opcode.SLLIW, Opcode.SRLIW, Opcode.SRAIW):
+    OPERAND_CLASS[_op] = OperandClass.I
+for _op in (Opcode.BLT, Opcode.BGE, Opcode.BLTU, Opcode.BGEU):
+    OPERAND_CLASS[_op] = OperandClass.BRANCH
+
+# دستوراتی که اجرای برنامه را متوقف می‌کنند (فراخوانی سیستمی شبیه‌سازی نمی‌شود)
+HALT_OPS = (Opcode.ECALL, Opcode.EBREAK)
+
+# اندازه دسترسی حافظه (بایت) و گسترش علامت برای load/store ها
+MEM_ACCESS = {
+    Opcode.LOAD: (8, False),
+    Opcode.LB: (1, True),
+    Opcode.LH: (2, True),
+    Opcode.LW: (4, True),
+    Opcode.LD: (8, False),
+    Opcode.LBU: (1, False),
+    Opcode.LHU: (2, False),
+    Opcode.LWU: (4, False),
+    Opcode.STORE: (8, False),
+    Opcode.SB: (1, False),
+    Opcode.SH: (2, False),
+    Opcode.SW: (4, False),
+    Opcode.SD: (8, False),
+}
+
+_WRITES_RD = (OperandClass.R, OperandClass.I, OperandClass.LOAD,
+              OperandClass.UPPER, OperandClass.JUMP)
+_READS_RS1 = (OperandClass.R, OperandClass.I, OperandClass.LOAD,
+              OperandClass.STORE, OperandClass.BRANCH)
+_READS_RS2 = (OperandClass.R, OperandClass.STORE, OperandClass.BRANCH)
+
+
+class DecodedInstr:
+    """
+    نمایش فشرده و از پیش دیکد شده یک دستور
+
+    همه فیلدها یک بار در زمان بارگذاری برنامه محاسبه می‌شوند تا مراحل
+    pipeline و واحد کنترل در هر سیکل فقط ویژگی‌ها را بخوانند.
+    """
+    __slots__ = ('op', 'name', 'rd', 'rs1', 'rs2', 'imm', 'kind',
+                 'writes_rd', 'reads_rs1', 'reads_rs2',
+                 'is_load', 'is_store', 'is_branch', 'is_jump',
+                 'mem_size', 'mem_signed', 'operands')
+
+    def __init__(self, op, rd=0, rs1=0, rs2=0, imm=None):
+        kind = OPERAND_CLASS[op]
+        self.op = op                      # کد عددی دستور (Opcode)
+        self.name = op.name               # نام دستور برای نمایش و لاگ
+        self.rd = rd or 0                 # رجیستر مقصد
+        self.rs1 = rs1 or 0               # رجیستر اول منبع
+        self.rs2 = rs2 or 0               # رجیستر دوم منبع
+        self.imm = imm                    # مقدار immediate (None برای R-type)
+        self.kind = kind                  # دسته عملوندها
+        # پرچم‌ها: نوشتن در rd (غیر از x0) و خواندن rs1/rs2
+        self.writes_rd = kind in _WRITES_RD and self.rd != 0
+        self.reads_rs1 = kind in _READS_RS1
+        self.reads_rs2 = kind in _READS_RS2
+        self.is_load = kind == OperandClass.LOAD
+        self.is_store = kind == OperandClass.STORE
+        # اندازه و علامت دسترسی حافظه (۰ برای دستورات غیر حافظه‌ای)
+        self.mem_size, self.mem_signed = MEM_ACCESS.get(op, (0, False))
+        self.is_branch = kind == OperandClass.BRANCH
+        # JAL/JALR و ECALL/EBREAK (پرش به بیرون برنامه) جریان اجرا را عوض می‌کنند
+        self.is_jump = op in (Opcode.JAL, Opcode.JALR) or op in HALT_OPS
+        # تاپل عملوندها برای حلقه‌های داغ (unpack سریع)
+        self.operands = (int(op), self.rd, self.rs1, self.rs2, imm or 0)
+
+    def __repr__(self):
+        fields = [self.name]
+        if self.kind in _WRITES_RD:
+            fields.append(f"rd=x{self.rd}")
+        if self.reads_rs1:
+            fields.append(f"rs1=x{self.rs1}")
+        if self.reads_rs2:
+            fields.append(f"rs2=x{self.rs2}")
+        if self.imm is not None:
+            fields.append(f"imm={self.imm}")
+        return "<" + " ".join(fields) + ">"
+
+
 def decode(instr):
     """
     دیکد کردن دستور
     ورودی: دیکشنری مثل {'op': 'ADD', 'rd': 3, 'rs1': 1, 'rs2': 2, 'imm': None}
-    خروجی: دیکشنری کامل شده با کلیدهای op, rd, rs1, rs2, imm
-    """
-    return {
-        'op': instr.get('op'),       # نوع عملیات (مثلاً ADD, SUB, ...)
-        'rd': instr.get('rd'),       # رجیستر مقصد
-        'rs1': instr.get('rs1'),     # رجیستر اول منبع
-        'rs2': instr.get('rs2'),     # رجیستر دوم منبع
-        'imm': instr.get('imm', None)  # مقدار immediate (اگر وجود داشته باشد)
-    }
+    خروجی: DecodedInstr با کد عددی، دسته عملوند و پرچم‌های از پیش محاسبه شده
+    """
+    if isinstance(instr, DecodedInstr):
+        return instr  # قبلاً دیکد شده است
+    name = instr.get('op')
+    try:
+        op = Opcode[name]
+    except KeyError:
+        raise ValueError(f"Unsupported operation: {name}") from None
+    return DecodedInstr(op, instr.get('rd'), instr.get('rs1'),
+                        instr.get('rs2'), instr.get('imm', None))
+
+
+# کش برنامه‌های دیکد شده: id(program) → (program, decoded)
+_PREDECODE_CACHE = {}
+_PREDECODE_CACHE_SIZE = 16
+
+
+def predecode_program(program):
+    """
+    تبدیل کل برنامه (خروجی parse_final_program) به لیست DecodedInstr
+
+    نتیجه برای هر برنامه کش می‌شود تا اجراهای تکراری و گام‌های GUI
+    دوباره دیکد نکنند. کش با هویت لیست کار می‌کند، پس برنامه بعد از اولین
+    فراخوانی نباید تغییر کند؛ اگر لیست در جا ویرایش شد (مثلاً program[0] = ...)
+    باید invalidate_predecode_cache(program) صدا زده شود.
+    """
+    key = id(program)
+    cached = _PREDECODE_CACHE.get(key)
+    if cached is not None and cached[0] is program and len(cached[1]) == len(program):
+        return cached[1]
+
+    if program and isinstance(program[0], DecodedInstr):
+        return program  # برنامه از قبل به صورت فشرده است
+
+    decoded = []
+    for pc, instr in enumerate(program):
+        try:
+            decoded.append(decode(instr))
+        except ValueError as e:
+            raise ValueError(f"{e} at PC={pc}") from None
+
+    if len(_PREDECODE_CACHE) >= _PREDECODE_CACHE_SIZE:
+        # حذف قدیمی‌ترین ورودی (دیکشنری ترتیب درج را حفظ می‌کند)
+        del _PREDECODE_CACHE[next(iter(_PREDECODE_CACHE))]
+    _PREDECODE_CACHE[key] = (program, decoded)
+    return decoded
+
+
+def invalidate_predecode_cache(program=None):
+    """
+    باطل کردن کش دیکد (مثلاً بعد از ویرایش در جای برنامه)
+
+    Args:
+        program: برنامه‌ای که کش آن باید حذف شود؛ None یعنی همه برنامه‌ها
+    """
+    if program is None:
+        _PREDECODE_CACHE.clear()
+    else:
+        _PREDECODE_CACHE.pop(id(program), None)
+
+
+# ---------------- دیکدر باینری ۳۲ بیتی RV64I ----------------
+
+def _sext(value, bits):
+    """گسترش علامت یک فیلد bits بیتی"""
+    sign = 1 << (bits - 1)
+    return (value & (sign - 1)) - (value & sign)
+
+
+# (funct7, funct3) → Opcode برای OP و OP-32
+_OP_R = {
+    (0x00, 0): Opcode.ADD, (0x20, 0): Opcode.SUB, (0x00, 1): Opcode.SLL,
+    (0x00, 2): Opcode.SLT, (0x00, 3): Opcode.SLTU, (0x00, 4): Opcode.XOR,
+    (0x00, 5): Opcode.SRL, (0x20, 5): Opcode.SRA, (0x00, 6): Opcode.OR,
+    (0x00, 7): Opcode.AND,
+}
+_OP_R32 = {
+    (0x00, 0): Opcode.ADDW, (0x20, 0): Opcode.SUBW, (0x00, 1): Opcode.SLLW,
+    (0x00, 5): Opcode.SRLW, (0x20, 5): Opcode.SRAW,
+}
+# funct3 → Opcode
+_OP_IMM = {0: Opcode.ADDI, 2: Opcode.SLTI, 3: Opcode.SLTIU, 4: Opcode.XORI,
+           6: Opcode.ORI, 7: Opcode.ANDI}
+_OP_LOAD = {0: Opcode.LB, 1: Opcode.LH, 2: Opcode.LW, 3: Opcode.LD,
+            4: Opcode.LBU, 5: Opcode.LHU, 6: Opcode.LWU}
+_OP_STORE = {0: Opcode.SB, 1: Opcode.SH, 2: Opcode.SW, 3: Opcode.SD}
+_OP_BRANCH = {0: Opcode.BEQ, 1: Opcode.BNE, 4: Opcode.BLT, 5: Opcode.BGE,
+              6: Opcode.BLTU, 7: Opcode.BGEU}
+
+
+def _decode_word(word):
+    opcode = word & 0x7F
+    rd = (word >> 7) & 0x1F
+    funct3 = (word >> 12) & 0x7
+    rs1 = (word >> 15) & 0x1F
+    rs2 = (word >> 20) & 0x1F
+    funct7 = word >> 25
+
+    if opcode == 0x33:      # OP
+        op = _OP_R.get((funct7, funct3))
+        if op is not None:
+            return DecodedInstr(op, rd, rs1, rs2)
+    elif opcode == 0x3B:    # OP-32
+        op = _OP_R32.get((funct7, funct3))
+        if op is not None:
+            return DecodedInstr(op, rd, rs1, rs2)
+    elif opcode == 0x13:    # OP-IMM
+        if funct3 in _OP_IMM:
+            return DecodedInstr(_OP_IMM[funct3], rd, rs1, imm=_sext(word >> 20, 12))
+        shamt = (word >> 20) & 0x3F
+        if funct3 == 1 and word >> 26 == 0:
+            return DecodedInstr(Opcode.SLLI, rd, rs1, imm=shamt)
+        if funct3 == 5 and word >> 26 in (0x00, 0x10):
+            op = Opcode.SRAI if word >> 26 else Opcode.SRLI
+            return DecodedInstr(op, rd, rs1, imm=shamt)
+    elif opcode == 0x1B:    # OP-IMM-32
+        if funct3 == 0:
+            return DecodedInstr(Opcode.ADDIW, rd, rs1, imm=_sext(word >> 20, 12))
+        if funct3 == 1 and funct7 == 0:
+            return DecodedInstr(Opcode.SLLIW, rd, rs1, imm=rs2)
+        if funct3 == 5 and funct7 in (0x00, 0x20):
+            op = Opcode.SRAIW if funct7 else Opcode.SRLIW
+            return DecodedInstr(op, rd, rs1, imm=rs2)
+    elif opcode == 0x03:    # LOAD
+        if funct3 in _OP_LOAD:
+            return DecodedInstr(_OP_LOAD[funct3], rd, rs1, imm=_sext(word >> 20, 12))
+    elif opcode == 0x23:    # STORE
+        if funct3 in _OP_STORE:
+            imm = _sext((funct7 << 5) | rd, 12)
+            return DecodedInstr(_OP_STORE[funct3], rs1=rs1, rs2=rs2, imm=imm)
+    elif opcode == 0x63:    # BRANCH
+        imm = _sext(((word >> 31) << 12) | (((word >> 7) & 1) << 11)
+                    | (((word >> 25) & 0x3F) << 5) | (((word >> 8) & 0xF) << 1), 13)
+        if funct3 in _OP_BRANCH and not imm & 3:
+            # آفست‌ها مثل اسمبلر بر حسب تعداد دستور ذخیره می‌شوند
+            return DecodedInstr(_OP_BRANCH[funct3], rs1=rs1, rs2=rs2, imm=imm >> 2)
+    elif opcode == 0x6F:    # JAL
+        imm = _sext(((word >> 31) << 20) | (((word >> 12) & 0xFF) << 12)
+                    | (((word >> 20) & 1) << 11) | (((word >> 21) & 0x3FF) << 1), 21)
+        if not imm & 3:
+            return DecodedInstr(Opcode.JAL, rd, imm=imm >> 2)
+    elif opcode == 0x67:    # JALR
+        if funct3 == 0:
+            return DecodedInstr(Opcode.JALR, rd, rs1, imm=_sext(word >> 20, 12))
+    elif opcode == 0x37:    # LUI
+        return DecodedInstr(Opcode.LUI, rd, imm=_sext(word >> 12, 20))
+    elif opcode == 0x17:    # AUIPC
+        return DecodedInstr(Opcode.AUIPC, rd, imm=_sext(word >> 12, 20))
+    elif opcode == 0x0F:    # FENCE / FENCE.I
+        return DecodedInstr(Opcode.FENCE)
+    elif opcode == 0x73:    # SYSTEM
+        if word == 0x00000073:
+            return DecodedInstr(Opcode.ECALL)
+        if word == 0x00100073:
+            return DecodedInstr(Opcode.EBREAK)
+
+    # کدگذاری ناشناخته (داده، فشرده یا افزونه‌های دیگر): فقط در صورت اجرا خطا می‌دهد
+    return DecodedInstr(Opcode.ILLEGAL, imm=word)
+
+
+# کش دیکد بر اساس کلمه ۳۲ بیتی: کد داغ فقط یک بار دیکد می‌شود
+_WORD_CACHE = {}
+
+
+def decode_word(word):
+    """
+    دیکد کردن یک کلمه ۳۲ بیتی RV64I (قالب‌های R/I/S/B/U/J)
+
+    نتیجه برای هر کلمه کش می‌شود؛ چون DecodedInstr به PC وابسته نیست،
+    دستورات یکسان در آدرس‌های مختلف یک شیء مشترک دارند. آفست شاخه‌ها
+    و JAL بر حسب تعداد دستور (بایت / ۴) است.
+    """
+    instr = _WORD_CACHE.get(word)
+    if instr is None:
+        instr = _WORD_CACHE[word] = _decode_word(word)
+    return instr
@@ -0,0 +1,131 @@
+# isa/elf_loader.py
+# بارگذاری فایل‌های اجرایی ELF64 (RV64I، لینک ایستا) در حافظه شبیه‌ساز
+import struct
+
+from isa.decoder import decode_word
+
+# ---------------- ثابت‌های ELF ----------------
+EM_RISCV = 243          # e_machine برای RISC-V
+PT_LOAD = 1             # سگمنت قابل بارگذاری
+PF_X = 1                # پرچم اجرایی سگمنت
+SHT_SYMTAB = 2          # بخش جدول نمادها
+EF_RISCV_RVC = 0x1      # باینری از دستورات فشرده (C) استفاده می‌کند
+STT_NOTYPE, STT_FUNC = 0, 2
+
+_EHDR = struct.Struct('<16sHHIQQQIHHHHHH')
+_PHDR = struct.Struct('<IIQQQQQQ')
+_SHDR = struct.Struct('<IIQQQQIIQQ')
+_SYM = struct.Struct('<IBBHQQ')
+
+# بالای پشته پیش‌فرض (sp) برای برنامه‌های بارگذاری شده
+DEFAULT_STACK_TOP = 0x7FFFF000
+
+
+class ElfProgram(list):
+    """
+    برنامه بارگذاری شده از ELF: لیست DecodedInstr بخش اجرایی
+
+    مثل خروجی parse_final_program، PC شماره دستور است؛ آدرس بایتی دستور
+    شماره i برابر text_base + 4 * i است و اجرا از entry شروع می‌شود.
+    """
+
+    def __init__(self, instructions, text_base, entry, path=None):
+        super().__init__(instructions)
+        self.text_base = text_base  # آدرس بایتی دستور اول
+        self.entry = entry          # شماره دستور نقطه ورود
+        self.path = path
+
+    def address_of(self, pc):
+        """آدرس بایتی دستور با شماره pc"""
+        return self.text_base + 4 * pc
+
+    def pc_of(self, address):
+        """شماره دستور در آدرس بایتی داده شده"""
+        return (address - self.text_base) >> 2
+
+
+def _read_header(data):
+    if len(data) < _EHDR.size or data[:4] != b'\x7fELF':
+        raise ValueError("Not an ELF file")
+    (ident, e_type, e_machine, e_version, e_entry, e_phoff, e_shoff, e_flags,
+     e_ehsize, e_phentsize, e_phnum, e_shentsize, e_shnum, e_shstrndx) = _EHDR.unpack_from(data)
+    if ident[4] != 2 or ident[5] != 1:
+        raise ValueError("Only little-endian ELF64 files are supported")
+    if e_machine != EM_RISCV:
+        raise ValueError(f"Not a RISC-V ELF file (e_machine={e_machine})")
+    if e_flags & EF_RISCV_RVC:
+        raise ValueError("Compressed (RVC) binaries are not supported; build with -march=rv64i")
+    return e_entry, e_phoff, e_phnum, e_phentsize, e_shoff, e_shnum, e_shentsize
+
+
+def _read_symbols(data, e_shoff, e_shnum, e_shentsize):
+    """نمادهای تابع/بدون نوع از .symtab: نام → آدرس"""
+    symbols = {}
+    for i in range(e_shnum):
+        sh = _SHDR.unpack_from(data, e_shoff + i * e_shentsize)
+        if sh[1] != SHT_SYMTAB:
+            continue
+        offset, size, link, entsize = sh[4], sh[5], sh[6], sh[9] or _SYM.size
+        strtab = _SHDR.unpack_from(data, e_shoff + link * e_shentsize)
+        str_offset = strtab[4]
+        for sym_offset in range(offset, offset + size, entsize):
+            st_name, st_info, _, st_shndx, st_value, _ = _SYM.unpack_from(data, sym_offset)
+            if not st_name or st_shndx == 0 or (st_info & 0xF) not in (STT_NOTYPE, STT_FUNC):
+                continue
+            end = data.index(b'\0', str_offset + st_name)
+            symbols[data[str_offset + st_name:end].decode('utf-8', 'replace')] = st_value
+    return symbols
+
+
+def load_elf(filename, mem, regs=None, stack_top=DEFAULT_STACK_TOP):
+    """
+    بارگذاری فایل ELF64 لینک شده ایستا برای RV64I
+
+    همه سگمنت‌های PT_LOAD در حافظه کپی می‌شوند (bss صفر می‌ماند) و کلمات
+    سگمنت اجرایی شامل نقطه ورود با decode_word دیکد می‌شوند.
+
+    Args:
+        filename: مسیر فایل ELF
+        mem: حافظه سیستم (cpu.memory.Memory)
+        regs: اگر داده شود sp و gp مقداردهی می‌شوند
+        stack_top: مقدار اولیه sp
+
+    Returns:
+        tuple: (ElfProgram, labels) که labels نام نماد → شماره دستور است
+    """
+    with open(filename, 'rb') as f:
+        data = f.read()
+    e_entry, e_phoff, e_phnum, e_phentsize, e_shoff, e_shnum, e_shentsize = _read_header(data)
+
+    text = None
+    for i in range(e_phnum):
+        p_type, p_flags, p_offset, p_vaddr, _, p_filesz, p_memsz, _ = \
+            _PHDR.unpack_from(data, e_phoff + i * e_phentsize)
+        if p_type != PT_LOAD:
+            continue
+        mem.write_bytes(p_vaddr, data[p_offset:p_offset + p_filesz])
+        if p_memsz > p_filesz:
+            mem.write_bytes(p_vaddr + p_filesz, bytes(p_memsz - p_filesz))  # bss
+        if p_flags & PF_X and p_vaddr <= e_entry < p_vaddr + p_filesz:
+            text = (p_vaddr, data[p_offset:p_offset + (p_filesz & ~3)])
+
+    if text is None:
+        raise ValueError(f"No executable segment contains the entry point 0x{e_entry:X}")
+    text_base, code = text
+    if (e_entry - text_base) & 3:
+        raise ValueError(f"Entry point 0x{e_entry:X} is not 4-byte aligned")
+
+    # کلمات تکراری (مثل ADDI/LD رایج) فقط یک بار دیکد می‌شوند
+    instructions = [decode_word(word) for (word,) in struct.iter_unpack('<I', code)]
+    program = ElfProgram(instructions, text_base, (e_entry - text_base) >> 2, filename)
+
+    symbols = _read_symbols(data, e_shoff, e_shnum, e_shentsize) if e_shoff else {}
+    text_end = text_base + 4 * len(program)
+    labels = {name: (addr - text_base) >> 2 for name, addr in symbols.items()
+              if text_base <= addr < text_end and not (addr - text_base) & 3}
+
+    if regs is not None:
+        regs.write(2, stack_top)  # sp
+        if '__global_pointer$' in symbols:
+            regs.write(3, symbols['__global_pointer$'])  # gp
+    return program, labels
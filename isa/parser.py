@@ -1,5 +1,17 @@
 # ===========================================================================
 # اجرا کننده برنامه اسمبلی
+from isa.assembler import assemble_file
+
+# دستورات بارگذاری و ذخیره با عرض‌های مختلف (LOAD/STORE همان LD/SD هستند)
+LOAD_OPS = ["LOAD", "LB", "LH", "LW", "LD", "LBU", "LHU", "LWU"]
+STORE_OPS = ["STORE", "SB", "SH", "SW", "SD"]
+
+# بقیه دستورات RV64I بر اساس قالب عملوندها
+R_OPS = ["ADD", "SUB", "AND", "OR", "XOR", "SLL", "SLT", "SLTU", "SRL", "SRA",
+         "ADDW", "SUBW", "SLLW", "SRLW", "SRAW"]
+I_OPS = ["ADDI", "SLTI", "SLTIU", "XORI", "ORI", "ANDI", "SLLI", "SRLI", "SRAI",
+         "ADDIW", "SLLIW", "SRLIW", "SRAIW"]
+BRANCH_OPS = ["BEQ", "BNE", "BLT", "BGE", "BLTU", "BGEU"]
 
 # تبدیل نام رجیستر به شماره رجیستر (مثلاً "x5" → 5)
 def parse_register(reg):
@@ -31,15 +43,15 @@ def parse_line_with_labels(line, labels, current_pc):
     parts = line.replace(",", " ").split()  # جدا کردن قسمت‌ها و حذف کاما
     op = parts[0].upper()  # عملیات به حروف بزرگ
 
-    if op == "ADDI":
-        # دستور ADDI: rd, rs1, imm
+    if op in I_OPS:
+        # دستورات با مقدار فوری مثل ADDI: rd, rs1, imm
         return {"op": op, "rd": parse_register(parts[1]), "rs1": parse_register(parts[2]), "imm": int(parts[3], 0)}
 
-    elif op in ["ADD", "SUB", "AND", "OR", "XOR"]:
+    elif op in R_OPS:
         # دستورات سه‌رجیستری: rd, rs1, rs2
         return {"op": op, "rd": parse_register(parts[1]), "rs1": parse_register(parts[2]), "rs2": parse_register(parts[3])}
 
-    elif op in ["BEQ", "BNE"]:
+    elif op in BRANCH_OPS:
         # دستورات شرطی شاخه‌ای: rs1, rs2, label
         rs1 = parse_register(parts[1])
         rs2 = parse_register(parts[2])
@@ -48,19 +60,40 @@ def parse_line_with_labels(line, labels, current_pc):
         offset = target_pc - current_pc  # محاسبه آفست نسبت به PC فعلی
         return {"op": op, "rs1": rs1, "rs2": rs2, "imm": offset}
 
-    elif op in ["LOAD", "LW"]:
+    elif op in LOAD_OPS:
         # دستور بارگذاری: rd, offset(rs1)
-        # مثال: LOAD x1, 4(x2) یا LW x1, 4(x2)
+        # مثال: LOAD x1, 8(x2) (۶۴ بیتی) یا LW x1, 4(x2) (۳۲ بیتی با گسترش علامت)
         rd = parse_register(parts[1])
         offset, rs1 = parse_memory_address(parts[2])
-        return {"op": "LOAD", "rd": rd, "rs1": rs1, "imm": offset}
+        return {"op": op, "rd": rd, "rs1": rs1, "imm": offset}
 
-    elif op in ["STORE", "SW"]:
+    elif op in STORE_OPS:
         # دستور ذخیره: rs2, offset(rs1)
-        # مثال: STORE x1, 4(x2) یا SW x1, 4(x2)
+        # مثال: STORE x1, 8(x2) (۶۴ بیتی) یا SW x1, 4(x2) (۳۲ بیت پایینی)
         rs2 = parse_register(parts[1])  # رجیستر حاوی داده برای ذخیره
         offset, rs1 = parse_memory_address(parts[2])  # آدرس مقصد
-        return {"op": "STORE", "rs1": rs1, "rs2": rs2, "imm": offset}
+        return {"op": op, "rs1": rs1, "rs2": rs2, "imm": offset}
+
+    elif op == "JAL":
+        # دستور پرش و لینک: rd, label (آفست بر حسب تعداد دستور)
+        return {"op": op, "rd": parse_register(parts[1]), "imm": labels[parts[2]] - current_pc}
+
+    elif op == "JALR":
+        # پرش غیر مستقیم: rd, offset(rs1) یا rd, rs1, offset
+        rd = parse_register(parts[1])
+        if len(parts) == 3:
+            offset, rs1 = parse_memory_address(parts[2])
+        else:
+            rs1, offset = parse_register(parts[2]), int(parts[3], 0)
+        return {"op": op, "rd": rd, "rs1": rs1, "imm": offset}
+
+    elif op in ["LUI", "AUIPC"]:
+        # بارگذاری ۲۰ بیت بالا: rd, imm
+        return {"op": op, "rd": parse_register(parts[1]), "imm": int(parts[2], 0)}
+
+    elif op in ["ECALL", "EBREAK", "FENCE", "NOP"]:
+        # دستورات بدون عملوند (ECALL/EBREAK اجرا را متوقف می‌کنند)
+        return {"op": op}
 
     else:
         raise NotImplementedError(f"Unsupported op: {op}")  # اگر دستور پشتیبانی نشده باشد
@@ -103,9 +136,6 @@ def parse_final_program(raw_lines, labels):
     return program
 
 # خواندن برنامه اسمبلی از فایل متنی با پسوند .s
+# (با اسمبلر دو گذره isa.assembler: خروجی از پیش دیکد شده و کش شده روی دیسک)
 def load_assembly_file(filename):
-    with open(filename, 'r') as f:
-        asm_text = f.read()  # خواندن کل متن فایل
-    raw_lines, labels = parse_program_with_labels(asm_text)  # جدا کردن خطوط و لیبل‌ها
-    program = parse_final_program(raw_lines, labels)         # ساخت برنامه به صورت دیکشنری‌ها
-    return program, labels  # بازگشت برنامه و لیبل‌ها
+    return assemble_file(filename)  # بازگشت برنامه و لیبل‌ها
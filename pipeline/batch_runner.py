@@ -0,0 +1,160 @@
+# pipeline/batch_runner.py
+# اجرای دسته‌ای تعداد زیادی برنامه روی چند هسته پردازنده (ProcessPoolExecutor)
+#
+# هر کار (job) یک دیکشنری ساده است تا بین پردازه‌ها pickle شود:
+#   {"program": "tests/add.s", "regs": {"x1": 100}, "mem": {"0x100": 5},
+#    "engine": "pipeline", "max_cycles": 100000}
+# هر worker برنامه را خودش بارگذاری و بدون ردیابی اجرا می‌کند و فقط یک
+# دیکشنری نتیجه کوچک (رجیسترها، digest حافظه، آمار) برمی‌گرداند.
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from cpu.registers import RegisterFile
+from cpu.memory import Memory
+from cpu.trace import Tracer, OFF
+from isa.parser import load_assembly_file
+from isa.elf_loader import load_elf
+from pipeline.pipeline_runner import PipelineSimulator
+from pipeline.functional_runner import run_functional
+from pipeline.block_translator import run_translated
+
+ENGINES = ("pipeline", "functional", "translated")
+PROGRAM_SUFFIXES = (".s", ".elf")
+
+# سقف پیش‌فرض اجرای هر برنامه (سیکل برای pipeline، دستور برای موتورهای تابعی)
+DEFAULT_LIMIT = 10 ** 7
+
+
+def _parse_int(value):
+    """عدد از JSON: int یا رشته دهدهی/هگز ("0x100")"""
+    return value if isinstance(value, int) else int(value, 0)
+
+
+def _parse_register(name):
+    """شماره رجیستر از "x5"، "5" یا 5"""
+    if isinstance(name, str) and name[:1] in ("x", "X"):
+        name = name[1:]
+    index = _parse_int(name)
+    if not 0 <= index < 32:
+        raise ValueError(f"Invalid register: {name}")
+    return index
+
+
+def load_manifest(path):
+    """
+    ساخت لیست کارها از یک پوشه یا فایل manifest
+
+    پوشه: همه فایل‌های .s و .elf به ترتیب نام، بدون مقداردهی اولیه.
+    manifest: فایل JSON شامل لیست کارها یا JSON Lines (یک کار در هر خط)؛
+    مسیر برنامه‌ها نسبت به پوشه manifest است.
+    """
+    if os.path.isdir(path):
+        return [{"program": os.path.join(path, name)} for name in sorted(os.listdir(path))
+                if name.endswith(PROGRAM_SUFFIXES)]
+
+    with open(path) as f:
+        text = f.read()
+    if text.lstrip().startswith("["):
+        jobs = json.loads(text)
+    else:
+        jobs = [json.loads(line) for line in text.splitlines() if line.strip()]
+    root = os.path.dirname(os.path.abspath(path))
+    for job in jobs:
+        if "program" not in job:
+            raise ValueError(f"Manifest entry without a program: {job}")
+        job["program"] = os.path.join(root, job["program"])
+    return jobs
+
+
+def load_program(path, mem, regs):
+    """
+    بارگذاری برنامه اسمبلی یا ELF (تشخیص از روی محتوای فایل)
+
+    Returns:
+        tuple: (program, labels)
+    """
+    with open(path, "rb") as f:
+        is_elf = f.read(4) == b"\x7fELF"
+    if is_elf:
+        return load_elf(path, mem, regs)
+    return load_assembly_file(path)
+
+
+def apply_setup(job, mem, regs):
+    """مقداردهی اولیه رجیسترها و کلمات حافظه از فیلدهای regs و mem کار"""
+    for name, value in job.get("regs", {}).items():
+        regs.write(_parse_register(name), _parse_int(value))
+    for address, value in job.get("mem", {}).items():
+        mem.store(_parse_int(address), _parse_int(value))
+
+
+def run_job(job):
+    """
+    اجرای یک کار در پردازه فعلی (تابع worker)
+
+    خطاهای بارگذاری و اجرا گرفته می‌شوند و در فیلد error برمی‌گردند تا یک
+    برنامه خراب کل دسته را متوقف نکند.
+
+    Returns:
+        dict: نتیجه قابل تبدیل به JSON
+    """
+    path = job["program"]
+    engine = job.get("engine", "pipeline")
+    limit = job.get("max_cycles", DEFAULT_LIMIT)
+    result = {"program": path, "engine": engine}
+    start = time.perf_counter()
+    try:
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine}")
+        rf = RegisterFile()
+        mem = Memory()
+        program, _ = load_program(path, mem, rf)
+        apply_setup(job, mem, rf)
+
+        if engine == "pipeline":
+            simulator = PipelineSimulator(program, rf, mem, debug=False,
+                                          tracer=Tracer(level=OFF, capacity=1))
+            simulator.run_until(max_cycles=limit)
+            result["halted"] = simulator.halted
+            result["stats"] = simulator.stats().to_dict()
+        else:
+            run = run_functional if engine == "functional" else run_translated
+            state = run(program, rf, mem, max_instructions=limit)
+            result["halted"] = state["halted"]
+            result["stats"] = {"instret": state["instret"]}
+
+        result["regs"] = list(rf.registers)
+        result["mem_digest"] = mem.digest()
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+
+def run_batch(jobs, workers=None, chunksize=None):
+    """
+    اجرای همه کارها روی workers پردازه و برگرداندن نتایج به ترتیب کارها
+
+    نتایج به صورت generator برمی‌گردند تا فراخوان بتواند آن‌ها را همان لحظه
+    (مثلاً به صورت JSON Lines) بنویسد. با workers=1 همه چیز در همین پردازه
+    اجرا می‌شود.
+
+    Args:
+        jobs: لیست کارها (خروجی load_manifest)
+        workers: تعداد پردازه‌ها (None یعنی تعداد هسته‌ها)
+        chunksize: تعداد کار در هر ارسال به worker (None یعنی خودکار)
+    """
+    jobs = list(jobs)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            yield run_job(job)
+        return
+    if chunksize is None:
+        # چند بسته برای هر worker تا هم سربار IPC کم باشد و هم بار متعادل بماند
+        chunksize = max(1, len(jobs) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(run_job, jobs, chunksize=chunksize)
@@ -0,0 +1,182 @@
+# pipeline/benchmark.py
+# سنجش سرعت شبیه‌ساز روی مجموعه کرنل‌های examples/benchmarks
+#
+# هر کرنل روی هر موتور (pipeline، functional، translated) چند بار اجرا و
+# کمترین زمان واقعی ثبت می‌شود؛ خروجی JSON شامل زمان، سیکل‌ها و دستورهای
+# شبیه‌سازی شده و نرخ‌های سیکل/دستور بر ثانیه است. compare نتیجه را با یک
+# baseline ذخیره شده مقایسه می‌کند: تغییر تعداد سیکل/دستور (که باید قطعی
+# باشد) همیشه و افت نرخ بیش از tolerance فقط اگر خواسته شود گزارش می‌شود؛
+# نرخ‌ها به ماشین بستگی دارند و فقط با baseline همان ماشین قابل مقایسه‌اند.
+import hashlib
+import json
+import os
+import platform
+import struct
+import time
+
+from cpu.registers import RegisterFile
+from cpu.memory import Memory
+from cpu.trace import Tracer, OFF
+from pipeline.batch_runner import ENGINES, DEFAULT_LIMIT, load_manifest, load_program, apply_setup
+from pipeline.pipeline_runner import PipelineSimulator
+from pipeline.functional_runner import run_functional
+from pipeline.block_translator import run_translated, invalidate_translation_cache
+from isa.decoder import predecode_program
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             "examples", "benchmarks")
+FORMAT_VERSION = 1
+DEFAULT_TOLERANCE = 0.15   # افت مجاز نرخ اجرا نسبت به baseline
+MIN_TIME = 0.1             # حداقل زمان هر اندازه‌گیری؛ کرنل‌های کوتاه چند بار اجرا می‌شوند
+
+
+def kernel_name(job):
+    """نام کرنل: نام فایل برنامه بدون پسوند"""
+    return os.path.splitext(os.path.basename(job["program"]))[0]
+
+
+def _run_once(program, job, engine, limit):
+    """یک اجرای کامل؛ خروجی: (زمان، سیکل یا None، instret، halted، digest حالت نهایی)"""
+    rf = RegisterFile()
+    mem = Memory()
+    apply_setup(job, mem, rf)
+    if engine == "translated":
+        invalidate_translation_cache(program)   # هزینه ترجمه هم شمرده شود
+    cycles = None
+    start = time.perf_counter()
+    if engine == "pipeline":
+        simulator = PipelineSimulator(program, rf, mem, debug=False,
+                                      tracer=Tracer(level=OFF, capacity=1))
+        simulator.run_until(max_cycles=limit)
+        elapsed = time.perf_counter() - start
+        cycles, instret, halted = simulator.cycle, simulator.instret, simulator.halted
+    else:
+        run = run_functional if engine == "functional" else run_translated
+        state = run(program, rf, mem, max_instructions=limit)
+        elapsed = time.perf_counter() - start
+        instret, halted = state["instret"], state["halted"]
+    h = hashlib.blake2b(struct.pack("<32Q", *rf.registers), digest_size=16)
+    h.update(mem.digest().encode())
+    return elapsed, cycles, instret, halted, h.hexdigest()
+
+
+def run_kernel(job, engine="pipeline", repeat=3, min_time=MIN_TIME):
+    """
+    اجرای یک کرنل روی یک موتور و ساخت رکورد نتیجه
+
+    هر اندازه‌گیری کرنل را آن‌قدر اجرا می‌کند که دست‌کم min_time ثانیه طول
+    بکشد و میانگین می‌گیرد؛ زمان گزارش شده کمترین مقدار repeat اندازه‌گیری
+    است (کمترین نویز سیستم‌عامل).
+
+    Returns:
+        dict: name، engine، wall، cycles، instructions، cycles_per_sec،
+              instructions_per_sec، halted و digest حالت نهایی
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine}")
+    limit = job.get("max_cycles", DEFAULT_LIMIT)
+    program, _ = load_program(job["program"], Memory(), RegisterFile())
+    predecode_program(program)   # دیکد یک‌باره برنامه (کش می‌شود) جزو زمان‌سنجی نیست
+    wall = None
+    for _ in range(max(1, repeat)):
+        total = 0.0
+        runs = 0
+        while runs == 0 or total < min_time:
+            elapsed, cycles, instret, halted, digest = _run_once(program, job, engine, limit)
+            total += elapsed
+            runs += 1
+        wall = total / runs if wall is None else min(wall, total / runs)
+    return {
+        "name": kernel_name(job),
+        "engine": engine,
+        "wall": wall,
+        "cycles": cycles,
+        "instructions": instret,
+        "cycles_per_sec": cycles / wall if cycles is not None and wall else None,
+        "instructions_per_sec": instret / wall if wall else None,
+        "halted": halted,
+        "digest": digest,
+    }
+
+
+def run_suite(source=BENCHMARK_DIR, engines=ENGINES, repeat=3, progress=None):
+    """
+    اجرای همه کرنل‌ها روی همه موتورها (پشت سر هم، تا زمان‌ها قابل مقایسه باشند)
+
+    Args:
+        source: پوشه کرنل‌ها یا manifest (مثل batch_runner.load_manifest)
+        engines: موتورهایی که اجرا می‌شوند
+        repeat: تعداد اجرا برای هر زوج (کرنل، موتور)
+        progress: تابع اختیاری که بعد از هر نتیجه صدا زده می‌شود
+
+    Returns:
+        dict: گزارش قابل ذخیره به JSON؛ mismatches کرنل‌هایی که حالت نهایی
+              موتورهایشان فرق دارد
+    """
+    results = []
+    mismatches = []
+    for job in load_manifest(source):
+        digests = set()
+        for engine in engines:
+            result = run_kernel(job, engine, repeat)
+            results.append(result)
+            digests.add(result["digest"])
+            if progress is not None:
+                progress(result)
+        if len(digests) > 1:
+            mismatches.append(kernel_name(job))
+    return {
+        "version": FORMAT_VERSION,
+        "host": {"python": platform.python_version(), "machine": platform.machine(),
+                 "platform": platform.platform()},
+        "repeat": repeat,
+        "results": results,
+        "mismatches": mismatches,
+    }
+
+
+def load_report(path):
+    with open(path) as f:
+        report = json.load(f)
+    if report.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported benchmark report version: {report.get('version')}")
+    return report
+
+
+def save_report(report, path):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+
+def compare(report, baseline, tolerance=None):
+    """
+    مقایسه گزارش فعلی با baseline
+
+    Args:
+        tolerance: افت مجاز نرخ دستور بر ثانیه؛ None یعنی سرعت بررسی نشود
+                   (فقط سیکل‌ها و دستورها)
+
+    Returns:
+        list: برای هر زوج (کرنل، موتور) مشترک یک dict شامل name، engine،
+              speedup (نسبت نرخ دستور بر ثانیه) و لیست problems (خالی یعنی سالم)
+    """
+    previous = {(r["name"], r["engine"]): r for r in baseline["results"]}
+    rows = []
+    for result in report["results"]:
+        old = previous.get((result["name"], result["engine"]))
+        if old is None:
+            continue
+        problems = []
+        # تعداد سیکل و دستور قطعی است؛ هر تغییری یعنی رفتار شبیه‌ساز عوض شده
+        for key in ("cycles", "instructions"):
+            if result[key] != old[key]:
+                problems.append(f"{key} {old[key]} -> {result[key]}")
+        speedup = None
+        if result["instructions_per_sec"] and old["instructions_per_sec"]:
+            speedup = result["instructions_per_sec"] / old["instructions_per_sec"]
+            if tolerance is not None and speedup < 1 - tolerance:
+                problems.append(f"instructions/sec {speedup - 1:+.1%}")
+        rows.append({"name": result["name"], "engine": result["engine"],
+                     "speedup": speedup, "problems": problems})
+    return rows
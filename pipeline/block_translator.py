@@ -0,0 +1,297 @@
+# pipeline/block_translator.py
+# ترجمه پویای بلوک‌های پایه (basic block) به کد پایتون و اجرای آن‌ها
+import time
+
+from cpu.alu import HALT_PC, to_signed, sext32
+from isa.decoder import Opcode, HALT_OPS, predecode_program, invalidate_predecode_cache
+from pipeline.functional_runner import run_functional
+
+MASK64 = 0xFFFFFFFFFFFFFFFF
+
+# عبارت پایتون دستورات محاسباتی: {a}=rs1، {b}=rs2، {imm}=مقدار فوری
+_EXPRESSIONS = {
+    Opcode.ADDI: "({a} + {imm}) & %d" % MASK64,
+    Opcode.ADD: "({a} + {b}) & %d" % MASK64,
+    Opcode.SUB: "({a} - {b}) & %d" % MASK64,
+    Opcode.AND: "{a} & {b}",
+    Opcode.OR: "{a} | {b}",
+    Opcode.XOR: "{a} ^ {b}",
+    Opcode.SLL: "({a} << ({b} & 63)) & %d" % MASK64,
+    Opcode.SRL: "{a} >> ({b} & 63)",
+    Opcode.SRA: "(_s({a}) >> ({b} & 63)) & %d" % MASK64,
+    Opcode.SLT: "int(_s({a}) < _s({b}))",
+    Opcode.SLTU: "int({a} < {b})",
+    Opcode.ADDW: "_w({a} + {b})",
+    Opcode.SUBW: "_w({a} - {b})",
+    Opcode.SLLW: "_w({a} << ({b} & 31))",
+    Opcode.SRLW: "_w(({a} & 0xFFFFFFFF) >> ({b} & 31))",
+    Opcode.SRAW: "_w(_s(_w({a})) >> ({b} & 31))",
+    Opcode.SLTI: "int(_s({a}) < {imm})",
+    Opcode.SLTIU: "int({a} < {imm} & %d)" % MASK64,
+    Opcode.XORI: "{a} ^ ({imm} & %d)" % MASK64,
+    Opcode.ORI: "{a} | ({imm} & %d)" % MASK64,
+    Opcode.ANDI: "{a} & ({imm} & %d)" % MASK64,
+    Opcode.SLLI: "({a} << {imm}) & %d" % MASK64,
+    Opcode.SRLI: "{a} >> {imm}",
+    Opcode.SRAI: "(_s({a}) >> {imm}) & %d" % MASK64,
+    Opcode.ADDIW: "_w({a} + {imm})",
+    Opcode.SLLIW: "_w({a} << {imm})",
+    Opcode.SRLIW: "_w(({a} & 0xFFFFFFFF) >> {imm})",
+    Opcode.SRAIW: "_w(_s(_w({a})) >> {imm})",
+}
+
+# شرط شاخه‌ها: {a}=rs1، {b}=rs2
+_CONDITIONS = {
+    Opcode.BEQ: "{a} == {b}",
+    Opcode.BNE: "{a} != {b}",
+    Opcode.BLT: "_s({a}) < _s({b})",
+    Opcode.BGE: "_s({a}) >= _s({b})",
+    Opcode.BLTU: "{a} < {b}",
+    Opcode.BGEU: "{a} >= {b}",
+}
+
+
+def find_leaders(decoded):
+    """
+    پیدا کردن ابتدای بلوک‌های پایه (leader ها)
+
+    leader ها: دستور اول، مقصد شاخه‌ها و پرش‌های مستقیم، دستور بعد از هر
+    شاخه/پرش/ECALL و هر کلمه ILLEGAL (تا خطای آن در بلوک جداگانه باشد)
+    """
+    leaders = {0} if decoded else set()
+    for pc, instr in enumerate(decoded):
+        if instr.is_branch or instr.is_jump:
+            leaders.add(pc + 1)
+            if instr.is_branch or instr.op == Opcode.JAL:
+                leaders.add(pc + instr.imm)  # مقصد مستقیم شاخه یا JAL
+        elif instr.op == Opcode.ILLEGAL:
+            leaders.add(pc)
+    return {pc for pc in leaders if 0 <= pc < len(decoded)}
+
+
+def _r(index):
+    # نام متغیر محلی هر رجیستر؛ x0 همیشه ثابت صفر است
+    return f"x{index}" if index else "0"
+
+
+def generate_block_source(decoded, entry, leaders, base=0):
+    """
+    تولید کد پایتون یک بلوک پایه که از PC=entry شروع می‌شود
+
+    رجیسترها در ابتدای بلوک به متغیر محلی خوانده می‌شوند، ماسک ۶۴ بیتی
+    cpu/alu.py داخل عبارات قرار می‌گیرد و فقط رجیسترهای نوشته شده در
+    انتهای بلوک به فایل رجیستر برگردانده می‌شوند. اگر بلوک load/store داشته
+    باشد (که ممکن است خطا بدهد) این کار در finally انجام می‌شود تا نوشته‌های
+    قبل از دستور خطادار مثل run_functional از بین نروند.
+
+    Returns:
+        tuple: (متن کد، تعداد دستورات بلوک)
+    """
+    body = []      # خطوط بدنه تابع
+    reads = set()  # رجیسترهایی که خوانده می‌شوند
+    writes = set()  # رجیسترهایی که نوشته می‌شوند
+    exit_lines = None
+    accesses_memory = False
+    pc = entry
+    n = len(decoded)
+
+    def read(index):
+        if index:
+            reads.add(index)
+        return _r(index)
+
+    def write(index, expr):
+        if index:
+            writes.add(index)
+            body.append(f"    x{index} = {expr}")
+
+    while pc < n:
+        instr = decoded[pc]
+        op, rd, rs1, rs2, imm = instr.operands
+        count = pc - entry + 1
+
+        if op in _EXPRESSIONS:
+            if rd:
+                b = read(rs2) if instr.reads_rs2 else "0"
+                write(rd, _EXPRESSIONS[op].format(a=read(rs1), b=b, imm=imm))
+        elif op == Opcode.LUI:
+            write(rd, f"{sext32(imm << 12)}")
+        elif op == Opcode.AUIPC:
+            write(rd, f"{(base + (pc * 4) + sext32(imm << 12)) & MASK64}")
+        elif instr.is_load:
+            accesses_memory = True
+            args = f"{read(rs1)} + {imm}, {instr.mem_size}, {instr.mem_signed}"
+            write(rd, f"load({args}) & {MASK64}")
+            if not rd:
+                body.append(f"    load({args})")
+        elif instr.is_store:
+            accesses_memory = True
+            body.append(f"    store({read(rs1)} + {imm}, {read(rs2)}, {instr.mem_size})")
+        elif instr.is_branch:
+            condition = _CONDITIONS[op].format(a=read(rs1), b=read(rs2))
+            exit_lines = [
+                f"    if {condition}:",
+                f"        return {pc + imm}, {count}",
+                f"    return {pc + 1}, {count}",
+            ]
+        elif op == Opcode.JAL:
+            write(rd, f"{(base + (pc + 1) * 4) & MASK64}")
+            exit_lines = [f"    return {pc + imm}, {count}"]
+        elif op == Opcode.JALR:
+            # مقصد قبل از نوشتن rd محاسبه می‌شود (rd ممکن است همان rs1 باشد)
+            body.append(f"    target = ((({read(rs1)} + {imm}) & -2) - {base}) >> 2")
+            write(rd, f"{(base + (pc + 1) * 4) & MASK64}")
+            exit_lines = ["    return target, %d" % count]
+        elif op in HALT_OPS:
+            # ECALL/EBREAK: خروج از برنامه (مثل execute_halt)
+            exit_lines = [f"    return {HALT_PC}, {count}"]
+        elif op == Opcode.ILLEGAL:
+            exit_lines = [f"    raise ValueError('Unsupported operation: ILLEGAL at PC={pc}')"]
+        # NOP و FENCE کاری انجام نمی‌دهند
+
+        pc += 1
+        if exit_lines is not None or pc in leaders:
+            break
+
+    count = pc - entry
+    if exit_lines is None:
+        exit_lines = [f"    return {pc}, {count}"]
+
+    lines = ["def block(r, load, store):"]
+    if accesses_memory and writes:
+        # رجیسترهایی که فقط نوشته می‌شوند هم خوانده می‌شوند تا finally همیشه مقدار داشته باشد
+        lines += [f"    x{i} = r[{i}]" for i in sorted(reads | writes)]
+        lines.append("    try:")
+        lines += ["    " + line for line in body + exit_lines]
+        lines.append("    finally:")
+        lines += [f"        r[{i}] = x{i}" for i in sorted(writes)]
+    else:
+        lines += [f"    x{i} = r[{i}]" for i in sorted(reads)]
+        lines += body
+        lines += [f"    r[{i}] = x{i}" for i in sorted(writes)]
+        lines += exit_lines
+    return "\n".join(lines) + "\n", count
+
+
+class BlockCache:
+    """کش بلوک‌های ترجمه شده یک برنامه: entry PC → (تابع، تعداد دستورات)"""
+
+    def __init__(self, program):
+        self.program = program
+        self.decoded = predecode_program(program)
+        self.base = getattr(self.decoded, 'text_base', 0)  # آدرس بایتی PC=0
+        self.leaders = find_leaders(self.decoded)
+        self.blocks = {}
+
+    def get(self, entry):
+        block = self.blocks.get(entry)
+        if block is None:
+            block = self.translate(entry)
+        return block
+
+    def translate(self, entry):
+        source, count = generate_block_source(self.decoded, entry, self.leaders, self.base)
+        code = compile(source, f"<block@{entry}>", "exec")  # code object مخصوص این بلوک
+        namespace = {'_s': to_signed, '_w': sext32}
+        exec(code, namespace)
+        block = (namespace["block"], count)
+        self.blocks[entry] = block
+        return block
+
+
+# کش ترجمه برای هر برنامه: id(program) → BlockCache (مثل _PREDECODE_CACHE محدود)
+_TRANSLATION_CACHE = {}
+_TRANSLATION_CACHE_SIZE = 16
+
+
+def get_block_cache(program):
+    cache = _TRANSLATION_CACHE.get(id(program))
+    if cache is None or cache.program is not program:
+        cache = BlockCache(program)
+        _TRANSLATION_CACHE.pop(id(program), None)
+        if len(_TRANSLATION_CACHE) >= _TRANSLATION_CACHE_SIZE:
+            # حذف قدیمی‌ترین ورودی (دیکشنری ترتیب درج را حفظ می‌کند)
+            del _TRANSLATION_CACHE[next(iter(_TRANSLATION_CACHE))]
+        _TRANSLATION_CACHE[id(program)] = cache
+    return cache
+
+
+def invalidate_translation_cache(program=None):
+    """
+    باطل کردن کش ترجمه (مثلاً وقتی برنامه در GUI دوباره بارگذاری می‌شود)
+
+    ترجمه از خروجی predecode_program ساخته می‌شود، پس کش دیکد همان برنامه
+    هم باطل می‌شود.
+
+    Args:
+        program: برنامه‌ای که کش آن باید حذف شود؛ None یعنی همه برنامه‌ها
+    """
+    if program is None:
+        _TRANSLATION_CACHE.clear()
+    else:
+        _TRANSLATION_CACHE.pop(id(program), None)
+    invalidate_predecode_cache(program)
+
+
+def run_translated(program, regs, mem, max_instructions=1000000, initial_state=None):
+    """
+    اجرای برنامه با ترجمه پویای بلوک‌های پایه
+
+    معنای دستورات و خروجی مثل run_functional است؛ اگر تعداد دستورات باقی‌مانده
+    از طول بلوک کمتر باشد، بقیه با run_functional دستور به دستور اجرا می‌شود.
+
+    Args:
+        program: برنامه‌ای که باید اجرا شود
+        regs: رجیسترهای پردازنده
+        mem: حافظه سیستم
+        max_instructions: حداکثر تعداد دستورات اجرا شده در این فراخوانی
+        initial_state: حالت قبلی برای ادامه اجرا
+
+    Returns:
+        dict: حالت نهایی با همان کلیدهای run_functional
+    """
+    cache = get_block_cache(program)
+    if initial_state is None:
+        pc = [getattr(cache.decoded, 'entry', 0)]
+        instret = 0
+    else:
+        pc = initial_state['pc']
+        instret = initial_state.get('instret', 0)
+
+    get_block = cache.get
+    n = len(cache.decoded)
+    r = regs.registers
+    load = mem.load
+    store = mem.store
+
+    p = pc[0]
+    executed = 0
+    start = time.perf_counter()
+
+    while 0 <= p < n:
+        block, count = get_block(p)
+        if executed + count > max_instructions:
+            break
+        p, count = block(r, load, store)
+        executed += count
+
+    pc[0] = p
+    if 0 <= p < n and executed < max_instructions:
+        # باقی‌مانده کوتاه‌تر از یک بلوک: اجرای دقیق دستور به دستور
+        tail = run_functional(cache.decoded, regs, mem,
+                              max_instructions=max_instructions - executed,
+                              initial_state={'pc': pc})
+        executed += tail['executed']
+        p = pc[0]
+
+    elapsed = time.perf_counter() - start
+    instret += executed
+
+    state = {
+        'pc': pc,
+        'instret': instret,
+        'executed': executed,
+        'halted': not 0 <= p < n,
+        'elapsed': elapsed,
+    }
+    return state
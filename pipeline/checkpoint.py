@@ -0,0 +1,306 @@
+# pipeline/checkpoint.py
+# ذخیره و بازیابی کامل حالت شبیه‌ساز pipeline در یک قالب دودویی نسخه‌دار
+#
+# قالب فایل:
+#   MAGIC (4 بایت) | نسخه (u16) | تعداد بخش‌ها (u16)
+#   سپس برای هر بخش: برچسب ۴ بایتی | طول (u64) | داده
+# بخش‌ها:
+#   META  JSON: سیکل، پرچم‌ها، PC، رجیسترهای pipeline، اثر انگشت برنامه
+#   REGS  ۳۲ عدد u64
+#   PAGE  جدول صفحه‌ها (شماره صفحه → اندیس بلوک) و بلوک‌های یکتای فشرده با zlib
+#   CNTR  آرایه‌ها به ترتیب: شمارنده‌های کارایی، CPI stack، load-use و flush پروفایل PC ها
+#   OBJS  کش‌ها و پیش‌بینی‌کننده شاخه (ویژگی‌های ساده در JSON، آرایه‌ها خام)
+# صفحه‌های تمام صفر ذخیره نمی‌شوند و صفحه‌های با محتوای یکسان فقط یک بار.
+# محتوای نواحی نگاشت شده (mmap) هم کپی می‌شود و بعد از بازیابی صفحه معمولی است.
+# هر تغییر در این چیدمان باید VERSION را بالا ببرد؛ نسخه‌های دیگر خوانده نمی‌شوند.
+import hashlib
+import json
+import random
+import struct
+import zlib
+from array import array
+
+from cpu.registers import RegisterFile
+from cpu.memory import Memory, PAGE_BITS
+from cpu.cache import Cache
+from cpu.control_unit import ControlUnit
+from cpu.perf_counters import PerfCounters
+from cpu.cpi_stack import CPIStack
+from cpu.profiler import Profile
+from cpu.branch_predictor import BTB, PREDICTORS
+from isa.decoder import Opcode, predecode_program
+from pipeline.pipeline_runner import PipelineSimulator
+
+MAGIC = b'RVCP'
+VERSION = 1
+_HEADER = struct.Struct('<4sHH')
+_SECTION = struct.Struct('<4sQ')
+_PAGE_ENTRY = struct.Struct('<QI')
+LATCHES = ('IF_ID', 'ID_EX', 'EX_MEM', 'MEM_WB')
+
+# کلاس‌هایی که در بخش OBJS ذخیره می‌شوند (نام → کلاس)
+_CLASSES = {cls.__name__: cls for cls in (Cache, BTB, *PREDICTORS.values())}
+
+
+def program_fingerprint(program):
+    """hash دستورات و آدرس پایه برنامه تا checkpoint روی برنامه دیگری بازیابی نشود"""
+    decoded = predecode_program(program)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr([instr.operands for instr in decoded]).encode())
+    h.update(str(getattr(decoded, 'text_base', 0)).encode())
+    return h.hexdigest()
+
+
+# ---------------- تبدیل اشیا ----------------
+
+def _encode_latch(latch):
+    """رجیستر pipeline بدون شیء دستور (دستور از روی pc در برنامه پیدا می‌شود)"""
+    return {key: int(value) if key == 'op' else value
+            for key, value in latch.items() if key != 'instr'}
+
+
+def _decode_latch(data, program):
+    latch = dict(data)
+    if 'op' in latch:
+        latch['op'] = Opcode(latch['op'])
+    if 'pc' in latch and latch.get('op') != Opcode.NOP:
+        latch['instr'] = program[latch['pc']]
+    return latch
+
+
+def _snapshot(obj, blobs):
+    """ویژگی‌های شیء: اعداد/رشته‌ها در JSON، آرایه‌ها در blobs، اشیای داخلی بازگشتی"""
+    meta = {'class': type(obj).__name__, 'attrs': {}, 'arrays': {}, 'objects': {}}
+    for name, value in vars(obj).items():
+        if isinstance(value, array):
+            meta['arrays'][name] = (value.typecode, len(blobs))
+            blobs.append(value.tobytes())
+        elif isinstance(value, bytearray):
+            meta['arrays'][name] = ('bytearray', len(blobs))
+            blobs.append(bytes(value))
+        elif isinstance(value, random.Random):
+            meta['attrs'][name] = {'random': value.getstate()}
+        elif type(value).__name__ in _CLASSES:
+            meta['objects'][name] = _snapshot(value, blobs)
+        else:
+            meta['attrs'][name] = value
+    return meta
+
+
+def _restore_object(meta, blobs):
+    obj = _CLASSES[meta['class']].__new__(_CLASSES[meta['class']])
+    for name, value in meta['attrs'].items():
+        if isinstance(value, dict) and 'random' in value:
+            rng = random.Random()
+            version, state, gauss = value['random']
+            rng.setstate((version, tuple(state), gauss))
+            value = rng
+        setattr(obj, name, value)
+    for name, (typecode, index) in meta['arrays'].items():
+        if typecode == 'bytearray':
+            setattr(obj, name, bytearray(blobs[index]))
+        else:
+            values = array(typecode)
+            values.frombytes(blobs[index])
+            setattr(obj, name, values)
+    for name, child in meta['objects'].items():
+        setattr(obj, name, _restore_object(child, blobs))
+    return obj
+
+
+def _pack_blobs(blobs):
+    """لیست بایت‌ها → u32 تعداد، طول هر کدام و داده فشرده همه"""
+    head = struct.pack(f'<I{len(blobs)}Q', len(blobs), *map(len, blobs))
+    return head + zlib.compress(b''.join(blobs), 6)
+
+
+def _unpack_blobs(data):
+    (count,) = struct.unpack_from('<I', data)
+    sizes = struct.unpack_from(f'<{count}Q', data, 4)
+    raw = zlib.decompress(data[4 + 8 * count:])
+    blobs = []
+    offset = 0
+    for size in sizes:
+        blobs.append(raw[offset:offset + size])
+        offset += size
+    return blobs
+
+
+# ---------------- حافظه ----------------
+
+def _memory_pages(mem):
+    """همه صفحه‌های غیر صفر حافظه، شامل کل محتوای نواحی نگاشت شده"""
+    pages = {}
+    for region in mem.regions:
+        for number in range(region.base >> PAGE_BITS, ((region.end - 1) >> PAGE_BITS) + 1):
+            pages[number] = mem.pages.get(number) or region.page(number)
+    for number, page in mem.pages.items():
+        pages.setdefault(number, page)
+    return {number: bytes(page) for number, page in pages.items() if any(page)}
+
+
+def _pack_memory(mem):
+    pages = _memory_pages(mem) if mem is not None else {}
+    unique = {}
+    table = []
+    for number in sorted(pages):
+        index = unique.setdefault(pages[number], len(unique))
+        table.append(_PAGE_ENTRY.pack(number, index))
+    return (struct.pack('<I', len(table)) + b''.join(table) + _pack_blobs(list(unique)))
+
+
+def _unpack_memory(data, mem):
+    (count,) = struct.unpack_from('<I', data)
+    end = 4 + count * _PAGE_ENTRY.size
+    blobs = _unpack_blobs(data[end:])
+    for number, index in _PAGE_ENTRY.iter_unpack(data[4:end]):
+        mem.pages[number] = bytearray(blobs[index])
+
+
+# ---------------- API ----------------
+
+def checkpoint_bytes(simulator, memory=True):
+    """
+    حالت کامل شبیه‌ساز به صورت بایت‌های قالب checkpoint
+
+    Args:
+        memory: False یعنی بخش PAGE خالی بماند (صفحه‌ها جدا نگهداری می‌شوند،
+                مثل checkpoint های افزایشی pipeline.history)
+    """
+    stack = simulator.cpi_stack
+    meta = {
+        'program': program_fingerprint(simulator.program),
+        'pc': simulator.pc[0],
+        'cycle': simulator.cycle,
+        'fetching_done': simulator.fetching_done,
+        'halted': simulator.halted,
+        'stall_cycles': simulator.stall_cycles,
+        'forwarding': simulator.cu.forwarding,
+        'bubbles': stack.bubbles,
+        'stall_slot': stack.stall_slot,
+        'latches': {name: _encode_latch(getattr(simulator, name)) for name in LATCHES},
+    }
+
+    counters = simulator.counters
+    profile = simulator.profile
+    counter_blobs = [counters.values.tobytes(), stack.cycles.tobytes(),
+                     profile.load_use.tobytes(), profile.flushes.tobytes()]
+
+    object_blobs = []
+    objects = {}
+    for name in ('icache', 'dcache', 'predictor'):
+        value = getattr(simulator, name)
+        if value is not None:
+            objects[name] = _snapshot(value, object_blobs)
+
+    sections = [
+        (b'META', json.dumps(meta, separators=(',', ':')).encode()),
+        (b'REGS', struct.pack('<32Q', *simulator.regs.registers)),
+        (b'PAGE', _pack_memory(simulator.mem if memory else None)),
+        (b'CNTR', _pack_blobs(counter_blobs)),
+        (b'OBJS', json.dumps(objects, separators=(',', ':')).encode() + b'\0' +
+         _pack_blobs(object_blobs)),
+    ]
+    out = [_HEADER.pack(MAGIC, VERSION, len(sections))]
+    for tag, payload in sections:
+        out.append(_SECTION.pack(tag, len(payload)))
+        out.append(payload)
+    return b''.join(out)
+
+
+def save_checkpoint(simulator, path):
+    """نوشتن checkpoint در فایل"""
+    data = checkpoint_bytes(simulator)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+
+def _read_sections(data):
+    magic, version, count = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a simulator checkpoint")
+    if version != VERSION:
+        raise ValueError(f"Unsupported checkpoint version {version} (expected {VERSION})")
+    sections = {}
+    offset = _HEADER.size
+    for _ in range(count):
+        tag, size = _SECTION.unpack_from(data, offset)
+        offset += _SECTION.size
+        sections[tag] = data[offset:offset + size]
+        offset += size
+    return sections
+
+
+def restore_checkpoint(source, program, regs=None, mem=None, tracer=None, memory=True):
+    """
+    ساخت PipelineSimulator از یک checkpoint
+
+    Args:
+        source: مسیر فایل یا بایت‌های checkpoint
+        program: همان برنامه‌ای که checkpoint از آن گرفته شده
+        regs: رجیسترهایی که مقداردهی می‌شوند (None یعنی RegisterFile جدید)
+        mem: حافظه‌ای که صفحه‌ها در آن بازیابی می‌شوند (None یعنی Memory جدید)؛
+             صفحه‌ها و نواحی نگاشت شده فعلی آن اول حذف می‌شوند
+        tracer: ردیاب شبیه‌ساز بازیابی شده (اختیاری)
+        memory: False یعنی mem دست نخورد (checkpoint با memory=False گرفته شده و
+                صفحه‌ها را فراخواننده برمی‌گرداند، مثل pipeline.history)
+
+    Returns:
+        PipelineSimulator: آماده برای ادامه با step/run_until
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        data = bytes(source)
+    else:
+        with open(source, 'rb') as f:
+            data = f.read()
+    sections = _read_sections(data)
+    meta = json.loads(sections[b'META'])
+    decoded = predecode_program(program)
+    if meta['program'] != program_fingerprint(decoded):
+        raise ValueError("Checkpoint was taken from a different program")
+
+    if regs is None:
+        regs = RegisterFile()
+    regs.registers[:] = struct.unpack('<32Q', sections[b'REGS'])
+    if mem is None:
+        mem = Memory()
+    elif memory:
+        # محتوای نواحی نگاشت شده هم در checkpoint است؛ چیزی از حالت قبلی نماند
+        for region in list(mem.regions):
+            mem.unmap(region.base)
+        mem.pages.clear()
+    if memory:
+        _unpack_memory(sections[b'PAGE'], mem)
+
+    counters = PerfCounters()
+    stack = CPIStack(len(decoded))
+    values, cycles, load_use, flushes = _unpack_blobs(sections[b'CNTR'])
+    counters.values = array('Q', values)
+    stack.cycles = array('Q', cycles)
+    profile = Profile(len(decoded))
+    profile.load_use = array('Q', load_use)
+    profile.flushes = array('Q', flushes)
+    stack.bubbles = meta['bubbles']
+    stack.stall_slot = meta['stall_slot']
+
+    object_meta, _, object_data = sections[b'OBJS'].partition(b'\0')
+    object_blobs = _unpack_blobs(object_data)
+    objects = {name: _restore_object(value, object_blobs)
+               for name, value in json.loads(object_meta).items()}
+
+    state = {name: _decode_latch(meta['latches'][name], decoded) for name in LATCHES}
+    state.update(
+        pc=[meta['pc']],
+        cycle=meta['cycle'],
+        fetching_done=meta['fetching_done'],
+        halted=meta['halted'],
+        stall_cycles=meta['stall_cycles'],
+        counters=counters,
+        cpi_stack=stack,
+        profile=profile,
+        control_unit=ControlUnit(forwarding=meta['forwarding']),
+        **objects,
+    )
+    return PipelineSimulator(decoded, regs, mem, debug=False, initial_state=state,
+                             tracer=tracer)
@@ -0,0 +1,151 @@
+# pipeline/functional_runner.py
+# اجرای تابعی (سطح ISA) برنامه: هر دستور در یک گام و بدون مدل‌سازی pipeline
+import time
+
+from cpu.alu import ALU, sext32
+from isa.decoder import Opcode, OperandClass, OPERAND_CLASS, predecode_program
+
+# کدهای عددی دستورات به صورت int ساده (مقایسه سریع‌تر در حلقه داغ)
+OP_ADD, OP_SUB, OP_AND, OP_OR, OP_XOR = (
+    int(Opcode.ADD), int(Opcode.SUB), int(Opcode.AND), int(Opcode.OR), int(Opcode.XOR))
+OP_ADDI, OP_BEQ, OP_BNE, OP_JAL, OP_JALR = (
+    int(Opcode.ADDI), int(Opcode.BEQ), int(Opcode.BNE), int(Opcode.JAL), int(Opcode.JALR))
+OP_LUI, OP_AUIPC, OP_NOP = int(Opcode.LUI), int(Opcode.AUIPC), int(Opcode.NOP)
+
+# همه عرض‌های load/store (LOAD/STORE قدیمی و LB..LD, SB..SD)
+LOAD_OPS = frozenset(int(op) for op, kind in OPERAND_CLASS.items() if kind == OperandClass.LOAD)
+STORE_OPS = frozenset(int(op) for op, kind in OPERAND_CLASS.items() if kind == OperandClass.STORE)
+
+MASK64 = 0xFFFFFFFFFFFFFFFF
+
+
+def run_functional(program, regs, mem, max_instructions=1000000, initial_state=None):
+    """
+    اجرای برنامه به صورت دستور به دستور (بدون pipeline)
+
+    روی همان برنامه خروجی isa.parser و همان RegisterFile و Memory کار می‌کند
+    ولی هیچ رجیستر میانی (IF_ID, ID_EX, ...) نمی‌سازد و ControlUnit را صدا نمی‌زند.
+    معنای دستورات همان توابع cpu/alu.py است.
+
+    Args:
+        program: برنامه‌ای که باید اجرا شود
+        regs: رجیسترهای پردازنده
+        mem: حافظه سیستم
+        max_instructions: حداکثر تعداد دستورات اجرا شده در این فراخوانی
+        initial_state: حالت قبلی برای ادامه اجرا
+
+    Returns:
+        dict: حالت نهایی شامل pc، تعداد دستورات اجرا شده (instret) و زمان اجرا
+    """
+    decoded = predecode_program(program)
+    if initial_state is None:
+        pc = [getattr(decoded, 'entry', 0)]
+        instret = 0
+    else:
+        pc = initial_state['pc']
+        instret = initial_state.get('instret', 0)
+
+    # تاپل‌های (opcode, rd, rs1, rs2, imm) از فرم از پیش دیکد شده مشترک
+    code = [instr.operands for instr in decoded]
+    # عرض و علامت دسترسی حافظه هر دستور (برای load/store ها)
+    access = [(instr.mem_size, instr.mem_signed) for instr in decoded]
+    n = len(code)
+    r = regs.registers  # دسترسی مستقیم به لیست رجیسترها در حلقه داغ
+    load = mem.load
+    store = mem.store
+    # آدرس بایتی PC=0 (برای برنامه‌های ELF) و جدول ALU برای دستورات کم‌تکرار
+    base = getattr(decoded, 'text_base', 0)
+    dispatch = ALU(regs, mem, base).dispatch
+
+    p = pc[0]
+    executed = 0
+    start = time.perf_counter()
+
+    while 0 <= p < n and executed < max_instructions:
+        op, rd, rs1, rs2, imm = code[p]
+        executed += 1
+
+        if op == OP_ADDI:
+            if rd:
+                r[rd] = (r[rs1] + imm) & MASK64
+            p += 1
+        elif op == OP_BNE:
+            p = p + imm if r[rs1] != r[rs2] else p + 1
+        elif op == OP_BEQ:
+            p = p + imm if r[rs1] == r[rs2] else p + 1
+        elif op == OP_ADD:
+            if rd:
+                r[rd] = (r[rs1] + r[rs2]) & MASK64
+            p += 1
+        elif op == OP_SUB:
+            if rd:
+                r[rd] = (r[rs1] - r[rs2]) & MASK64
+            p += 1
+        elif op == OP_AND:
+            if rd:
+                r[rd] = r[rs1] & r[rs2]
+            p += 1
+        elif op == OP_OR:
+            if rd:
+                r[rd] = r[rs1] | r[rs2]
+            p += 1
+        elif op == OP_XOR:
+            if rd:
+                r[rd] = r[rs1] ^ r[rs2]
+            p += 1
+        elif op in LOAD_OPS:
+            size, signed = access[p]
+            value = load(r[rs1] + imm, size, signed)
+            if rd:
+                r[rd] = value & MASK64
+            p += 1
+        elif op in STORE_OPS:
+            store(r[rs1] + imm, r[rs2], access[p][0])
+            p += 1
+        elif op == OP_JAL:
+            # مثل execute_jal: آدرس بازگشت pc + 4 و مقصد pc + imm
+            if rd:
+                r[rd] = (base + (p + 1) * 4) & MASK64
+            p = p + imm
+        elif op == OP_JALR:
+            # مثل execute_jalr: مقصد (rs1 + imm) با بیت صفر پاک شده، به شماره دستور
+            target = (((r[rs1] + imm) & ~1) - base) >> 2
+            if rd:
+                r[rd] = (base + (p + 1) * 4) & MASK64
+            p = target
+        elif op == OP_LUI:
+            if rd:
+                r[rd] = sext32(imm << 12)
+            p += 1
+        elif op == OP_AUIPC:
+            if rd:
+                r[rd] = (base + (p * 4) + sext32(imm << 12)) & MASK64
+            p += 1
+        elif op == OP_NOP:
+            p += 1
+        else:
+            # بقیه دستورات RV64I از همان جدول dispatch واحد ALU
+            instr = decoded[p]
+            func = dispatch[op]
+            if func is None:
+                raise ValueError(f"Unsupported operation: {instr.name} at PC={p}")
+            result = func(r[rs1], r[rs2], imm, p, base)
+            if instr.is_branch or instr.is_jump:
+                result, p, _ = result
+            else:
+                p += 1
+            if instr.writes_rd:
+                r[rd] = result & MASK64
+
+    elapsed = time.perf_counter() - start
+    pc[0] = p
+    instret += executed
+
+    state = {
+        'pc': pc,
+        'instret': instret,
+        'executed': executed,
+        'halted': not 0 <= p < n,
+        'elapsed': elapsed,
+    }
+    return state
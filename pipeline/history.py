@@ -0,0 +1,341 @@
+# pipeline/history.py
+# تاریخچه اجرا برای اشکال‌زدایی با حرکت در زمان (Step Back / رفتن به هر سیکل)
+#
+# برای هر سیکل یک رکورد undo کوچک ثبت می‌شود: مقدار قبلی رجیسترهایی که WB
+# نوشته، بایت‌های قبلی storeهای MEM، رجیسترهای pipeline و PC قبل از سیکل و
+# تغییر شمارنده‌ها. علاوه بر آن هر checkpoint_interval سیکل یک checkpoint
+# (pipeline.checkpoint) گرفته می‌شود؛ رفتن به سیکل دلخواه یعنی اعمال undo ها
+# یا بازیابی نزدیک‌ترین checkpoint قبلی و اجرای دوباره تا آن سیکل (اجرا قطعی
+# است)، هر کدام که کوتاه‌تر باشد.
+#
+# checkpoint ها افزایشی‌اند: حالت بدون حافظه به همراه جدول شماره صفحه → بلوک
+# فشرده، فقط برای صفحه‌هایی که در طول تاریخچه نوشته شده‌اند. صفحه‌های تغییر
+# کرده از checkpoint قبلی دوباره فشرده می‌شوند و بقیه بلوک‌ها بین checkpoint ها
+# مشترک‌اند. برای هر صفحه محتوای قبل از اولین نوشتن هم یک بار نگه داشته
+# می‌شود (_origin)؛ بازیابی فقط همین صفحه‌ها را در جای خود بازنویسی می‌کند و
+# نواحی نگاشت شده (mmap) سر جایشان می‌مانند، پس هزینه به اندازه تغییرات است
+# نه کل حافظه. تعداد رکوردها، تعداد checkpoint ها و کل بایت‌های آن‌ها محدود است.
+import zlib
+from collections import OrderedDict, deque
+
+from cpu.memory import PAGE_BITS, PAGE_SIZE
+from cpu.cpi_stack import COMMIT
+from cpu.perf_counters import STALL_LOAD_USE, BRANCH_FLUSHES
+from pipeline.checkpoint import checkpoint_bytes, restore_checkpoint
+
+
+class ExecutionHistory:
+    """
+    اجرای PipelineSimulator با امکان برگشت به عقب
+
+    به جای simulator.step از history.step استفاده کنید؛ شبیه‌ساز فعلی همیشه
+    history.simulator است (بازیابی checkpoint شبیه‌ساز جدیدی روی همان
+    RegisterFile و Memory می‌سازد).
+
+    undo فقط حالت معماری، pipeline و شمارنده‌ها را برمی‌گرداند؛ اگر کش یا
+    پیش‌بینی‌کننده شاخه وجود داشته باشد برگشت همیشه از checkpoint انجام می‌شود.
+    ردیاب اشغال مراحل (simulator.occupancy) هنگام برگشت کوتاه می‌شود.
+    """
+
+    def __init__(self, simulator, checkpoint_interval=256, max_undo=10000, max_checkpoints=64,
+                 max_bytes=64 << 20):
+        """
+        Args:
+            simulator: PipelineSimulator در حال اجرا
+            checkpoint_interval: فاصله checkpoint ها بر حسب سیکل
+            max_undo: حداکثر تعداد رکوردهای undo نگهداری شده
+            max_checkpoints: حداکثر تعداد checkpoint های نگهداری شده
+            max_bytes: حداکثر کل بایت‌های checkpoint ها (بلوک‌های مشترک یک بار
+                       شمرده می‌شوند)؛ جدیدترین checkpoint همیشه نگه داشته می‌شود
+        """
+        if checkpoint_interval <= 0:
+            raise ValueError("checkpoint_interval must be positive")
+        self.simulator = simulator
+        self.checkpoint_interval = checkpoint_interval
+        self.max_checkpoints = max_checkpoints
+        self.max_bytes = max_bytes
+        self.undo = deque(maxlen=max_undo)
+        self.checkpoints = OrderedDict()  # سیکل → (بایت‌های checkpoint بدون حافظه، صفحه‌ها)
+        self.checkpoint_size = 0          # کل بایت‌های نگهداری شده
+        self._blocks = {}                 # id بلوک صفحه → [بلوک، تعداد ارجاع]
+        # محتوای هر صفحه نوشته شده قبل از اولین نوشتن (None یعنی صفر)
+        self._origin = {}
+        # حافظه فعلی = صفحه‌های _pages به جز صفحه‌های _dirty که از آن به بعد نوشته شده‌اند
+        self._pages = {}
+        self._dirty = set()
+        self._take_checkpoint()
+
+    @property
+    def cycle(self):
+        return self.simulator.cycle
+
+    @property
+    def earliest_cycle(self):
+        """قدیمی‌ترین سیکلی که هنوز می‌توان به آن برگشت"""
+        cycles = [cycle for cycle in self.checkpoints]
+        if self.undo:
+            cycles.append(self.undo[0][0])
+        return min(cycles) if cycles else self.cycle
+
+    def _undoable(self):
+        sim = self.simulator
+        return sim.icache is None and sim.dcache is None and sim.predictor is None
+
+    # ---------------- ثبت ----------------
+
+    def _take_checkpoint(self):
+        sim = self.simulator
+        cycle = sim.cycle
+        pages = dict(self._pages)
+        for number in self._dirty:
+            pages[number] = zlib.compress(sim.mem.read_bytes(number << PAGE_BITS, PAGE_SIZE), 1)
+        self._pages = pages
+        self._dirty = set()
+
+        state = checkpoint_bytes(sim, memory=False)
+        if cycle in self.checkpoints:
+            self._drop_checkpoint(cycle)
+        self.checkpoints[cycle] = (state, pages)
+        self.checkpoint_size += len(state)
+        blocks = self._blocks
+        for block in pages.values():
+            ref = blocks.get(id(block))
+            if ref is None:
+                blocks[id(block)] = [block, 1]
+                self.checkpoint_size += len(block)
+            else:
+                ref[1] += 1
+        while len(self.checkpoints) > 1 and (len(self.checkpoints) > self.max_checkpoints or
+                                             self.checkpoint_size > self.max_bytes):
+            self._drop_checkpoint(next(iter(self.checkpoints)))
+
+    def _drop_checkpoint(self, cycle):
+        state, pages = self.checkpoints.pop(cycle)
+        self.checkpoint_size -= len(state)
+        blocks = self._blocks
+        for block in pages.values():
+            ref = blocks[id(block)]
+            ref[1] -= 1
+            if not ref[1]:
+                del blocks[id(block)]
+                self.checkpoint_size -= len(block)
+
+    def _record_cycle(self):
+        """اجرای یک سیکل همراه با ثبت رکورد undo آن"""
+        sim = self.simulator
+        stack = sim.cpi_stack
+        counters = sim.counters
+        cycle = sim.cycle
+
+        # سیکلی که در این گام به CPI stack اضافه می‌شود
+        if sim.stall_cycles:
+            charged = stack.stall_slot
+        elif sim.MEM_WB:
+            charged = stack.slot(COMMIT, sim.MEM_WB['pc'])
+        else:
+            charged = stack.bubbles[2]
+
+        reg_writes = []
+        stores = []
+        entry = [cycle, sim.pc[0], sim.fetching_done, sim.halted, sim.stall_cycles,
+                 dict(sim.IF_ID), sim.ID_EX, sim.EX_MEM, sim.MEM_WB,
+                 counters.values[:], charged, stack.bubbles, stack.stall_slot,
+                 reg_writes, stores, 0]
+        sim.wb_stage.undo_log = reg_writes
+        sim.mem_stage.undo_log = stores
+        try:
+            sim._cycle()
+        finally:
+            sim.wb_stage.undo_log = sim.mem_stage.undo_log = None
+        # سیکل‌های توقف کش باقی‌مانده که هنگام پایان برنامه یک‌جا اضافه می‌شوند
+        entry[-1] = sim.cycle - cycle - 1
+        self.undo.append(entry)
+        if stores:
+            self._record_origin(stores)
+            self._mark_dirty(stores)
+
+        if sim.cycle - next(reversed(self.checkpoints), 0) >= self.checkpoint_interval:
+            self._take_checkpoint()
+
+    def step(self, n=1):
+        """اجرای n سیکل به جلو (یا کمتر اگر برنامه تمام شود)"""
+        done = 0
+        while done < n and not self.simulator.halted:
+            self._record_cycle()
+            done += 1
+        return done
+
+    def run_until(self, max_cycles=None, condition=None):
+        """مثل PipelineSimulator.run_until ولی با ثبت تاریخچه"""
+        sim = self.simulator
+        while not sim.halted:
+            if max_cycles is not None and sim.cycle >= max_cycles:
+                break
+            if condition is not None and condition(sim):
+                break
+            self._record_cycle()
+        return sim.state()
+
+    def changes_since(self, cycle):
+        """
+        رجیسترها و صفحه‌های حافظه‌ای که از سیکل cycle به بعد نوشته شده‌اند
+
+        Returns:
+            tuple: (مجموعه شماره رجیسترها، مجموعه شماره صفحه‌ها)؛ None اگر
+                   رکوردهای undo تا آن سیکل نرسند
+        """
+        if cycle >= self.simulator.cycle:
+            return set(), set()
+        if not self.undo or self.undo[0][0] > cycle:
+            return None
+        registers = set()
+        pages = set()
+        for entry in reversed(self.undo):
+            if entry[0] < cycle:
+                break
+            registers.update(rd for rd, _ in entry[13])
+            for address, data in entry[14]:
+                pages.add(address >> PAGE_BITS)
+                pages.add((address + len(data) - 1) >> PAGE_BITS)
+        return registers, pages
+
+    def _mark_dirty(self, stores):
+        dirty = self._dirty
+        for address, data in stores:
+            dirty.add(address >> PAGE_BITS)
+            dirty.add((address + len(data) - 1) >> PAGE_BITS)
+
+    def _record_origin(self, stores):
+        """ثبت محتوای قبلی صفحه‌هایی که storeهای این سیکل برای اولین بار نوشته‌اند"""
+        origin = self._origin
+        for address, data in stores:
+            for number in {address >> PAGE_BITS, (address + len(data) - 1) >> PAGE_BITS}:
+                if number in origin:
+                    continue
+                # محتوای فعلی با بایت‌های قبلی storeهای همین سیکل (به ترتیب عکس)
+                base = number << PAGE_BITS
+                page = bytearray(self.simulator.mem.read_bytes(base, PAGE_SIZE))
+                for start, old in reversed(stores):
+                    low = max(start, base)
+                    high = min(start + len(old), base + PAGE_SIZE)
+                    if low < high:
+                        page[low - base:high - base] = old[low - start:high - start]
+                block = zlib.compress(page, 1) if any(page) else None
+                origin[number] = block
+                if block is not None:
+                    self.checkpoint_size += len(block)
+
+    # ---------------- برگشت ----------------
+
+    def _apply_undo(self):
+        """برگرداندن آخرین سیکل با رکورد undo آن"""
+        sim = self.simulator
+        (cycle, pc, fetching_done, halted, stall_cycles, if_id, id_ex, ex_mem, mem_wb,
+         values, charged, bubbles, stall_slot, reg_writes, stores, extra) = self.undo.pop()
+        stack = sim.cpi_stack
+
+        for rd, value in reversed(reg_writes):
+            sim.regs.write(rd, value)
+        for address, data in reversed(stores):
+            sim.mem.write_bytes(address, data)
+        if stores:
+            self._mark_dirty(stores)
+
+        # توقف/flush این سیکل از پروفایل PC ها هم کم می‌شود
+        stalled = sim.counters.values[STALL_LOAD_USE] != values[STALL_LOAD_USE]
+        flushed = sim.counters.values[BRANCH_FLUSHES] != values[BRANCH_FLUSHES]
+
+        stack.cycles[charged] -= 1
+        if extra:
+            stack.cycles[stack.stall_slot] -= extra
+        stack.bubbles = bubbles
+        stack.stall_slot = stall_slot
+        sim.counters.values[:] = values
+
+        sim.pc[0] = pc
+        sim.IF_ID.clear()
+        sim.IF_ID.update(if_id)   # IF_ID در IFStage به صورت درجا تغییر می‌کند
+        sim.ID_EX = id_ex
+        sim.EX_MEM = ex_mem
+        sim.MEM_WB = mem_wb
+        sim.cycle = cycle
+        sim.tracer.cycle = cycle
+        sim.fetching_done = fetching_done
+        sim.halted = halted
+        sim.stall_cycles = stall_cycles
+
+        profile = sim.profile
+        if stalled:
+            producer = sim._stall_producer(sim.IF_ID)   # همان رجیسترهای ابتدای سیکل
+            if producer is not None:
+                profile.load_use[producer] -= 1
+        if flushed:
+            profile.flushes[id_ex['pc']] -= 1
+
+    def _restore(self, cycle):
+        """بازیابی checkpoint سیکل cycle روی همان رجیسترها و حافظه"""
+        sim = self.simulator
+        state, pages = self.checkpoints[cycle]
+        self.simulator = restore_checkpoint(state, sim.program, regs=sim.regs, mem=sim.mem,
+                                            tracer=sim.tracer, memory=False)
+        # فقط صفحه‌هایی که در تاریخچه نوشته شده‌اند ممکن است فرق داشته باشند؛
+        # صفحه‌های نواحی نگاشت شده در جای خود (داخل همان mmap) نوشته می‌شوند
+        mem = sim.mem
+        for number, block in self._origin.items():
+            block = pages.get(number, block)
+            data = zlib.decompress(block) if block is not None else None
+            if mem.regions and mem.region_at(number << PAGE_BITS) is not None:
+                mem.write_bytes(number << PAGE_BITS, data or bytes(PAGE_SIZE))
+            elif data is None or not any(data):
+                mem.pages.pop(number, None)
+            else:
+                mem.pages[number] = bytearray(data)
+        self._pages = pages
+        self._dirty = set()
+        # رکوردهای undo بعد از این سیکل دیگر با حالت فعلی سازگار نیستند
+        while self.undo and self.undo[-1][0] >= cycle:
+            self.undo.pop()
+
+    def seek(self, target):
+        """
+        رفتن به سیکل target (جلو یا عقب)
+
+        هزینه: حداقل فاصله تا سیکل فعلی (با undo) یا تا نزدیک‌ترین checkpoint
+        قبلی (با بازیابی و اجرای دوباره بدون ردیابی).
+        """
+        sim = self.simulator
+        if target >= sim.cycle:
+            while sim.cycle < target and not sim.halted:
+                self._record_cycle()
+            return sim.cycle
+        if target < self.earliest_cycle:
+            raise ValueError(f"History does not reach cycle {target} "
+                             f"(earliest is {self.earliest_cycle})")
+
+        occupancy = sim.occupancy
+        if occupancy is not None:
+            occupancy.truncate(target)
+        base = max((c for c in self.checkpoints if c <= target), default=None)
+        can_undo = (self._undoable() and self.undo and self.undo[0][0] <= target)
+        if can_undo and (base is None or sim.cycle - target <= target - base):
+            while self.simulator.cycle > target:
+                self._apply_undo()
+            return self.simulator.cycle
+
+        # اجرای دوباره بدون ردیاب اشغال (سیکل‌ها از قبل ثبت شده‌اند)
+        self._restore(base)
+        tracer = self.simulator.tracer
+        levels = tracer.levels[:]
+        tracer.levels[:] = [0] * len(levels)  # اجرای دوباره دوباره رویداد ثبت نکند
+        try:
+            while self.simulator.cycle < target and not self.simulator.halted:
+                self._record_cycle()
+        finally:
+            tracer.levels[:] = levels
+        if occupancy is not None:
+            occupancy.attach(self.simulator)
+        return self.simulator.cycle
+
+    def step_back(self, n=1):
+        """برگشت n سیکل به عقب؛ شماره سیکل جدید را برمی‌گرداند"""
+        return self.seek(max(0, self.simulator.cycle - n))
@@ -1,4 +1,6 @@
 # pipeline/id_stage.py
+from isa.decoder import Opcode
+from cpu.trace import Tracer, ID, INFO, DEBUG, EV_ID_NONE, EV_ID_DECODE
 
 class IDStage:
     """
@@ -6,25 +8,26 @@ class IDStage:
     این کلاس مسئول تجزیه و تحلیل دستورات واکشی شده و آماده‌سازی داده‌ها برای مرحله اجرا است
     """
     
-    def __init__(self, registers):
+    def __init__(self, registers, tracer=None):
         """
         سازنده کلاس ID Stage
         
         Args:
             registers: مرجع به فایل رجیسترهای پردازنده
+            tracer: ردیاب رویدادها (اختیاری)
         """
         self.registers = registers
+        self.tracer = tracer if tracer is not None else Tracer()
 
-    def run(self, if_id_reg, ex_mem_reg, ex_mem_reg_last, log=None, debug=True):
+    def run(self, if_id_reg, ex_mem_reg, mem_wb_reg):
         """
         اجرای مرحله رمزگشایی دستور
         
         Args:
             if_id_reg: رجیستر میانی IF/ID حاوی دستور واکشی شده
             ex_mem_reg: رجیستر میانی EX/MEM فعلی برای تشخیص وابستگی‌های داده
-            ex_mem_reg_last: رجیستر میانی EX/MEM قبلی برای تشخیص وابستگی‌های داده
-            log: لیست لاگ‌ها (اختیاری)
-            debug: فعال‌سازی حالت دیباگ
+            mem_wb_reg: خروجی MEM همین سیکل (MEM/WB جدید)؛ برای load ها داده
+                        خوانده شده (mem_data) به جای آدرس فرستاده می‌شود
             
         Returns:
             dict: رجیستر میانی ID/EX آماده شده برای مرحله اجرا
@@ -32,28 +35,21 @@ class IDStage:
         
         # بررسی وجود دستور معتبر در رجیستر IF/ID
         if not if_id_reg or 'instr' not in if_id_reg:
-            if debug:
-                print("ID: No instruction")
-                log.append("ID: No instruction") if log is not None else None
+            if self.tracer.levels[ID] >= DEBUG:
+                self.tracer.emit(ID, EV_ID_NONE)
 
             # برگرداندن دستور NOP در صورت عدم وجود دستور معتبر
-            return {"op": "NOP"}
+            return {"op": Opcode.NOP}
 
-        # استخراج اجزای دستور از رجیستر IF/ID
+        # استخراج اجزای دستور از رجیستر IF/ID (دستور از قبل دیکد شده است)
         instr = if_id_reg['instr']
-        op = instr.get('op')          # نوع عملیات (opcode)
-        rd = instr.get('rd')          # رجیستر مقصد
-        rs1 = instr.get('rs1')        # اولین رجیستر مبدا
-        rs2 = instr.get('rs2')        # دومین رجیستر مبدا
-        imm = instr.get('imm')        # مقدار فوری (immediate)
+        op = instr.op                 # نوع عملیات (Opcode)
+        rd = instr.rd if instr.writes_rd else None  # رجیستر مقصد (فقط اگر نوشته شود)
+        rs1 = instr.rs1               # اولین رجیستر مبدا (پیش‌فرض صفر)
+        rs2 = instr.rs2               # دومین رجیستر مبدا (پیش‌فرض صفر)
+        imm = instr.imm               # مقدار فوری (immediate)
         pc = if_id_reg.get('pc', 0)   # شمارنده برنامه
 
-        # تنظیم مقادیر پیش‌فرض برای رجیسترهای مبدا
-        if rs1 is None:
-            rs1 = 0
-        if rs2 is None:
-            rs2 = 0
-
         # خواندن مقادیر رجیسترهای مبدا با در نظر گیری وابستگی‌های داده
         # در صورت وجود وابستگی، از رجیسترهای میانی مقدار خوانده می‌شود
         
@@ -61,9 +57,9 @@ class IDStage:
         if rs1 == ex_mem_reg.get("rd"):
             # اگر رجیستر مبدا با رجیستر مقصد مرحله EX/MEM فعلی برابر باشد
             rs1_val = ex_mem_reg.get("alu_result")
-        elif rs1 == ex_mem_reg_last.get("rd"):
-            # اگر رجیستر مبدا با رجیستر مقصد مرحله EX/MEM قبلی برابر باشد
-            rs1_val = ex_mem_reg_last.get("alu_result")
+        elif rs1 == mem_wb_reg.get("rd"):
+            # اگر رجیستر مبدا با رجیستر مقصد دستوری که از MEM گذشته برابر باشد
+            rs1_val = mem_wb_reg.get("mem_data", mem_wb_reg.get("alu_result"))
         else:
             # در غیر این صورت، مقدار را از فایل رجیستر بخوان
             rs1_val = self.registers.read(rs1) if rs1 is not None else 0
@@ -72,9 +68,9 @@ class IDStage:
         if rs2 == ex_mem_reg.get("rd"):
             # اگر رجیستر مبدا با رجیستر مقصد مرحله EX/MEM فعلی برابر باشد
             rs2_val = ex_mem_reg.get("alu_result")
-        elif rs2 == ex_mem_reg_last.get("rd"):
-            # اگر رجیستر مبدا با رجیستر مقصد مرحله EX/MEM قبلی برابر باشد
-            rs2_val = ex_mem_reg_last.get("alu_result")
+        elif rs2 == mem_wb_reg.get("rd"):
+            # اگر رجیستر مبدا با رجیستر مقصد دستوری که از MEM گذشته برابر باشد
+            rs2_val = mem_wb_reg.get("mem_data", mem_wb_reg.get("alu_result"))
         else:
             # در غیر این صورت، مقدار را از فایل رجیستر بخوان
             rs2_val = self.registers.read(rs2) if rs2 is not None else 0
@@ -82,6 +78,7 @@ class IDStage:
         # آماده‌سازی رجیستر میانی ID/EX برای ارسال به مرحله اجرا
         id_ex_reg = {
             'op': op,                 # نوع عملیات
+            'instr': instr,           # دستور دیکد شده
             'rd': rd,                 # رجیستر مقصد
             'rs1': rs1,               # شماره رجیستر اول
             'rs2': rs2,               # شماره رجیستر دوم
@@ -90,19 +87,12 @@ class IDStage:
             'rs1_val': rs1_val,       # مقدار رجیستر اول
             'rs2_val': rs2_val        # مقدار رجیستر دوم
         }
+        if 'pred_pc' in if_id_reg:
+            id_ex_reg['pred_pc'] = if_id_reg['pred_pc']  # PC بعدی پیش‌بینی شده در IF
 
-        # چاپ اطلاعات دیباگ در صورت فعال بودن
-        if debug:
-            # تهیه نمایش قابل خواندن برای رجیسترها
-            rs1_disp = f"{rs1}({rs1_val})" if rs1 is not None else "None"
-            rs2_disp = f"{rs2}({rs2_val})" if rs2 is not None else "None"
-            
-            # چاپ اطلاعات رمزگشایی شده
-            print(f"ID: Decoded {op} | rs1={rs1_disp}, rs2={rs2_disp}, imm={imm}")
-            
-            # اضافه کردن به لاگ در صورت وجود
-            if log is not None:
-                log.append(f"ID: Decoded {op} | rs1={rs1_disp}, rs2={rs2_disp}, imm={imm}")
+        # ثبت رویداد رمزگشایی (متن فقط هنگام نمایش ساخته می‌شود)
+        if self.tracer.levels[ID] >= INFO:
+            self.tracer.emit(ID, EV_ID_DECODE, instr, rs1, rs1_val, rs2, rs2_val)
 
         # برگرداندن رجیستر میانی آماده شده
         return id_ex_reg
\ No newline at end of file
@@ -1,18 +1,28 @@
 # pipeline/if_stage.py
+from cpu.trace import Tracer, IF, INFO, DEBUG, EV_IF_FETCH, EV_IF_END, EV_CACHE_MISS, EV_PREDICT
+
 
 class IFStage:
-    def __init__(self, instr_mem, pc):
+    def __init__(self, instr_mem, pc, tracer=None, icache=None, predictor=None):
         """
         سازنده مرحله واکشی دستورالعمل (Instruction Fetch)
         
         Args:
             instr_mem: حافظه دستورالعمل‌ها (لیست یا دیکشنری)
             pc: شمارنده برنامه (Program Counter) - لیست یا متغیر
+            tracer: ردیاب رویدادها (اختیاری)
+            icache: کش دستورات (cpu.cache.Cache، اختیاری)
+            predictor: پیش‌بینی‌کننده شاخه (cpu.branch_predictor، اختیاری)
         """
         self.instr_mem = instr_mem  # حافظه دستورها (لیست یا دیکشنری)
         self.pc = pc                # شمارنده برنامه (لیست یا متغیر)
+        self.tracer = tracer if tracer is not None else Tracer()
+        self.icache = icache
+        self.text_base = getattr(instr_mem, 'text_base', 0)  # آدرس بایتی PC=0
+        self.stall_cycles = 0       # توقف ناشی از miss آخرین واکشی
+        self.predictor = predictor
 
-    def run(self, if_id_reg, log=None):
+    def run(self, if_id_reg):
         """
         اجرای مرحله واکشی دستورالعمل (IF Stage)
         
@@ -20,27 +30,43 @@ class IFStage:
         
         Args:
             if_id_reg: رجیستر پایپ‌لاین بین مراحل IF و ID
-            log: لیست لاگ برای ثبت عملیات
         """
         # بررسی اینکه آیا شمارنده برنامه در محدوده حافظه دستورات است
-        if self.pc[0] < len(self.instr_mem):
+        # (مقصد JALR پایین‌تر از text_base شماره منفی می‌دهد که در Python معتبر است)
+        if 0 <= self.pc[0] < len(self.instr_mem):
             # واکشی دستورالعمل از حافظه در موقعیت فعلی PC
             instr = self.instr_mem[self.pc[0]]
             
             # قرار دادن دستورالعمل واکشی شده در رجیستر IF/ID
             if_id_reg['instr'] = instr  # دستورالعمل واکشی شده
             if_id_reg['pc'] = self.pc[0]  # مقدار فعلی شمارنده برنامه
+
+            # دسترسی به کش دستورات (آدرس بایتی دستور)
+            if self.icache is not None:
+                address = self.text_base + self.pc[0] * 4
+                self.stall_cycles = self.icache.access(address)
+                if self.stall_cycles and self.tracer.levels[IF] >= DEBUG:
+                    self.tracer.emit(IF, EV_CACHE_MISS, "I-cache", address, self.stall_cycles)
             
-            # نمایش اطلاعات دیباگ
-            print(f"IF: Fetched instruction {instr} at PC={self.pc[0]}")
-            log.append(
-                f"IF: Fetched instruction {instr} at PC={self.pc[0]}") if log is not None else None
+            # ثبت رویداد (فقط اگر ردیابی IF روشن باشد)
+            if self.tracer.levels[IF] >= INFO:
+                self.tracer.emit(IF, EV_IF_FETCH, instr, self.pc[0])
 
             # افزایش شمارنده برنامه برای دستورالعمل بعدی
             self.pc[0] += 1
+
+            # پیش‌بینی شاخه: PC بعدی پیش‌بینی شده همراه دستور تا EX می‌رود
+            if self.predictor is not None:
+                if instr.is_branch or instr.is_jump:
+                    target = self.predictor.predict(if_id_reg['pc'], instr)
+                    if target is not None:
+                        self.pc[0] = target
+                        if self.tracer.levels[IF] >= DEBUG:
+                            self.tracer.emit(IF, EV_PREDICT, target)
+                if_id_reg['pred_pc'] = self.pc[0]
             
         else:
             # پایان برنامه - پایپ‌لاین را خالی کن
             if_id_reg.clear()  # پاک کردن رجیستر پایپ‌لاین
-            print("IF: End of program")
-            log.append("IF: End of program") if log is not None else None
\ No newline at end of file
+            if self.tracer.levels[IF] >= INFO:
+                self.tracer.emit(IF, EV_IF_END)
\ No newline at end of file
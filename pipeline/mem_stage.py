@@ -1,62 +1,81 @@
 # pipeline/mem_stage.py
+from cpu.trace import (Tracer, MEM, INFO, DEBUG, EV_MEM_NONE, EV_MEM_LOAD,
+                       EV_MEM_STORE, EV_MEM_PASS, EV_CACHE_MISS)
+
+MASK64 = 0xFFFFFFFFFFFFFFFF
+
 
 class MEMStage:
-    def __init__(self, memory):
+    def __init__(self, memory, tracer=None, dcache=None):
         """سازنده مرحله دسترسی به حافظه"""
         self.memory = memory  # ماژول حافظه سیستم
+        self.tracer = tracer if tracer is not None else Tracer()  # ردیاب رویدادها
+        self.dcache = dcache  # کش داده (cpu.cache.Cache، اختیاری)
+        self.stall_cycles = 0  # توقف ناشی از miss آخرین دسترسی
+        self.undo_log = None   # لیست ثبت مقدار قبلی حافظه (pipeline.history)
 
-    def run(self, ex_mem, log=None, debug=False):
+    def run(self, ex_mem):
         """
         اجرای مرحله دسترسی به حافظه
         
         Args:
             ex_mem: داده‌های ورودی از مرحله اجرا
-            log: لیست لاگ برای ثبت عملیات
-            debug: فلگ حالت دیباگ
             
         Returns:
             dict: داده‌های خروجی برای مرحله بازنویسی
         """
         # بررسی وجود دستورالعمل
         if not ex_mem:
-            if debug:
-                print("MEM: No instruction")
-                log.append("MEM: No instruction") if log is not None else None
-                
+            if self.tracer.levels[MEM] >= DEBUG:
+                self.tracer.emit(MEM, EV_MEM_NONE)
+
             return {}
 
         # استخراج اطلاعات دستورالعمل
         op = ex_mem.get("op")  # نوع عملیات
+        instr = ex_mem["instr"]  # دستور دیکد شده
         addr = ex_mem.get("alu_result")  # آدرس محاسبه شده توسط ALU
         store_data = ex_mem.get("store_data")  # داده برای ذخیره
 
         # آماده‌سازی داده‌های خروجی برای مرحله بعد
         mem_wb = {
             'op': op,  # نوع عملیات
+            'instr': instr,  # دستور دیکد شده
+            'pc': ex_mem.get('pc'),  # شمارنده برنامه
             'rd': ex_mem.get('rd')  # رجیستر مقصد
         }
 
+        if instr.is_load or instr.is_store:
+            # آدرس منفی ALU همان آدرس ۶۴ بیتی بدون علامت است (برای کش، ردیاب و undo)
+            addr &= MASK64
+            # مدل زمانی کش داده (داده همچنان از حافظه خوانده/نوشته می‌شود)
+            if self.dcache is not None:
+                self.stall_cycles = self.dcache.access(addr, instr.is_store)
+                if self.stall_cycles and self.tracer.levels[MEM] >= DEBUG:
+                    self.tracer.emit(MEM, EV_CACHE_MISS, "D-cache", addr, self.stall_cycles)
+
         # پردازش عملیات بارگذاری از حافظه
-        if op == "LOAD":
-            mem_wb["mem_data"] = self.memory.load(addr)  # خواندن از حافظه
-            if debug:
-                print(f"MEM: Loaded {mem_wb['mem_data']} from address {addr}")
-                log.append(f"MEM: Loaded {mem_wb['mem_data']} from address {addr}") if log is not None else None
-                
+        if instr.is_load:
+            # خواندن ۱/۲/۴/۸ بایت با گسترش علامت یا صفر (LB/LH/LW/LD/LBU/LHU/LWU)
+            mem_wb["mem_data"] = self.memory.load(
+                addr, instr.mem_size, instr.mem_signed) & MASK64
+            if self.tracer.levels[MEM] >= INFO:
+                self.tracer.emit(MEM, EV_MEM_LOAD, mem_wb['mem_data'], addr)
+
         # پردازش عملیات ذخیره در حافظه
-        elif op == "STORE":
-            self.memory.store(addr, store_data)  # نوشتن در حافظه
-            if debug:
-                print(f"MEM: Stored {store_data} to address {addr}")
-                log.append(f"MEM: Stored {store_data} to address {addr}") if log is not None else None
-                
+        elif instr.is_store:
+            if self.undo_log is not None:
+                self.undo_log.append((addr, self.memory.read_bytes(addr, instr.mem_size)))
+            self.memory.store(addr, store_data, instr.mem_size)  # نوشتن در حافظه (SB/SH/SW/SD)
+            if self.tracer.levels[MEM] >= INFO:
+                self.tracer.emit(MEM, EV_MEM_STORE, store_data, addr)
+
         # پردازش سایر عملیات (عملیات ALU)
         else:  
             # انتقال نتیجه ALU بدون دسترسی به حافظه
             mem_wb["alu_result"] = addr if addr is not None else 0
 
-            if debug:
-                print(f"MEM: No memory access for op={op}")
-                log.append(f"MEM: No memory access for op={op}") if log is not None else None
+            if self.tracer.levels[MEM] >= DEBUG:
+                self.tracer.emit(MEM, EV_MEM_PASS, instr)
 
         return mem_wb  # برگرداندن داده‌های پردازش شده
\ No newline at end of file
@@ -0,0 +1,191 @@
+# pipeline/occupancy.py
+# ردیابی فشرده اشغال مراحل pipeline برای نمودار دستور × سیکل
+#
+# به هر دستور دینامیکی (هر بار واکشی) یک شماره ترتیبی داده می‌شود. برای هر
+# سیکل فقط پنج عدد صحیح (شماره دستوری که در IF/ID/EX/MEM/WB پردازش شده، -1
+# یعنی خالی) و یک بایت پرچم در آرایه ذخیره می‌شود؛ برای هر دستور هم PC و
+# سیکل واکشی آن. شبیه‌ساز در انتهای هر سیکل advance یا stall را با چند
+# پرچم صدا می‌زند و جابه‌جایی شماره‌ها بین مراحل همین‌جا محاسبه می‌شود، پس
+# نه رجیسترهای pipeline تغییر می‌کنند و نه متن لاگ تجزیه می‌شود.
+from array import array
+from bisect import bisect_left
+
+STAGE_NAMES = ("IF", "ID", "EX", "MEM", "WB")
+IF, ID, EX, MEM, WB = range(5)
+NUM_STAGES = len(STAGE_NAMES)
+
+# پرچم‌های هر سیکل
+FLAG_STALL = 1    # توقف کل pipeline (miss کش)
+FLAG_BUBBLE = 2   # دستور ID نگه داشته شد (load-use)
+FLAG_FLUSH = 4    # دستور ID به خاطر شاخه گرفته شده/پیش‌بینی غلط حذف شد
+
+EMPTY = -1
+
+
+class OccupancyTrace:
+    """
+    آرایه اشغال مراحل برای هر سیکل
+
+    Attributes:
+        slots: array('i') با NUM_STAGES خانه برای هر سیکل ثبت شده
+        flags: bytearray با یک بایت پرچم برای هر سیکل
+        pcs: array('q') PC هر دستور دینامیکی
+        fetch_cycles: array('Q') سیکل واکشی هر دستور دینامیکی
+        start_cycle: سیکل شبیه‌ساز قبل از اولین سیکل ثبت شده
+        truncated: آیا ثبت به خاطر capacity متوقف شده است
+    """
+
+    def __init__(self, capacity=500000):
+        """
+        Args:
+            capacity: حداکثر تعداد سیکل‌های ثبت شده (هر سیکل ۲۱ بایت)
+        """
+        self.capacity = capacity
+        self.slots = array('i')
+        self.flags = bytearray()
+        self.pcs = array('q')
+        self.fetch_cycles = array('Q')
+        self.start_cycle = 0
+        self.truncated = False
+        # شماره دستورهای داخل IF_ID، ID_EX، EX_MEM و MEM_WB پس از آخرین سیکل
+        self._latches = [EMPTY] * 4
+
+    @property
+    def cycles(self):
+        """تعداد سیکل‌های ثبت شده"""
+        return len(self.flags)
+
+    @property
+    def instructions(self):
+        """تعداد دستورهای دینامیکی (ردیف‌های نمودار)"""
+        return len(self.pcs)
+
+    def attach(self, simulator):
+        """
+        اتصال به شبیه‌ساز؛ دستورهایی که از قبل در pipeline هستند شماره می‌گیرند
+
+        اگر ردیاب خالی باشد ثبت از سیکل فعلی شبیه‌ساز شروع می‌شود.
+        """
+        if not self.flags:
+            self.start_cycle = simulator.cycle
+            del self.pcs[:]
+            del self.fetch_cycles[:]
+            latches = (simulator.IF_ID, simulator.ID_EX, simulator.EX_MEM, simulator.MEM_WB)
+            # قدیمی‌ترین دستور (MEM_WB) کوچک‌ترین شماره را می‌گیرد
+            for index in range(3, -1, -1):
+                latch = latches[index]
+                if latch and 'pc' in latch:   # حباب‌ها ({"op": NOP}) شماره نمی‌گیرند
+                    self._latches[index] = self._new(latch['pc'], simulator.cycle)
+                else:
+                    self._latches[index] = EMPTY
+        simulator.occupancy = self
+
+    def _new(self, pc, cycle):
+        self.pcs.append(pc)
+        self.fetch_cycles.append(cycle)
+        return len(self.pcs) - 1
+
+    # ---------------- ثبت (از PipelineSimulator._cycle) ----------------
+
+    def stall(self):
+        """سیکل توقف کش: هیچ دستوری جابه‌جا نمی‌شود"""
+        if len(self.flags) >= self.capacity:
+            self.truncated = True
+            return
+        if_id, id_ex, ex_mem, mem_wb = self._latches
+        self.slots.extend((EMPTY, if_id, id_ex, ex_mem, mem_wb))
+        self.flags.append(FLAG_STALL)
+
+    def advance(self, flushed, bubble, fetched_pc):
+        """
+        ثبت یک سیکل عادی
+
+        Args:
+            flushed: دستور IF_ID به خاطر شاخه گرفته شده حذف شد
+            bubble: حباب load-use وارد EX شد و IF_ID نگه داشته شد
+            fetched_pc: PC دستور واکشی شده در این سیکل یا None
+        """
+        if len(self.flags) >= self.capacity:
+            self.truncated = True
+            return
+        if_id, id_ex, ex_mem, mem_wb = self._latches
+        fetched = EMPTY
+        if fetched_pc is not None:
+            fetched = self._new(fetched_pc, self.start_cycle + len(self.flags) + 1)
+        self.slots.extend((fetched, if_id, id_ex, ex_mem, mem_wb))
+        flags = 0
+        if flushed and if_id != EMPTY:
+            flags = FLAG_FLUSH
+        elif bubble and if_id != EMPTY:
+            flags = FLAG_BUBBLE
+        self.flags.append(flags)
+        self._latches = self._after(fetched, if_id, id_ex, ex_mem, flags, bubble and not flushed)
+
+    @staticmethod
+    def _after(fetched, if_id, id_ex, ex_mem, flags, held):
+        """شماره دستورهای رجیسترهای pipeline در پایان یک سیکل عادی"""
+        if fetched != EMPTY:
+            next_if_id = fetched
+        elif held:
+            next_if_id = if_id
+        else:
+            next_if_id = EMPTY
+        next_id_ex = if_id if not flags and not held else EMPTY
+        return [next_if_id, next_id_ex, id_ex, ex_mem]
+
+    def truncate(self, cycle):
+        """
+        حذف سیکل‌های بعد از cycle (پس از برگشت به عقب در ExecutionHistory)
+
+        وضعیت رجیسترهای pipeline از آخرین سیکل باقی‌مانده بازسازی می‌شود.
+        """
+        keep = max(0, cycle - self.start_cycle)
+        if keep >= len(self.flags):
+            return
+        del self.flags[keep:]
+        del self.slots[keep * NUM_STAGES:]
+        self.truncated = False
+        # دستورهایی که بعد از این سیکل واکشی شده‌اند
+        count = len(self.pcs)
+        while count and self.fetch_cycles[count - 1] > cycle:
+            count -= 1
+        del self.pcs[count:]
+        del self.fetch_cycles[count:]
+        if not keep:
+            self._latches = [EMPTY] * 4
+            return
+        base = (keep - 1) * NUM_STAGES
+        fetched, if_id, id_ex, ex_mem, mem_wb = self.slots[base:base + NUM_STAGES]
+        flags = self.flags[keep - 1]
+        if flags & FLAG_STALL:
+            self._latches = [if_id, id_ex, ex_mem, mem_wb]
+        else:
+            self._latches = self._after(fetched, if_id, id_ex, ex_mem,
+                                        flags & FLAG_FLUSH, flags & FLAG_BUBBLE)
+
+    # ---------------- خواندن (برای نما) ----------------
+
+    def cell(self, row, cycle):
+        """
+        مرحله دستور row در سیکل cycle
+
+        Returns:
+            tuple: (شماره مرحله، پرچم‌های مربوط به همان خانه) یا None
+        """
+        index = cycle - self.start_cycle - 1
+        if index < 0 or index >= len(self.flags):
+            return None
+        base = index * NUM_STAGES
+        slots = self.slots
+        for stage in range(NUM_STAGES):
+            if slots[base + stage] == row:
+                flags = self.flags[index]
+                # حباب و حذف فقط مربوط به دستور ID هستند
+                if stage != ID:
+                    flags &= FLAG_STALL
+                return stage, flags
+        return None
+
+    def row_at_cycle(self, cycle):
+        """اولین دستوری که در سیکل cycle یا بعد از آن واکشی شده (برای هم‌ترازی نما)"""
+        return bisect_left(self.fetch_cycles, cycle)
@@ -6,189 +6,452 @@ from pipeline.ex_stage import EXStage
 from pipeline.mem_stage import MEMStage
 from pipeline.wb_stage import WBStage
 from cpu.control_unit import ControlUnit
+from cpu.trace import (Tracer, CTRL, PIPE, OFF, INFO, DEBUG, EV_CYCLE, EV_SIGNALS,
+                       EV_FLUSH_IF_ID, EV_FLUSH_ID_EX, EV_BRANCH_TAKEN, EV_DRAINED,
+                       EV_MEM_STALL, EV_MISPREDICT)
+from cpu.perf_counters import (PerfCounters, RunStats, INSTRET, STALL_LOAD_USE,
+                               STALL_ICACHE, STALL_DCACHE, BRANCH_FLUSHES, CSR_CYCLE,
+                               CSR_TIME, CSR_INSTRET, CSR_MCYCLE, CSR_MINSTRET)
+from cpu.cpi_stack import (CPIStack, CATEGORIES, COMMIT, LOAD_USE, BRANCH_FLUSH, FILL_DRAIN,
+                           MEM_STALL)
+from cpu.profiler import Profile
+from isa.decoder import Opcode, predecode_program
 
 import time
+from array import array
 
 go_step = False
 
 
 def is_empty(stage):
     """بررسی اینکه آیا مرحله خالی است یا خیر"""
-    return not stage or stage.get('op') == 'NOP'
+    return not stage or stage.get('op') == Opcode.NOP
 
 
-def run_pipeline(program, regs, mem, max_cycles=20, debug=True, initial_state=None):
+class PipelineSimulator:
     """
-    اجرای pipeline پردازنده با قابلیت ادامه از حالت قبلی
-    
-    Args:
-        program: برنامه‌ای که باید اجرا شود
-        regs: رجیسترهای پردازنده
-        mem: حافظه سیستم
-        max_cycles: حداکثر تعداد چرخه‌های اجرا
-        debug: نمایش اطلاعات دیباگ
-        initial_state: حالت اولیه برای ادامه اجرا
+    شبیه‌ساز pipeline پنج مرحله‌ای با حالت ماندگار
+
+    واحد کنترل، مراحل pipeline و رجیسترهای میانی یک بار ساخته می‌شوند و
+    بین فراخوانی‌های step/run_until زنده می‌مانند؛ بنابراین هر گام فقط
+    هزینه خود سیکل را دارد و اجرای گام‌به‌گام دقیقاً مثل اجرای کامل است.
+
+    کلاس‌های مراحل در ویژگی‌های کلاس نگهداری می‌شوند تا یک زیرکلاس (مثلاً در
+    sweep) بتواند هر مرحله را جایگزین کند؛ واحد کنترل هم از بیرون قابل تعیین است.
     """
+    if_stage_class = IFStage
+    id_stage_class = IDStage
+    ex_stage_class = EXStage
+    mem_stage_class = MEMStage
+    wb_stage_class = WBStage
+
+    def __init__(self, program, regs, mem, debug=True, initial_state=None, tracer=None,
+                 icache=None, dcache=None, predictor=None, control_unit=None, occupancy=None):
+        """
+        Args:
+            program: برنامه‌ای که باید اجرا شود
+            regs: رجیسترهای پردازنده
+            mem: حافظه سیستم
+            debug: اگر ردیاب داده نشود، ردیابی کامل با چاپ فوری در کنسول
+            initial_state: حالت اولیه برای ادامه اجرا (خروجی state)
+            tracer: ردیاب رویدادها (cpu.trace.Tracer)
+            icache: کش دستورات (cpu.cache.Cache، اختیاری)
+            dcache: کش داده (cpu.cache.Cache، اختیاری)
+            predictor: پیش‌بینی‌کننده شاخه (cpu.branch_predictor)؛ None یعنی
+                       مثل قبل هر شاخه taken در EX باعث flush می‌شود
+            control_unit: واحد کنترل (cpu.control_unit.ControlUnit)؛ None یعنی
+                          واحد پیش‌فرض با forwarding
+            occupancy: ردیاب اشغال مراحل (pipeline.occupancy.OccupancyTrace، اختیاری)
+        """
+        # برنامه یک بار به فرم فشرده دیکد می‌شود (برای هر برنامه کش می‌شود)
+        self.program = predecode_program(program)
+        self.regs = regs
+        self.mem = mem
+
+        # اگر حالت اولیه داده نشده، مقادیر پیش‌فرض را تنظیم کن
+        if initial_state is None:
+            initial_state = {}
+
+        # ردیاب رویدادها: در حالت debug همه دسته‌ها با چاپ فوری، در غیر این صورت خاموش
+        if tracer is None:
+            tracer = initial_state.get('trace')
+        if tracer is None:
+            tracer = Tracer(level=DEBUG if debug else OFF, echo=debug)
+        self.tracer = tracer
+        # شمارنده برنامه (لیست قابل تغییر)؛ برنامه ELF از نقطه ورود خود شروع می‌شود
+        self.pc = initial_state.get('pc', [getattr(self.program, 'entry', 0)])
+        self.IF_ID = initial_state.get('IF_ID', {})  # رجیسترهای pipeline
+        self.ID_EX = initial_state.get('ID_EX', {})
+        self.EX_MEM = initial_state.get('EX_MEM', {})
+        self.MEM_WB = initial_state.get('MEM_WB', {})
+        self.cycle = initial_state.get('cycle', 0)
+        self.fetching_done = initial_state.get('fetching_done', False)  # آیا واکشی دستورات تمام شده؟
+        self.halted = initial_state.get('halted', False)  # آیا اجرا متوقف شده؟
+        # سیکل‌های باقی‌مانده توقف کل pipeline به خاطر miss کش
+        self.stall_cycles = initial_state.get('stall_cycles', 0)
+        self.icache = icache if icache is not None else initial_state.get('icache')
+        self.dcache = dcache if dcache is not None else initial_state.get('dcache')
+        self.predictor = predictor if predictor is not None else initial_state.get('predictor')
+        self.occupancy = None
+        if occupancy is None:
+            occupancy = initial_state.get('occupancy')
+        # شمارنده‌های کارایی (instret، توقف‌ها، flush ها و forwarding)
+        self.counters = initial_state.get('counters')
+        if self.counters is None:
+            self.counters = PerfCounters()
+            self.counters.values[INSTRET] = initial_state.get('instret', 0)
+        # نسبت دادن هر سیکل به یک دسته CPI و یک دستور
+        self.cpi_stack = initial_state.get('cpi_stack')
+        if self.cpi_stack is None:
+            self.cpi_stack = CPIStack(len(self.program))
+        # پروفایل هر PC (توقف‌های load-use و flush هایی که هر دستور باعث شده)
+        self.profile = initial_state.get('profile')
+        if self.profile is None:
+            self.profile = Profile(len(self.program))
+
+        # واحد کنترل pipeline
+        if control_unit is None:
+            control_unit = initial_state.get('control_unit')
+        if control_unit is None:
+            control_unit = ControlUnit(tracer)
+        else:
+            control_unit.tracer = tracer
+        self.cu = control_unit
+
+        # ایجاد نمونه از مراحل مختلف pipeline (فقط یک بار)
+        self.if_stage = self.if_stage_class(self.program, self.pc, tracer, self.icache,
+                                            self.predictor)      # مرحله واکشی دستور
+        self.id_stage = self.id_stage_class(regs, tracer)        # مرحله رمزگشایی دستور
+        self.ex_stage = self.ex_stage_class(
+            regs, control_unit=self.cu, memory=mem, tracer=tracer,
+            text_base=getattr(self.program, 'text_base', 0))     # مرحله اجرا
+        self.mem_stage = self.mem_stage_class(mem, tracer, self.dcache)  # مرحله دسترسی به حافظه
+        self.wb_stage = self.wb_stage_class(regs, tracer)        # مرحله بازنویسی
+        self.ex_stage.counters = self.counters.values
+        if occupancy is not None:
+            occupancy.attach(self)
+
+    def step(self, n=1):
+        """
+        اجرای n سیکل (یا کمتر اگر pipeline زودتر تخلیه شود)
+
+        Returns:
+            int: تعداد سیکل‌های اجرا شده
+        """
+        done = 0
+        while done < n and not self.halted:
+            self._cycle()
+            done += 1
+        return done
+
+    def run_until(self, max_cycles=None, condition=None):
+        """
+        اجرا تا توقف pipeline، رسیدن به سیکل max_cycles یا برقرار شدن شرط
+
+        Args:
+            max_cycles: شماره سیکلی که اجرا در آن متوقف می‌شود (مثل run_pipeline)
+            condition: تابعی که simulator را می‌گیرد و با True اجرا را متوقف می‌کند
+
+        Returns:
+            dict: حالت فعلی (خروجی state)
+        """
+        while not self.halted:
+            if max_cycles is not None and self.cycle >= max_cycles:
+                break
+            if condition is not None and condition(self):
+                break
+            self._cycle()
+        return self.state()
+
+    @property
+    def instret(self):
+        """تعداد دستورات بازنشسته شده در WB"""
+        return self.counters.values[INSTRET]
+
+    def read_csr(self, csr):
+        """
+        خواندن شمارنده‌ها مثل دستور CSRR در RISC-V (cycle، time، instret)
+
+        time همان شماره سیکل است (ساعت دیواری شبیه‌سازی نمی‌شود).
+        """
+        if csr in (CSR_CYCLE, CSR_MCYCLE, CSR_TIME):
+            return self.cycle
+        if csr in (CSR_INSTRET, CSR_MINSTRET):
+            return self.counters.values[INSTRET]
+        raise ValueError(f"Unsupported CSR 0x{csr:03X}")
+
+    def stats(self):
+        """آمار ساخت‌یافته اجرا تا این لحظه (cpu.perf_counters.RunStats)"""
+        return RunStats(self.cycle, self.counters, (self.icache, self.dcache), self.predictor,
+                        self.opcode_counts())
+
+    def opcode_counts(self):
+        """
+        دستورات بازنشسته به تفکیک opcode
 
-    # اگر حالت اولیه داده نشده، مقادیر پیش‌فرض را تنظیم کن
-    if initial_state is None:
-        pc = [0]  # شمارنده برنامه (Program Counter)
-        IF_ID, ID_EX, EX_MEM, MEM_WB = {}, {}, {}, {}  # رجیسترهای pipeline
-        cycle = 0
-        fetching_done = False  # آیا واکشی دستورات تمام شده؟
-        halted = False  # آیا اجرا متوقف شده؟
-        log = []  # لاگ عملیات
-        cycle = 0
-        pc = [0]  # PC قابل تغییر
-
-    else:
-        # بازیابی حالت از state قبلی
-        pc = initial_state['pc']
-        IF_ID = initial_state.get('IF_ID', {})
-        ID_EX = initial_state.get('ID_EX', {})
-        EX_MEM = initial_state.get('EX_MEM', {})
-        MEM_WB = initial_state.get('MEM_WB', {})
-        cycle = initial_state.get('cycle', 0)
-        fetching_done = initial_state.get('fetching_done', False)
-        halted = initial_state.get('halted', False)
-        log = initial_state.get('log', [])
-
-    # رجیستر کمکی برای نگهداری حالت قبلی EX_MEM
-    EX_MEM_LAST = {}
-
-    # واحد کنترل pipeline
-    cu = ControlUnit()
-
-    # ایجاد نمونه از مراحل مختلف pipeline
-    if_stage = IFStage(program, pc)      # مرحله واکشی دستور
-    id_stage = IDStage(regs)             # مرحله رمزگشایی دستور
-    ex_stage = EXStage(regs, control_unit=cu, memory=mem)  # مرحله اجرا
-    mem_stage = MEMStage(mem)            # مرحله دسترسی به حافظه
-    wb_stage = WBStage(regs)             # مرحله بازنویسی
-
-    # حلقه اصلی اجرای pipeline
-    while not halted and cycle < max_cycles:
-        cycle += 1
-        if debug:
-            print(f"\n=== Cycle {cycle} ===")
-            log.append(f"\n=== Cycle {cycle} ===")
+        از شمارنده‌های COMMIT هر PC در CPI stack ساخته می‌شود تا بازنشسته شدن
+        هر دستور در حلقه سیکل فقط یک شمارنده را زیاد کند.
+        """
+        counts = array('Q', [0]) * len(Opcode)
+        cycles = self.cpi_stack.cycles
+        for pc, instr in enumerate(self.program):
+            commits = cycles[pc * CATEGORIES + COMMIT]
+            if commits:
+                counts[instr.op] += commits
+        return counts
+
+    def state(self):
+        """ذخیره حالت فعلی برای امکان ادامه اجرا"""
+        return {
+            'pc': self.pc,
+            'IF_ID': self.IF_ID,
+            'ID_EX': self.ID_EX,
+            'EX_MEM': self.EX_MEM,
+            'MEM_WB': self.MEM_WB,
+            'cycle': self.cycle,
+            'fetching_done': self.fetching_done,
+            'halted': self.halted,
+            'stall_cycles': self.stall_cycles,
+            'icache': self.icache,
+            'dcache': self.dcache,
+            'predictor': self.predictor,
+            'occupancy': self.occupancy,
+            'control_unit': self.cu,
+            'instret': self.instret,
+            'counters': self.counters,
+            'cpi_stack': self.cpi_stack,
+            'profile': self.profile,
+            'stats': self.stats(),
+            'trace': self.tracer
+        }
+
+    def _cycle(self):
+        """اجرای یک سیکل کامل pipeline"""
+        tracer = self.tracer
+        levels = tracer.levels
+        cu = self.cu
+        pc = self.pc
+        IF_ID = self.IF_ID
+        ID_EX = self.ID_EX
+        EX_MEM = self.EX_MEM
+        MEM_WB = self.MEM_WB
+        counters = self.counters.values
+        stack = self.cpi_stack
+        bubbles = stack.bubbles
+
+        self.cycle += 1
+        tracer.cycle = self.cycle
+        if levels[PIPE] >= INFO:
+            tracer.emit(PIPE, EV_CYCLE, self.cycle)
+
+        # ---------------- توقف به خاطر miss کش ----------------
+        # همه رجیسترهای pipeline ثابت می‌مانند تا دسترسی حافظه کامل شود
+        if self.stall_cycles:
+            stack.cycles[stack.stall_slot] += 1
+            self.stall_cycles -= 1
+            if levels[PIPE] >= INFO:
+                tracer.emit(PIPE, EV_MEM_STALL, self.stall_cycles)
+            if self.occupancy is not None:
+                self.occupancy.stall()
+            return
 
         # ---------------- مرحله WB (Write Back) ----------------
         # آخرین مرحله: نوشتن نتایج در رجیسترها
-        halted = wb_stage.run(MEM_WB, log, debug=debug)
+        if MEM_WB:
+            counters[INSTRET] += 1
+            stack.cycles[stack.slot(COMMIT, MEM_WB['pc'])] += 1
+        else:
+            stack.cycles[bubbles[2]] += 1  # علت حبابی که به WB رسیده
+        mem_pc = EX_MEM.get('pc')
+        halted = bool(self.wb_stage.run(MEM_WB))
 
         # ---------------- مرحله MEM (Memory Access) ----------------
         # دسترسی به حافظه و آماده‌سازی داده برای WB
-        MEM_WB = mem_stage.run(EX_MEM, log, debug=debug)
+        MEM_WB = self.mem_stage.run(EX_MEM)
 
         # ---------------- محاسبه سیگنال‌های کنترل و Forwarding ----------------
         # واحد کنترل تشخیص می‌دهد که آیا نیاز به stall، flush یا forwarding هست
         signals = cu.compute_signals(
             IF_ID, ID_EX, EX_MEM, MEM_WB, branch_taken=False)
-        if debug:
-            print("Control signals: " +
-                  ", ".join(f"{k}={v}" for k, v in signals.items()))
-            log.append("Control signals: " +
-                       ", ".join(f"{k}={v}" for k, v in signals.items()))
+        if levels[CTRL] >= DEBUG:
+            tracer.emit(CTRL, EV_SIGNALS, *signals.values())
 
         # ---------------- اعمال سیگنال‌های Flush ----------------
         # در صورت branch یا jump، باید مراحل قبلی را پاک کنیم
         if signals.get("flush_if_id", False):
-            if debug:
-                print(
-                    "⚠️ Flush: Clearing IF/ID register (invalid instruction removed)")
-                log.append(
-                    "⚠️ Flush: Clearing IF/ID register (invalid instruction removed)")
+            if levels[CTRL] >= INFO:
+                tracer.emit(CTRL, EV_FLUSH_IF_ID)
             IF_ID.clear()
 
         if signals.get("flush_id_ex", False):
-            if debug:
-                print("⚠️ Flush: Inserting bubble (NOP) into ID/EX stage")
-                log.append(
-                    "⚠️ Flush: Inserting bubble (NOP) into ID/EX stage")
-            ID_EX = {"op": "NOP"}
-
-        # سیگنال‌های forwarding برای حل data hazard
-        forwarding_signals = {
-            "forwardA": signals["forwardA"],
-            "forwardB": signals["forwardB"]
-        }
+            if levels[CTRL] >= INFO:
+                tracer.emit(CTRL, EV_FLUSH_ID_EX)
+            ID_EX = {"op": Opcode.NOP}
 
         # ---------------- مرحله EX (Execute) ----------------
-        # اجرای دستور و بررسی branch
-        EX_MEM, branch_taken, next_pc = ex_stage.run(
+        # اجرای دستور و بررسی branch؛ سیگنال‌های forwardA/forwardB از همان signals
+        # خوانده می‌شوند و EX هر forwarding اعمال شده را می‌شمارد
+        EX_MEM, branch_taken, next_pc = self.ex_stage.run(
             ID_EX,
-            log,
-            forwarding_signals=forwarding_signals,
+            forwarding_signals=signals,
             ex_mem_reg=EX_MEM,
-            mem_wb_reg=MEM_WB,
-            debug=debug
+            mem_wb_reg=MEM_WB
         )
 
         # ---------------- مدیریت Branch و Jump ----------------
-        # اگر branch گرفته شد، باید pipeline را flush کنیم
+        # بدون پیش‌بینی‌کننده: هر branch گرفته شده یعنی flush
+        # با پیش‌بینی‌کننده: فقط وقتی PC بعدی واقعی با پیش‌بینی IF فرق کند
+        if self.predictor is not None:
+            branch_taken, next_pc = self._resolve_prediction(ID_EX, branch_taken, next_pc)
+        # علت حباب جدید ID/EX (اگر در این سیکل دستوری وارد EX نشود)
+        id_bubble = None
+        # مقصر توقف پیش از آن که flush شاخه IF/ID را پاک کند پیدا می‌شود
+        producer = self._stall_producer(IF_ID) if signals["bubble_ex"] else None
         if branch_taken:
-            if debug:
-                print(
-                    f"🚀 Branch taken! Flushing pipeline and jumping to PC={next_pc}")
-                log.append(
-                    f"🚀 Branch taken! Flushing pipeline and jumping to PC={next_pc}")
+            id_bubble = stack.slot(BRANCH_FLUSH, ID_EX.get('pc'))
+            counters[BRANCH_FLUSHES] += 1
+            self.profile.flushes[ID_EX['pc']] += 1
+            if levels[CTRL] >= INFO:
+                tracer.emit(CTRL, EV_BRANCH_TAKEN, next_pc)
+            # IFStage همان لیست pc را نگه می‌دارد؛ نیازی به ساخت دوباره آن نیست
             pc[0] = next_pc
-            if_stage = IFStage(program, pc)
-            fetching_done = False
+            self.fetching_done = False
             IF_ID.clear()
-            ID_EX = {"op": "NOP"}
+            ID_EX = {"op": Opcode.NOP}
 
         # ---------------- مرحله ID (Instruction Decode) ----------------
         # رمزگشایی دستور و آماده‌سازی operandها
         if signals["bubble_ex"]:
             # وارد کردن bubble (NOP) در صورت نیاز
-            ID_EX = {"op": "NOP"}
+            counters[STALL_LOAD_USE] += 1
+            id_bubble = stack.slot(LOAD_USE, IF_ID.get('pc'))
+            if producer is not None:
+                self.profile.load_use[producer] += 1
+            ID_EX = {"op": Opcode.NOP}
         elif signals["stall_id"]:
             # نگه‌داشتن مرحله ID در صورت data hazard
             pass
         else:
             # اجرای عادی مرحله ID
-            ID_EX = id_stage.run(
-                IF_ID, EX_MEM, EX_MEM_LAST, log, debug=debug)
+            # دستوری که در این سیکل از MEM گذشته از MEM_WB جدید forward می‌شود تا
+            # برای load ها داده خوانده شده (نه آدرس) به ID برسد
+            ID_EX = self.id_stage.run(
+                IF_ID, EX_MEM, MEM_WB)
 
-        # نگهداری حالت قبلی EX_MEM برای forwarding
-        EX_MEM_LAST = EX_MEM
+        if id_bubble is None:
+            # IF/ID خالی بود: شروع اجرا (fill) یا پایان واکشی (drain)
+            id_bubble = stack.slot(FILL_DRAIN)
+        stack.bubbles = [id_bubble, bubbles[0], bubbles[1]]
 
         # ---------------- مرحله IF (Instruction Fetch) ----------------
         # واکشی دستور جدید از حافظه
+        fetched = False
         if signals["stall_if"]:
             # نگه‌داشتن PC در صورت data hazard
             pass
         else:
-            if not fetching_done:
+            if not self.fetching_done:
                 # واکشی دستور بعدی
-                if_stage.run(IF_ID, log)
-                if not IF_ID:
+                self.if_stage.run(IF_ID)
+                fetched = bool(IF_ID)
+                if not fetched:
                     # اگر دستوری واکشی نشد، یعنی برنامه تمام شده
-                    fetching_done = True
+                    self.fetching_done = True
             else:
                 # پاک کردن IF_ID اگر واکشی تمام شده
                 IF_ID.clear()
 
         # ---------------- بررسی پایان pipeline ----------------
         # اگر همه مراحل خالی شدند، pipeline تمام شده است
-        if fetching_done and all(is_empty(stage) for stage in [IF_ID, ID_EX, EX_MEM, MEM_WB]):
-            if debug:
-                print("✅ Pipeline drained, stopping.")
-                log.append("✅ Pipeline drained, stopping.")
+        if self.fetching_done and all(is_empty(stage) for stage in [IF_ID, ID_EX, EX_MEM, MEM_WB]):
+            if levels[PIPE] >= INFO:
+                tracer.emit(PIPE, EV_DRAINED)
             halted = True
 
-    # ذخیره حالت فعلی برای امکان ادامه اجرا
-    state = {
-        'pc': pc,
-        'IF_ID': IF_ID,
-        'ID_EX': ID_EX,
-        'EX_MEM': EX_MEM,
-        'MEM_WB': MEM_WB,
-        'cycle': cycle,
-        'fetching_done': fetching_done,
-        'halted': halted,
-        'log': log
-    }
-    return state
\ No newline at end of file
+        if self.occupancy is not None:
+            self.occupancy.advance(branch_taken, signals["bubble_ex"],
+                                   IF_ID['pc'] if fetched else None)
+
+        # miss های همین سیکل (IF و MEM هم‌زمان منتظر می‌مانند)
+        if self.icache is not None or self.dcache is not None:
+            istall = self.if_stage.stall_cycles
+            dstall = self.mem_stage.stall_cycles
+            self.stall_cycles = max(istall, dstall)
+            # توقف هم‌پوشان به حساب کش داده نوشته می‌شود؛ فقط بخش اضافه مال کش دستورات است
+            counters[STALL_DCACHE] += dstall
+            if istall > dstall:
+                counters[STALL_ICACHE] += istall - dstall
+            stack.stall_slot = stack.slot(MEM_STALL, mem_pc if dstall else IF_ID.get('pc'))
+            self.if_stage.stall_cycles = self.mem_stage.stall_cycles = 0
+            if halted:
+                # آخرین دسترسی‌ها هم باید کامل شوند
+                self.cycle += self.stall_cycles
+                stack.cycles[stack.stall_slot] += self.stall_cycles
+                self.stall_cycles = 0
+
+        self.ID_EX = ID_EX
+        self.EX_MEM = EX_MEM
+        self.MEM_WB = MEM_WB
+        self.halted = halted
+
+
+    def _stall_producer(self, if_id):
+        """
+        PC دستوری که دستور IF/ID منتظر نتیجه آن است (load داخل EX؛ بدون
+        forwarding هر نوشتن معوق در EX یا MEM)؛ None اگر پیدا نشود
+        """
+        instr = if_id.get('instr')
+        if instr is None:
+            return None
+        sources = (instr.rs1 if instr.reads_rs1 else None,
+                   instr.rs2 if instr.reads_rs2 else None)
+        for stage in (self.ID_EX, self.EX_MEM):
+            rd = stage.get('rd')
+            if rd is not None and rd in sources:
+                return stage.get('pc')
+        return None
+
+    def _resolve_prediction(self, id_ex, taken, next_pc):
+        """
+        مقایسه نتیجه شاخه در EX با پیش‌بینی IF و آموزش پیش‌بینی‌کننده
+
+        Returns:
+            tuple: (آیا باید redirect/flush شود، PC درست)
+        """
+        instr = id_ex.get('instr')
+        if instr is None or not (instr.is_branch or instr.is_jump):
+            return False, next_pc
+        pc = id_ex['pc']
+        actual = next_pc if taken else pc + 1
+        predicted = id_ex.get('pred_pc', pc + 1)
+        correct = predicted == actual
+        self.predictor.update(pc, instr, taken, actual, correct)
+        if not correct and self.tracer.levels[CTRL] >= INFO:
+            self.tracer.emit(CTRL, EV_MISPREDICT, pc, predicted, actual)
+        return not correct, actual
+
+
+def run_pipeline(program, regs, mem, max_cycles=20, debug=True, initial_state=None, tracer=None,
+                 icache=None, dcache=None, predictor=None, control_unit=None, occupancy=None):
+    """
+    اجرای pipeline پردازنده با قابلیت ادامه از حالت قبلی
+
+    Args:
+        program: برنامه‌ای که باید اجرا شود
+        regs: رجیسترهای پردازنده
+        mem: حافظه سیستم
+        max_cycles: حداکثر تعداد چرخه‌های اجرا
+        debug: نمایش اطلاعات دیباگ
+        initial_state: حالت اولیه برای ادامه اجرا
+        tracer: ردیاب رویدادها (اختیاری)
+        icache: کش دستورات (اختیاری)
+        dcache: کش داده (اختیاری)
+        predictor: پیش‌بینی‌کننده شاخه (اختیاری)
+        control_unit: واحد کنترل (اختیاری، مثلاً ControlUnit(forwarding=False))
+        occupancy: ردیاب اشغال مراحل برای نمودار pipeline (اختیاری)
+    """
+    simulator = PipelineSimulator(program, regs, mem, debug=debug,
+                                  initial_state=initial_state, tracer=tracer,
+                                  icache=icache, dcache=dcache, predictor=predictor,
+                                  control_unit=control_unit, occupancy=occupancy)
+    return simulator.run_until(max_cycles=max_cycles)
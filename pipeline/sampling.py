@@ -0,0 +1,128 @@
+# pipeline/sampling.py
+# شبیه‌سازی نمونه‌برداری شده (به سبک SMARTS): پیشروی سریع تابعی و پنجره‌های دقیق pipeline
+#
+# هر دوره نمونه‌برداری:
+#   ۱. fast_forward دستور با موتور تابعی (بدون مدل زمانی)
+#   ۲. warmup دستور در pipeline برای گرم کردن کش‌ها، پیش‌بینی‌کننده و خود pipeline
+#   ۳. window دستور در pipeline که سیکل‌هایشان اندازه‌گیری می‌شود
+# هر دو مدل روی همان RegisterFile و Memory کار می‌کنند، پس جابه‌جایی بین آن‌ها
+# فقط PC را منتقل می‌کند و حافظه کپی نمی‌شود. کش‌ها و پیش‌بینی‌کننده بین
+# پنجره‌ها حفظ می‌شوند.
+import math
+import statistics
+import time
+
+from cpu.trace import Tracer, OFF
+from isa.decoder import Opcode, predecode_program
+from pipeline.pipeline_runner import PipelineSimulator
+from pipeline.block_translator import run_translated
+
+
+def resume_pc(simulator):
+    """
+    PC قدیمی‌ترین دستوری که هنوز در WB بازنشسته نشده است
+
+    دستورات EX/MEM و MEM/WB همیشه روی مسیر درست هستند (شاخه‌ها در EX حل
+    می‌شوند) و اجرای دوباره آن‌ها در موتور تابعی همان نتیجه را می‌دهد: تنها
+    اثر جانبی قبل از WB نوشتن store در MEM است که با همان رجیسترها تکرار می‌شود.
+    """
+    for latch in (simulator.MEM_WB, simulator.EX_MEM, simulator.ID_EX, simulator.IF_ID):
+        if latch and latch.get('op') != Opcode.NOP and 'pc' in latch:
+            return latch['pc']
+    return simulator.pc[0]
+
+
+def run_sampled(program, regs, mem, fast_forward=100000, warmup=2000, window=1000,
+                max_instructions=None, icache=None, dcache=None, predictor=None,
+                control_unit=None, engine=run_translated, confidence=0.95):
+    """
+    اجرای برنامه با نمونه‌برداری و تخمین CPI کل
+
+    Args:
+        program: برنامه (خروجی parser یا load_elf)
+        regs: رجیسترهای پردازنده (بین مدل‌ها مشترک)
+        mem: حافظه سیستم (بین مدل‌ها مشترک)
+        fast_forward: تعداد دستورات تابعی قبل از هر پنجره
+        warmup: دستورات pipeline قبل از اندازه‌گیری (گرم کردن)
+        window: دستورات اندازه‌گیری شده در هر پنجره
+        max_instructions: سقف کل دستورات (None یعنی تا پایان برنامه)
+        icache, dcache, predictor, control_unit: اجزای مدل دقیق (اختیاری)
+        engine: run_translated یا run_functional برای پیشروی سریع
+        confidence: سطح اطمینان بازه CPI
+
+    Returns:
+        dict: تعداد دستورات، CPI هر پنجره، میانگین، بازه اطمینان و سیکل تخمینی
+    """
+    decoded = predecode_program(program)
+    n = len(decoded)
+    pc = [getattr(decoded, 'entry', 0)]
+    tracer = Tracer(level=OFF, capacity=1)
+    limit = max_instructions if max_instructions is not None else float('inf')
+
+    instructions = 0          # کل دستورات اجرا شده (هر دو مدل)
+    detailed = 0              # دستورات اجرا شده در pipeline
+    samples = []              # CPI هر پنجره
+    halted = False
+    start = time.perf_counter()
+
+    while not halted and instructions < limit:
+        # ---------------- پیشروی سریع تابعی ----------------
+        count = int(min(fast_forward, limit - instructions))
+        if count:
+            state = engine(decoded, regs, mem, max_instructions=count,
+                           initial_state={'pc': pc})
+            instructions += state['executed']
+            halted = state['halted']
+            if halted:
+                break
+
+        # ---------------- گرم کردن و پنجره دقیق ----------------
+        target = int(min(warmup + window, limit - instructions))
+        if target <= 0:
+            break
+        simulator = PipelineSimulator(decoded, regs, mem, debug=False, tracer=tracer,
+                                      initial_state={'pc': pc}, icache=icache,
+                                      dcache=dcache, predictor=predictor,
+                                      control_unit=control_unit)
+        simulator.run_until(condition=lambda s: s.instret >= min(warmup, target))
+        begin_cycle, begin_instret = simulator.cycle, simulator.instret
+        simulator.run_until(condition=lambda s: s.instret >= target)
+        measured = simulator.instret - begin_instret
+        if measured and not simulator.halted:
+            samples.append((simulator.cycle - begin_cycle) / measured)
+        instructions += simulator.instret
+        detailed += simulator.instret
+        halted = simulator.halted
+        # بازگشت به مدل تابعی از اولین دستور بازنشسته نشده
+        pc = [resume_pc(simulator)] if not halted else [n]
+
+    return _estimate(samples, instructions, detailed, halted, confidence,
+                     time.perf_counter() - start)
+
+
+def _estimate(samples, instructions, detailed, halted, confidence, elapsed):
+    """میانگین CPI پنجره‌ها، بازه اطمینان نرمال و سیکل تخمینی کل برنامه"""
+    result = {
+        'instructions': instructions,
+        'detailed_instructions': detailed,
+        'windows': len(samples),
+        'samples': samples,
+        'halted': halted,
+        'confidence': confidence,
+        'elapsed': elapsed,
+    }
+    if not samples:
+        result.update(cpi=None, stdev=None, ci=None, relative_error=None, estimated_cycles=None)
+        return result
+    mean = statistics.fmean(samples)
+    stdev = statistics.stdev(samples) if len(samples) > 1 else 0.0
+    z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+    half = z * stdev / math.sqrt(len(samples))
+    result.update(
+        cpi=mean,
+        stdev=stdev,
+        ci=(mean - half, mean + half),
+        relative_error=half / mean if mean else 0.0,
+        estimated_cycles=round(mean * instructions),
+    )
+    return result
@@ -0,0 +1,288 @@
+# pipeline/sweep.py
+# جست‌وجوی فضای طراحی: اجرای هر (پیکربندی، برنامه) در پردازه‌های موازی
+#
+# هر پیکربندی یک دیکشنری ساده از پارامترهای ریزمعماری است (forwarding،
+# پیش‌بینی‌کننده، هندسه کش، تأخیر حافظه). نتایج سطر به سطر به یک فایل CSV
+# اضافه می‌شوند؛ اجرای دوباره با همان فایل فقط جفت‌های انجام نشده را اجرا
+# می‌کند، پس sweep قطع شده از اول شروع نمی‌شود.
+import csv
+import hashlib
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from cpu.registers import RegisterFile
+from cpu.memory import Memory
+from cpu.cache import Cache
+from cpu.control_unit import ControlUnit
+from cpu.branch_predictor import make_predictor
+from cpu.cpi_stack import CATEGORY_NAMES
+from cpu.trace import Tracer, OFF
+from pipeline.pipeline_runner import PipelineSimulator
+from pipeline.batch_runner import DEFAULT_LIMIT, load_program, apply_setup
+
+# پارامترهای پیکربندی و مقدار پیش‌فرض هر کدام (ترتیب ستون‌های CSV)
+DEFAULT_CONFIG = {
+    'forwarding': True,
+    'predictor': 'none',     # "none" یا یکی از cpu.branch_predictor.PREDICTORS
+    'btb_entries': 0,
+    'cache_size': 0,         # ۰ یعنی بدون کش (حافظه ایده‌آل)
+    'cache_assoc': 2,
+    'line_size': 32,
+    'mem_latency': 10,       # جریمه هر miss کش بر حسب سیکل
+}
+CONFIG_FIELDS = tuple(DEFAULT_CONFIG)
+
+RESULT_FIELDS = (('program', 'cycles', 'instret', 'cpi') + CATEGORY_NAMES +
+                 ('icache_hit_rate', 'dcache_hit_rate', 'bp_accuracy',
+                  'cost_bits', 'regs_digest', 'error'))
+CSV_FIELDS = ('config',) + CONFIG_FIELDS + RESULT_FIELDS
+
+# تخمین تقریبی هزینه سخت‌افزار بر حسب بیت ذخیره‌سازی
+FORWARDING_COST_BITS = 4 * 64   # دو مالتی‌پلکسر ۶۴ بیتی برای هر عملوند
+PREDICTOR_COUNTER_BITS = 2
+BTB_ENTRY_BITS = 2 * 64         # برچسب + مقصد
+DEFAULT_PREDICTOR_ENTRIES = {'bimodal': 1024, 'gshare': 4096}
+
+
+def _parse_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+
+
+def normalize_config(config):
+    """پیکربندی کامل با مقادیر پیش‌فرض و نوع‌های درست (مثلاً وقتی از CSV خوانده می‌شود)"""
+    unknown = set(config) - set(DEFAULT_CONFIG)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+    result = dict(DEFAULT_CONFIG)
+    result.update(config)
+    result['forwarding'] = _parse_bool(result['forwarding'])
+    result['predictor'] = str(result['predictor'] or 'none')
+    for name in ('btb_entries', 'cache_size', 'cache_assoc', 'line_size', 'mem_latency'):
+        result[name] = int(result[name])
+    return result
+
+
+def config_key(config):
+    """شناسه پایدار و خوانای پیکربندی (ستون config در CSV)"""
+    config = normalize_config(config)
+    return ','.join(f"{name}={int(config[name]) if name == 'forwarding' else config[name]}"
+                    for name in CONFIG_FIELDS)
+
+
+def expand_grid(space):
+    """
+    همه ترکیب‌های پارامترها
+
+    Args:
+        space: نام پارامتر → لیست مقادیر (پارامترهای نیامده مقدار پیش‌فرض دارند)
+
+    Returns:
+        list: پیکربندی‌های کامل به ترتیب ثابت
+    """
+    names = list(space)
+    values = [space[name] if isinstance(space[name], (list, tuple)) else [space[name]]
+              for name in names]
+    return [normalize_config(dict(zip(names, combo))) for combo in itertools.product(*values)]
+
+
+def hardware_cost(config):
+    """تخمین ساده بیت‌های ذخیره‌سازی اضافه شده توسط پیکربندی (برای Pareto)"""
+    config = normalize_config(config)
+    bits = FORWARDING_COST_BITS if config['forwarding'] else 0
+    predictor = config['predictor']
+    if predictor in DEFAULT_PREDICTOR_ENTRIES:
+        bits += DEFAULT_PREDICTOR_ENTRIES[predictor] * PREDICTOR_COUNTER_BITS
+    btb_entries = 512 if predictor == 'btb' else config['btb_entries']
+    if predictor != 'none' and btb_entries:
+        bits += btb_entries * BTB_ENTRY_BITS
+    if config['cache_size']:
+        # داده + برچسب/معتبر/dirty هر خط، برای هر دو کش I و D
+        lines = config['cache_size'] // config['line_size']
+        bits += 2 * (config['cache_size'] * 8 + lines * 50)
+    return bits
+
+
+def build_simulator(config, program, regs, mem):
+    """ساخت PipelineSimulator با اجزای پیکربندی (بدون ردیابی)"""
+    config = normalize_config(config)
+    icache = dcache = predictor = None
+    if config['cache_size']:
+        geometry = dict(size=config['cache_size'], assoc=config['cache_assoc'],
+                        line_size=config['line_size'], miss_penalty=config['mem_latency'])
+        icache = Cache(name="L1I", **geometry)
+        dcache = Cache(name="L1D", **geometry)
+    if config['predictor'] != 'none':
+        predictor = make_predictor(config['predictor'], btb_entries=config['btb_entries'])
+    tracer = Tracer(level=OFF, capacity=1)
+    return PipelineSimulator(program, regs, mem, debug=False, tracer=tracer,
+                             icache=icache, dcache=dcache, predictor=predictor,
+                             control_unit=ControlUnit(tracer, forwarding=config['forwarding']))
+
+
+def run_point(config, job):
+    """
+    اجرای یک برنامه با یک پیکربندی (تابع worker)
+
+    Returns:
+        dict: یک سطر CSV
+    """
+    config = normalize_config(config)
+    row = {'config': config_key(config), **config, 'program': job['program'],
+           'cost_bits': hardware_cost(config), 'error': ''}
+    try:
+        rf = RegisterFile()
+        mem = Memory()
+        program, _ = load_program(job['program'], mem, rf)
+        apply_setup(job, mem, rf)
+        simulator = build_simulator(config, program, rf, mem)
+        simulator.run_until(max_cycles=job.get('max_cycles', DEFAULT_LIMIT))
+        stats = simulator.stats()
+        row.update(cycles=stats.cycle, instret=stats.instret, cpi=round(stats.cpi, 6))
+        row.update(simulator.cpi_stack.program_stack()['breakdown'])
+        caches = stats.caches
+        row['icache_hit_rate'] = round(caches['L1I']['hit_rate'], 6) if 'L1I' in caches else ''
+        row['dcache_hit_rate'] = round(caches['L1D']['hit_rate'], 6) if 'L1D' in caches else ''
+        row['bp_accuracy'] = round(stats.predictor['accuracy'], 6) if stats.predictor else ''
+        # برای بررسی اینکه پیکربندی‌ها نتیجه معماری را تغییر نمی‌دهند
+        row['regs_digest'] = hashlib.blake2b(
+            repr(rf.registers).encode(), digest_size=8).hexdigest()
+        if not simulator.halted:
+            row['error'] = 'cycle limit reached'
+    except Exception as e:
+        row['error'] = f"{type(e).__name__}: {e}"
+    return row
+
+
+def _completed(path):
+    """جفت‌های (config, program) که قبلاً در CSV نوشته شده‌اند"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, 'rb+') as f:
+        # سطر نیمه‌کاره آخر (اجرای قطع شده) حذف می‌شود
+        data = f.read()
+        if data and not data.endswith(b'\n'):
+            f.truncate(data.rfind(b'\n') + 1)
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            if row.get('error') is not None:
+                done.add((row['config'], row['program']))
+    return done
+
+
+def run_sweep(configs, jobs, out_path, workers=None, progress=None):
+    """
+    اجرای همه جفت‌های (پیکربندی، برنامه) که هنوز در out_path نیستند
+
+    Args:
+        configs: لیست پیکربندی‌ها (مثلاً خروجی expand_grid)
+        jobs: برنامه‌ها به شکل کارهای batch_runner ({"program": ...})
+        out_path: فایل CSV نتایج (اضافه شدن سطر به سطر)
+        workers: تعداد پردازه‌ها (None یعنی تعداد هسته‌ها)
+        progress: تابع اختیاری (انجام شده، کل) بعد از هر سطر
+
+    Returns:
+        int: تعداد جفت‌هایی که در این فراخوانی اجرا شدند
+    """
+    done = _completed(out_path)
+    pending = [(config, job) for config in configs for job in jobs
+               if (config_key(config), job['program']) not in done]
+    new_file = not os.path.exists(out_path) or os.path.getsize(out_path) == 0
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    with open(out_path, 'a', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        if new_file:
+            writer.writeheader()
+
+        def write(row, count):
+            writer.writerow(row)
+            f.flush()
+            if progress is not None:
+                progress(count, len(pending))
+
+        if workers <= 1:
+            for count, (config, job) in enumerate(pending, 1):
+                write(run_point(config, job), count)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(run_point, config, job) for config, job in pending]
+                for count, future in enumerate(as_completed(futures), 1):
+                    write(future.result(), count)
+    return len(pending)
+
+
+def load_results(path):
+    """سطرهای CSV نتایج با نوع‌های عددی"""
+    rows = []
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            row.update(normalize_config({name: row[name] for name in CONFIG_FIELDS}))
+            for name in ('cycles', 'instret', 'cost_bits') + CATEGORY_NAMES:
+                row[name] = int(row[name]) if row[name] else 0
+            rows.append(row)
+    return rows
+
+
+def summarize(rows):
+    """
+    جمع نتایج هر پیکربندی روی همه برنامه‌ها
+
+    CPI کل = مجموع سیکل‌ها / مجموع دستورات؛ پیکربندی‌ای که در یکی از
+    برنامه‌ها خطا داشته باشد کنار گذاشته می‌شود.
+
+    Returns:
+        list: دیکشنری هر پیکربندی (config، پارامترها، cycles، instret، cpi، cost_bits، programs)
+    """
+    groups = {}
+    failed = set()
+    for row in rows:
+        if row['error']:
+            failed.add(row['config'])
+        group = groups.setdefault(row['config'], {
+            'config': row['config'], **{name: row[name] for name in CONFIG_FIELDS},
+            'cycles': 0, 'instret': 0, 'cost_bits': row['cost_bits'], 'programs': 0})
+        group['cycles'] += row['cycles']
+        group['instret'] += row['instret']
+        group['programs'] += 1
+    summary = []
+    for key, group in groups.items():
+        if key in failed or not group['instret']:
+            continue
+        group['cpi'] = group['cycles'] / group['instret']
+        summary.append(group)
+    return summary
+
+
+def pareto_front(summary, group_by='mem_latency'):
+    """
+    پیکربندی‌های Pareto بهینه (CPI کمتر در برابر هزینه سخت‌افزار کمتر)
+
+    تأخیر حافظه پارامتر محیط است نه سخت‌افزار، پس جبهه برای هر مقدار آن
+    جداگانه محاسبه می‌شود.
+
+    Returns:
+        dict: مقدار group_by → لیست پیکربندی‌های جبهه به ترتیب هزینه
+    """
+    fronts = {}
+    for point in sorted(summary, key=lambda p: (p['cost_bits'], p['cpi'])):
+        front = fronts.setdefault(point[group_by], [])
+        # به ترتیب هزینه: نقطه فقط وقتی غالب نشده است که CPI کمتری از همه قبلی‌ها داشته باشد
+        if not front or point['cpi'] < front[-1]['cpi']:
+            front.append(point)
+    return fronts
+
+
+def format_pareto(fronts, group_by='mem_latency'):
+    """جدول متنی جبهه‌های Pareto"""
+    lines = []
+    for value, front in sorted(fronts.items()):
+        lines.append(f"=== Pareto front ({group_by}={value}) ===")
+        lines.append(f"{'cost(bits)':>12}{'CPI':>8}  config")
+        for point in front:
+            lines.append(f"{point['cost_bits']:>12}{point['cpi']:>8.3f}  {point['config']}")
+    return '\n'.join(lines)
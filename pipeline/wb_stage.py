@@ -1,43 +1,45 @@
 # pipeline/wb_stage.py
 from cpu.registers import RegisterFile
+from cpu.trace import (Tracer, WB, INFO, DEBUG, EV_WB_NONE, EV_WB_WRITE,
+                       EV_WB_LOAD, EV_WB_NOWRITE)
 
 class WBStage:
     """مرحله Write Back - نوشتن نتایج در رجیستر"""
     
-    def __init__(self, registers):
+    def __init__(self, registers, tracer=None):
         """
         سازنده کلاس WB Stage
         
         Args:
             registers: فایل رجیستر برای نوشتن نتایج
+            tracer: ردیاب رویدادها (اختیاری)
         """
         self.registers = registers
+        self.tracer = tracer if tracer is not None else Tracer()
+        self.undo_log = None  # لیست ثبت مقدار قبلی رجیسترها (pipeline.history)
 
-    def run(self, mem_wb, log=None, debug=False):
+    def run(self, mem_wb):
         """
         اجرای مرحله نوشتن نتیجه در رجیستر
         
         Args:
             mem_wb: اطلاعات دستورالعمل از مرحله Memory
-            log: لیست لاگ برای ثبت عملیات
-            debug: فعال‌سازی حالت دیباگ
             
         Returns:
             dict: دیکشنری خالی (پایان pipeline)
         """
         # بررسی وجود دستورالعمل
         if not mem_wb:
-            if debug:
-                print("WB: No instruction")
-                log.append("WB: No instruction") if log is not None else None
+            if self.tracer.levels[WB] >= DEBUG:
+                self.tracer.emit(WB, EV_WB_NONE)
             return {}
 
         # استخراج اطلاعات دستورالعمل
-        op = mem_wb.get("op")  # نوع عملیات
+        instr = mem_wb["instr"]  # دستور دیکد شده
         rd = mem_wb.get("rd")  # رجیستر مقصد
 
-        # پردازش دستورالعملات محاسباتی و منطقی
-        if op in ["ADD", "ADDI", "SUB", "AND", "OR", "XOR", "LUI", "AUIPC", "JAL", "JALR"]:
+        # پردازش دستورالعملات محاسباتی، منطقی و پرش
+        if instr.writes_rd and not instr.is_load:
             # دریافت نتیجه ALU یا نتیجه محاسبه شده
             value = mem_wb.get("alu_result", mem_wb.get("result"))
             
@@ -46,14 +48,15 @@ class WBStage:
                 raise ValueError(f"WB: trying to write None (alu result) to x{rd}")
 
             # نوشتن مقدار در رجیستر مقصد
+            if self.undo_log is not None:
+                self.undo_log.append((rd, self.registers.read(rd)))
             self.registers.write(rd, value)
 
-            if debug:
-                print(f"WB: Wrote {value} to x{rd}")
-                log.append(f"WB: Wrote {value} to x{rd}") if log is not None else None
+            if self.tracer.levels[WB] >= INFO:
+                self.tracer.emit(WB, EV_WB_WRITE, value, rd)
 
         # پردازش دستورالعملات بارگذاری از حافظه
-        elif op == "LOAD":
+        elif instr.writes_rd:
             # دریافت داده خوانده شده از حافظه
             value = mem_wb.get("mem_data")
            
@@ -62,17 +65,17 @@ class WBStage:
                 raise ValueError(f"WB: trying to write None (mem data) to x{rd}")
             
             # نوشتن داده در رجیستر مقصد
+            if self.undo_log is not None:
+                self.undo_log.append((rd, self.registers.read(rd)))
             self.registers.write(rd, value)            
             
-            if debug:
-                print(f"WB: Loaded {value} to x{rd}")
-                log.append(f"WB: Loaded {value} to x{rd}") if log is not None else None
+            if self.tracer.levels[WB] >= INFO:
+                self.tracer.emit(WB, EV_WB_LOAD, value, rd)
         
         # سایر دستورالعملات که نیازی به نوشتن در رجیستر ندارند        
         else:
-            if debug:
-                print(f"WB: No write for op={op}")
-                log.append(f"WB: No write for op={op}") if log is not None else None
-                
+            if self.tracer.levels[WB] >= DEBUG:
+                self.tracer.emit(WB, EV_WB_NOWRITE, instr)
+
         # بازگشت دیکشنری خالی (پایان pipeline)
         return {}
\ No newline at end of file